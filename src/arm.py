@@ -1,15 +1,31 @@
-from src.motor_controller import TicMotorController
-from src.kinematics import ParaScaraKinematics, ParaScaraSetup, ParaScaraState
-from typing import Optional, Self, override
-from src.utils import get_unsigned_ang_between
-from src.consts import pqt, ur, DEF_LEN_UNIT
-from math import pi
+from src.motor_controller import TicMotorController, TicStatus
+from src.hw_executor import HardwareExecutor
+from src.state_estimator import ArmStateEstimator
+from src.kinematics import ParaScaraKinematics, ParaScaraSetup, ParaScaraState, ParaScaraFloatState, ClosestIKSolution
+from src.trajectory import CartesianPath, MotionProfile, SCurveProfile, JointTrajectory, TrajectoryStreamer, plan_trajectory, time_optimal_trajectory
+from src.workspace import WorkspaceGrid, workspace_key, DEF_CACHE_DIR, CELL_VALID, CELL_BOUNDARY
+from typing import Iterator, Optional, Self, override, TYPE_CHECKING
+import numpy as np
+from numpy.typing import ArrayLike, NDArray
+from src.utils import get_unsigned_ang_between, to_deg, to_rad
+from src.consts import pqt, ur, vec2f, DEF_LEN_UNIT
+from math import pi, cos
+import asyncio
+import time
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
+
+if TYPE_CHECKING:
+    from src.path_planner import GridPathPlanner
+
+# lower bound on the follower's speed and acceleration scale in coordinated moves,
+# so a joint that barely moves is not given a zero limit
+COORD_MIN_RATIO = 0.01
 
 class ArmWorkspaceChecker(ABC): 
-    def __init__(self, setup: ParaScaraSetup): 
+    def __init__(self, setup: ParaScaraSetup, kine_solver: Optional[ParaScaraKinematics] = None): 
         self.setup = setup
-        self.kine_solver = ParaScaraKinematics(setup)
+        self.kine_solver = kine_solver if kine_solver is not None else ParaScaraKinematics(setup)
 
     @abstractmethod
     def is_state_valid(self, state: ParaScaraState) -> bool:
@@ -19,11 +35,62 @@ class ArmWorkspaceChecker(ABC):
     def is_pos_valid(self, x: pqt, y: pqt, mode: str = "+-") -> bool:
         """ Check if the given position of end effector is in the workspace """
 
+    def is_state_valid_f(self, state: ParaScaraFloatState) -> bool:
+        """ Unit-free `is_state_valid`, override for a faster path """
+        return self.is_state_valid(state.to_quantity())
+
+    def is_pos_valid_f(self, x: float, y: float, mode: str = "+-") -> bool:
+        """ Unit-free `is_pos_valid` with x, y in DEF_LEN_UNIT, override for a faster path """
+        return self.is_pos_valid(x * DEF_LEN_UNIT, y * DEF_LEN_UNIT, mode)
+
+    def is_pos_valid_batch(self, x: ArrayLike, y: ArrayLike, mode: str = "+-") -> NDArray[np.bool_]:
+        """
+        Vectorized `is_pos_valid_f`; unreachable positions are False instead of raising.
+        Override with a real batch implementation where possible.
+        """
+        x_arr, y_arr = np.broadcast_arrays(np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64))
+        result = np.zeros(x_arr.shape, dtype=np.bool_)
+        for idx in np.ndindex(x_arr.shape):
+            try:
+                result[idx] = self.is_pos_valid_f(float(x_arr[idx]), float(y_arr[idx]), mode)
+            except (IndexError, ValueError):
+                pass
+        return result
+
+    def project_pos_f(self, x: float, y: float, mode: str = "+-") -> Optional[vec2f]:
+        """
+        Nearest valid position to (x, y) in DEF_LEN_UNIT, or None if none is
+        known. By default only valid positions project (onto themselves);
+        override where the workspace shape is known, as `GridChecker` does.
+        """
+        try:
+            if self.is_pos_valid_f(x, y, mode):
+                return (x, y)
+        except (IndexError, ValueError):
+            pass
+        return None
+
 class LinkAngleChecker(ArmWorkspaceChecker):
-    def __init__(self, setup: ParaScaraSetup, threshold_ang: pqt = 10 * ur.deg):
-        super().__init__(setup)
+    def __init__(
+        self,
+        setup: ParaScaraSetup,
+        threshold_ang: pqt = 10 * ur.deg,
+        kine_solver: Optional[ParaScaraKinematics] = None,
+    ):
+        super().__init__(setup, kine_solver)
         self.threshold_ang = threshold_ang
 
+    @property
+    def threshold_ang(self) -> pqt:
+        return self._threshold_ang
+
+    @threshold_ang.setter
+    def threshold_ang(self, value: pqt) -> None:
+        self._threshold_ang = value
+        self._threshold_rad: float = value.to(ur.rad).m
+        # |link angle - pi| >= threshold  <=>  cos(link angle) >= -cos(threshold)
+        self._threshold_cos: float = -cos(self._threshold_rad)
+
     def get_link_ang_diff(self, state: ParaScaraState) -> pqt:
         """Compute the angle between the two links at a given state."""
         eff_x, eff_y = state.end_effector_pos
@@ -38,6 +105,13 @@ class LinkAngleChecker(ArmWorkspaceChecker):
         ang = get_unsigned_ang_between(vl_x, vl_y, vr_x, vr_y) * ur.rad
         return ang % (2 * ur.pi) #type: ignore
 
+    def get_link_ang_diff_f(self, state: ParaScaraFloatState) -> float:
+        """Unit-free `get_link_ang_diff`, in radians."""
+        eff_x, eff_y = state.end_effector_pos
+        l_x, l_y = state.lf_base_endpos
+        r_x, r_y = state.rt_base_endpos
+        return get_unsigned_ang_between(eff_x - l_x, eff_y - l_y, eff_x - r_x, eff_y - r_y)
+
     @override
     def is_state_valid(self, state: ParaScaraState) -> bool:
         """Return True if the link‐angle is far enough from straight (not stuck)."""
@@ -45,11 +119,82 @@ class LinkAngleChecker(ArmWorkspaceChecker):
         ang_diff = abs(ang_between - pi * ur.rad)
         return ang_diff >= self.threshold_ang
 
+    @override
+    def is_state_valid_f(self, state: ParaScaraFloatState) -> bool:
+        return self.kine_solver.link_cos_f(state) >= self._threshold_cos
+
     @override
     def is_pos_valid(self, x: pqt, y: pqt, mode: str = "+-") -> bool:
         """Inverse‐kinematics then check the resulting state."""
-        state = self.kine_solver.inverse_kinematics(x, y, mode)[0]
-        return self.is_state_valid(state)
+        return self.is_pos_valid_f(x.to(DEF_LEN_UNIT).m, y.to(DEF_LEN_UNIT).m, mode)
+
+    @override
+    def is_pos_valid_f(self, x: float, y: float, mode: str = "+-") -> bool:
+        state = self.kine_solver.inverse_kinematics_f(x, y, mode)[0]
+        return self.is_state_valid_f(state)
+
+    @override
+    def is_pos_valid_batch(self, x: ArrayLike, y: ArrayLike, mode: str = "+-") -> NDArray[np.bool_]:
+        state = self.kine_solver.inverse_kinematics_batch(x, y, mode)[0]
+        with np.errstate(invalid="ignore"):
+            return state.valid & (self.kine_solver.link_cos_batch(state) >= self._threshold_cos)
+
+
+class GridChecker(LinkAngleChecker):
+    """
+    `LinkAngleChecker` answered from a precomputed `WorkspaceGrid`.
+    Only positions in boundary cells, or queried with another mode, run the
+    exact check. The grid is cached on disk keyed by the setup and threshold.
+    """
+
+    def __init__(
+        self,
+        setup: ParaScaraSetup,
+        threshold_ang: pqt = 10 * ur.deg,
+        resolution: float = 1.0,
+        mode: str = "+-",
+        cache_dir: Optional[str] = DEF_CACHE_DIR,
+        kine_solver: Optional[ParaScaraKinematics] = None,
+    ):
+        super().__init__(setup, threshold_ang, kine_solver)
+        key = workspace_key(setup, threshold_ang, resolution, mode)
+        exact_checker = LinkAngleChecker(setup, threshold_ang)
+        self.grid = WorkspaceGrid.load_or_build(exact_checker, key, resolution, mode, cache_dir)
+
+    def is_pos_valid_exact_f(self, x: float, y: float, mode: str = "+-") -> bool:
+        try:
+            return super().is_pos_valid_f(x, y, mode)
+        except ValueError:
+            return False
+
+    @override
+    def is_pos_valid_f(self, x: float, y: float, mode: str = "+-") -> bool:
+        if mode != self.grid.mode:
+            return self.is_pos_valid_exact_f(x, y, mode)
+        cell = self.grid.lookup(x, y)
+        if cell == CELL_BOUNDARY:
+            return self.is_pos_valid_exact_f(x, y, mode)
+        return cell == CELL_VALID
+
+    @override
+    def is_pos_valid_batch(self, x: ArrayLike, y: ArrayLike, mode: str = "+-") -> NDArray[np.bool_]:
+        if mode != self.grid.mode:
+            return super().is_pos_valid_batch(x, y, mode)
+        x_arr, y_arr = np.broadcast_arrays(np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64))
+        cells = self.grid.lookup_batch(x_arr, y_arr)
+        result = cells == CELL_VALID
+        on_boundary = cells == CELL_BOUNDARY
+        if on_boundary.any():
+            result[on_boundary] = super().is_pos_valid_batch(x_arr[on_boundary], y_arr[on_boundary], mode)
+        return result
+
+    @override
+    def project_pos_f(self, x: float, y: float, mode: str = "+-") -> Optional[vec2f]:
+        if self.is_pos_valid_f(x, y, mode):
+            return (x, y)
+        if mode != self.grid.mode:
+            return None
+        return self.grid.nearest_valid_point(x, y)
 
 class NoChecker(ArmWorkspaceChecker):
 
@@ -65,6 +210,25 @@ class NoChecker(ArmWorkspaceChecker):
         print("WARNING: No workspace checker is set, assuming all positions are valid.")
         return True
 
+    @override
+    def is_state_valid_f(self, state: ParaScaraFloatState) -> bool:
+        print("WARNING: No workspace checker is set, assuming all states are valid.")
+        return True
+
+    @override
+    def is_pos_valid_f(self, x: float, y: float, mode: str = "+-") -> bool:
+        print("WARNING: No workspace checker is set, assuming all positions are valid.")
+        return True
+
+    @override
+    def is_pos_valid_batch(self, x: ArrayLike, y: ArrayLike, mode: str = "+-") -> NDArray[np.bool_]:
+        print("WARNING: No workspace checker is set, assuming all positions are valid.")
+        return np.ones(np.broadcast_shapes(np.shape(x), np.shape(y)), dtype=np.bool_)
+
+    @override
+    def project_pos_f(self, x: float, y: float, mode: str = "+-") -> Optional[vec2f]:
+        return (x, y)
+
 class CombinedChecker(ArmWorkspaceChecker):
     def __init__(self, *checkers: ArmWorkspaceChecker):
         if not checkers:
@@ -79,6 +243,30 @@ class CombinedChecker(ArmWorkspaceChecker):
     def is_pos_valid(self, x: pqt, y: pqt, mode: str = "+-") -> bool:
         return all(checker.is_pos_valid(x, y, mode) for checker in self.checkers)
 
+    @override
+    def is_state_valid_f(self, state: ParaScaraFloatState) -> bool:
+        return all(checker.is_state_valid_f(state) for checker in self.checkers)
+
+    @override
+    def is_pos_valid_f(self, x: float, y: float, mode: str = "+-") -> bool:
+        return all(checker.is_pos_valid_f(x, y, mode) for checker in self.checkers)
+
+    @override
+    def is_pos_valid_batch(self, x: ArrayLike, y: ArrayLike, mode: str = "+-") -> NDArray[np.bool_]:
+        result = self.checkers[0].is_pos_valid_batch(x, y, mode)
+        for checker in self.checkers[1:]:
+            result &= checker.is_pos_valid_batch(x, y, mode)
+        return result
+
+    @override
+    def project_pos_f(self, x: float, y: float, mode: str = "+-") -> Optional[vec2f]:
+        """First projection offered by a sub-checker that all checkers accept."""
+        for checker in self.checkers:
+            pos = checker.project_pos_f(x, y, mode)
+            if pos is not None and self.is_pos_valid_f(pos[0], pos[1], mode):
+                return pos
+        return None
+
 
 class Arm:
     def __init__(
@@ -86,15 +274,30 @@ class Arm:
         setup: ParaScaraSetup,
         lf_motor: TicMotorController,
         rt_motor: TicMotorController,
-        workspace_checker: Optional[ArmWorkspaceChecker] = None
+        workspace_checker: Optional[ArmWorkspaceChecker] = None,
+        kine_solver: Optional[ParaScaraKinematics] = None,
     ):
             
-        self.kine_solver = ParaScaraKinematics(setup)
+        self.kine_solver = kine_solver if kine_solver is not None else ParaScaraKinematics(setup)
         self.lf_motor = lf_motor
         self.rt_motor = rt_motor
         if workspace_checker is None:
             workspace_checker = NoChecker(setup) 
         self.workspace_checker = workspace_checker
+        # dead-reckoned pose between occasional hardware reads, see get_estimated_state_f
+        self.state_estimator = ArmStateEstimator(self)
+
+    @contextmanager
+    def batch_writes(self) -> Iterator[None]:
+        """ Send the commands of both motors issued in this block back to back, so the joints start together. """
+        try:
+            with self.lf_motor.batch_writes(), self.rt_motor.batch_writes():
+                yield
+        except BaseException:
+            # on a shared bus the outer batch sends the inner one's writes too
+            self.lf_motor.invalidate_write_cache()
+            self.rt_motor.invalidate_write_cache()
+            raise
 
     def reset_pos(self, x: pqt, y: pqt, mode: str = "+-"):
         state = self.kine_solver.inverse_kinematics(x, y, mode)[0]
@@ -108,14 +311,91 @@ class Arm:
     def move_to_pos(
         self, x: pqt, y: pqt, deg_per_sec: Optional[float] = None, mode: str = "+-"
     ):
-        state = self.kine_solver.inverse_kinematics(x, y, mode)[0]
-        print(f"q1: {state.lf_base_ang}, q2: {state.rt_base_ang}")
-        self.lf_motor.move_to_angle_in_close_dir(
-            state.lf_base_ang.to(ur.deg).m, deg_per_sec
-        )
-        self.rt_motor.move_to_angle_in_close_dir(
-            state.rt_base_ang.to(ur.deg).m, deg_per_sec
+        self.move_to_pos_f(x.to(DEF_LEN_UNIT).m, y.to(DEF_LEN_UNIT).m, deg_per_sec, mode)
+
+    def move_to_pos_f(
+        self, x: float, y: float, deg_per_sec: Optional[float] = None, mode: str = "+-"
+    ):
+        """ Unit-free `move_to_pos` with x, y in DEF_LEN_UNIT """
+        state = self.kine_solver.inverse_kinematics_f(x, y, mode)[0]
+        lf_deg, rt_deg = to_deg(state.lf_base_ang), to_deg(state.rt_base_ang)
+        print(f"q1: {lf_deg} degree, q2: {rt_deg} degree")
+        self._move_joints_in_close_dir(lf_deg, rt_deg, deg_per_sec)
+
+    def _move_joints_in_close_dir(self, lf_deg: float, rt_deg: float, deg_per_sec: Optional[float]):
+        """
+        Independent joint moves. The limits are always sent, so scaled ones
+        left by `move_to_pos_coordinated_f` don't carry over; the write cache
+        drops them when they're unchanged.
+        """
+        with self.batch_writes():
+            for motor, deg in ((self.lf_motor, lf_deg), (self.rt_motor, rt_deg)):
+                spd = motor.max_deg_per_sec if deg_per_sec is None else deg_per_sec
+                motor.move_to_angle_in_close_dir(deg, spd, motor.max_acc_deg_per_sec2)
+
+    def move_to_pos_closest(self, x: pqt, y: pqt, deg_per_sec: Optional[float] = None) -> ClosestIKSolution:
+        return self.move_to_pos_closest_f(x.to(DEF_LEN_UNIT).m, y.to(DEF_LEN_UNIT).m, deg_per_sec)
+
+    def move_to_pos_closest_f(self, x: float, y: float, deg_per_sec: Optional[float] = None) -> ClosestIKSolution:
+        """
+        Move using whichever IK mode is closest to the current joint angles,
+        among the states accepted by the workspace checker.
+        """
+        solution = self.kine_solver.inverse_kinematics_closest_f(
+            x,
+            y,
+            to_rad(self.lf_motor.get_current_deg()),
+            to_rad(self.rt_motor.get_current_deg()),
+            state_filter=self.workspace_checker.is_state_valid_f,
         )
+        lf_deg, rt_deg = to_deg(solution.state.lf_base_ang), to_deg(solution.state.rt_base_ang)
+        print(f"mode: {solution.mode}, q1: {lf_deg} degree, q2: {rt_deg} degree")
+        self._move_joints_in_close_dir(lf_deg, rt_deg, deg_per_sec)
+        return solution
+
+    def move_to_pos_coordinated(
+        self, x: pqt, y: pqt, deg_per_sec: Optional[float] = None, mode: str = "+-"
+    ) -> float:
+        return self.move_to_pos_coordinated_f(x.to(DEF_LEN_UNIT).m, y.to(DEF_LEN_UNIT).m, deg_per_sec, mode)
+
+    def move_to_pos_coordinated_f(
+        self, x: float, y: float, deg_per_sec: Optional[float] = None, mode: str = "+-"
+    ) -> float:
+        """
+        Move both joints so they start and stop together: the joint with the
+        longer travel runs at the highest speed and acceleration both motors
+        allow, the other one at the same fraction of it as its travel.
+        Arriving together assumes both joints start at rest; called mid
+        motion (e.g. from teleop) each Tic ramps from its current velocity
+        and the joints may finish at different times.
+        The other Arm moves send their own limits, so the scaled ones only
+        last until the next move.
+        Returns the predicted move time in seconds.
+        """
+        state = self.kine_solver.inverse_kinematics_f(x, y, mode)[0]
+        lf_deg, rt_deg = to_deg(state.lf_base_ang), to_deg(state.rt_base_ang)
+        # one position read per motor, reused for the move
+        lf_step, rt_step = self.lf_motor.get_current_position(), self.rt_motor.get_current_position()
+        lf_disp = self.lf_motor.calc_close_dir_disp(lf_deg, lf_step)
+        rt_disp = self.rt_motor.calc_close_dir_disp(rt_deg, rt_step)
+
+        lead, follow = (self.lf_motor, lf_deg, lf_disp, lf_step), (self.rt_motor, rt_deg, rt_disp, rt_step)
+        if abs(rt_disp) > abs(lf_disp):
+            lead, follow = follow, lead
+        lead_motor, lead_deg, lead_disp, lead_step = lead
+        follow_motor, follow_deg, follow_disp, follow_step = follow
+        # same profile shape scaled by the travel ratio, so both finish at once
+        ratio = max(abs(follow_disp) / abs(lead_disp), COORD_MIN_RATIO) if lead_disp != 0 else 1.0
+
+        spd = min(lead_motor.max_deg_per_sec, follow_motor.max_deg_per_sec / ratio)
+        if deg_per_sec is not None:
+            spd = min(spd, deg_per_sec)
+        acc = min(lead_motor.max_acc_deg_per_sec2, follow_motor.max_acc_deg_per_sec2 / ratio)
+
+        with self.batch_writes():
+            lead_motor.move_to_angle(lead_deg, lead_disp > 0, spd, acc, lead_step)
+            follow_motor.move_to_angle(follow_deg, follow_disp > 0, spd * ratio, acc * ratio, follow_step)
+        return TicMotorController.calc_move_time(lead_disp, spd, acc)
 
     def move_to_pos_blocking(
         self, x: pqt, y: pqt, deg_per_sec: Optional[float] = None, mode: str = "+-"
@@ -123,29 +403,127 @@ class Arm:
         self.move_to_pos(x, y, deg_per_sec, mode)
         self.block_until_reach()
 
+    def plan_path(
+        self, path: CartesianPath, profile: MotionProfile, dt: float = 0.02, mode: str = "+-"
+    ) -> JointTrajectory:
+        return plan_trajectory(self.kine_solver, path, profile, dt, mode, self.workspace_checker)
+
+    def plan_path_time_optimal(
+        self, path: CartesianPath, n_samples: int = 500, mode: str = "+-"
+    ) -> tuple[JointTrajectory, float]:
+        """ Fastest timing of `path` within both motors' speed and acceleration limits, and its cycle time. """
+        return time_optimal_trajectory(
+            self.kine_solver,
+            path,
+            (self.lf_motor.max_deg_per_sec, self.rt_motor.max_deg_per_sec),
+            (self.lf_motor.max_acc_deg_per_sec2, self.rt_motor.max_acc_deg_per_sec2),
+            n_samples,
+            mode,
+        )
+
+    def move_to_pos_around_f(
+        self,
+        x: float,
+        y: float,
+        planner: "GridPathPlanner",
+        max_vel: float = 50.0,
+        max_acc: float = 200.0,
+        mode: str = "+-",
+    ) -> JointTrajectory:
+        """
+        Move along a valid path from the current position to (x, y), planned
+        around invalid workspace regions. Blocks until the path was streamed.
+        """
+        cur = self.get_current_state_f()[0].end_effector_pos
+        path = planner.plan_polyline(cur, (x, y))
+        traj = self.plan_path(path, SCurveProfile(path.length, max_vel, max_acc), mode=mode)
+        self.follow_trajectory(traj)
+        return traj
+
+    def follow_trajectory(self, traj: JointTrajectory, rate_hz: float = 50.0) -> bool:
+        """ Stream `traj` to the motors, blocking until it was sent. See `TrajectoryStreamer`. """
+        return TrajectoryStreamer(self, rate_hz).stream(traj)
+
+    @property
+    def executor(self) -> HardwareExecutor:
+        """ I/O thread the *_async methods run on, the one of the left motor. """
+        return self.lf_motor.executor
+
+    async def reset_deg_async(self, left_deg: float, right_deg: float):
+        await self.executor.run(self.reset_deg, left_deg, right_deg)
+
+    async def move_to_pos_async(
+        self, x: pqt, y: pqt, deg_per_sec: Optional[float] = None, mode: str = "+-"
+    ):
+        await self.executor.run(self.move_to_pos, x, y, deg_per_sec, mode)
+
+    async def move_to_pos_f_async(
+        self, x: float, y: float, deg_per_sec: Optional[float] = None, mode: str = "+-"
+    ):
+        await self.executor.run(self.move_to_pos_f, x, y, deg_per_sec, mode)
+
+    async def get_current_state_async(self, mode: str = 'o') -> list[ParaScaraState]:
+        return await self.executor.run(self.get_current_state, mode)
+
+    async def get_current_state_f_async(self, mode: str = 'o') -> list[ParaScaraFloatState]:
+        return await self.executor.run(self.get_current_state_f, mode)
+
+    async def is_moving_async(self) -> bool:
+        return await self.executor.run(self.is_moving)
+
     def get_current_state(self, mode: str = 'o') -> list[ParaScaraState]:
+        return [state.to_quantity() for state in self.get_current_state_f(mode)]
+
+    def get_current_state_f(self, mode: str = 'o') -> list[ParaScaraFloatState]:
         left_ang = self.lf_motor.get_current_deg()
         right_ang = self.rt_motor.get_current_deg()
-        return self.kine_solver.forward_kinematics(
-            left_ang * ur.deg, right_ang * ur.deg, mode
+        return self.kine_solver.forward_kinematics_f(
+            to_rad(left_ang), to_rad(right_ang), mode
         )
 
+    def get_estimated_state_f(self, mode: str = 'o') -> list[ParaScaraFloatState]:
+        """ `get_current_state_f` from the state estimator, only touching the bus when it resyncs. """
+        return self.state_estimator.get_current_state_f(mode)
+
+    def get_status(self) -> tuple[TicStatus, TicStatus]:
+        """ (left, right) motor status snapshots. """
+        return self.lf_motor.get_status(), self.rt_motor.get_status()
+
     def is_moving(self) -> bool:
-        return self.lf_motor.is_moving() or self.rt_motor.is_moving()
+        # the right motor is only read if the left one has stopped
+        return self.lf_motor.get_status().is_moving or self.rt_motor.get_status().is_moving
 
-    def block_until_reach(self):
-        while self.is_moving():
-            pass
+    def block_until_reach(self, timeout: Optional[float] = None):
+        """ Wait for both motors, raising TimeoutError after `timeout` seconds in total. """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        self.lf_motor.block_until_reach(timeout)
+        self.rt_motor.block_until_reach(None if deadline is None else max(deadline - time.monotonic(), 0.0))
+
+    async def block_until_reach_async(self, timeout: Optional[float] = None):
+        async with asyncio.timeout(timeout):
+            await asyncio.gather(
+                self.lf_motor.block_until_reach_async(),
+                self.rt_motor.block_until_reach_async(),
+            )
 
     def clean_up(self):
-        self.lf_motor.tic.deenergize()
-        self.rt_motor.tic.deenergize()
+        self.lf_motor.deenergize()
+        self.rt_motor.deenergize()
 
     def is_state_valid(self, state: ParaScaraState) -> bool:
         return self.workspace_checker.is_state_valid(state)
 
     def is_pos_valid(self, x: pqt, y: pqt, mode: str = "+-") -> bool:
         return self.workspace_checker.is_pos_valid(x, y, mode)
+
+    def is_state_valid_f(self, state: ParaScaraFloatState) -> bool:
+        return self.workspace_checker.is_state_valid_f(state)
+
+    def is_pos_valid_f(self, x: float, y: float, mode: str = "+-") -> bool:
+        return self.workspace_checker.is_pos_valid_f(x, y, mode)
+
+    def project_pos_f(self, x: float, y: float, mode: str = "+-") -> Optional[vec2f]:
+        return self.workspace_checker.project_pos_f(x, y, mode)
     
     def __enter__(self) -> Self:
         return self
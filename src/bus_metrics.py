@@ -0,0 +1,182 @@
+import threading
+from dataclasses import dataclass, field
+from time import perf_counter_ns
+from typing import Any, Optional
+
+from ticlib.ticlib import COMMANDS, VARIABLES, SETTINGS, GET_VARIABLE_CMD, GET_SETTING_CMD, THIRTY_TWO_BITS, SEVEN_BITS, BLOCK_READ
+
+# latency histogram bucket k counts calls taking [2^(k-1), 2^k) microseconds, the last one everything slower
+HIST_BUCKETS = 24
+# payload bytes following the command byte, per ticlib command format
+COMMAND_PAYLOAD_BYTES = {THIRTY_TWO_BITS: 4, SEVEN_BITS: 1, BLOCK_READ: 2}
+
+_COMMAND_NAMES = {code: name for name, code, _ in COMMANDS}
+_READ_NAMES = {
+    **{(GET_VARIABLE_CMD, offset, length): f"get_{name}" for name, offset, length, _ in VARIABLES},
+    **{(GET_SETTING_CMD, offset, length): f"get_setting_{name}" for name, offset, length, _ in SETTINGS},
+}
+
+
+def command_name(command_code: int) -> str:
+    return _COMMAND_NAMES.get(command_code, f"command_{command_code:#04x}")
+
+
+def block_read_name(command_code: int, offset: int, length: int) -> str:
+    """ ticlib getter name of a block read, or the raw range for multi-variable reads. """
+    name = _READ_NAMES.get((command_code, offset, length))
+    if name is not None:
+        return name
+    kind = "variables" if command_code == GET_VARIABLE_CMD else "settings"
+    return f"get_{kind}_{offset:#04x}+{length}"
+
+
+@dataclass(slots=True)
+class CommandMetrics:
+    count: int = 0
+    errors: int = 0
+    bytes_out: int = 0
+    bytes_in: int = 0
+    total_ns: int = 0
+    max_ns: int = 0
+    histogram: list[int] = field(default_factory=lambda: [0] * HIST_BUCKETS)
+
+    def record(self, elapsed_ns: int, bytes_out: int, bytes_in: int) -> None:
+        self.count += 1
+        self.bytes_out += bytes_out
+        self.bytes_in += bytes_in
+        self.total_ns += elapsed_ns
+        if elapsed_ns > self.max_ns:
+            self.max_ns = elapsed_ns
+        self.histogram[min((elapsed_ns // 1000).bit_length(), HIST_BUCKETS - 1)] += 1
+
+    def percentile_us(self, q: float) -> float:
+        """ Upper bound of the histogram bucket holding the `q` quantile, in microseconds. """
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for k, n in enumerate(self.histogram):
+            seen += n
+            if seen >= rank and n:
+                return float(1 << k) if k < HIST_BUCKETS - 1 else self.max_ns / 1000
+        return self.max_ns / 1000
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "bytes_out": self.bytes_out,
+            "bytes_in": self.bytes_in,
+            "mean_us": self.total_ns / self.count / 1000 if self.count else 0.0,
+            "max_us": self.max_ns / 1000,
+            "p50_us": self.percentile_us(0.5),
+            "p99_us": self.percentile_us(0.99),
+            # upper bound in microseconds -> calls, empty buckets left out
+            "histogram_us": {
+                (str(1 << k) if k < HIST_BUCKETS - 1 else "inf"): n for k, n in enumerate(self.histogram) if n
+            },
+        }
+
+
+class BusMetrics:
+    """
+    Call counts, bytes and latency histograms per (device, command).
+    Recording is a couple of integer updates under an uncontended lock,
+    cheap next to any bus transfer, so it can stay enabled.
+    """
+
+    def __init__(self):
+        self._commands: dict[tuple[str, str], CommandMetrics] = {}
+        self._lock = threading.Lock()
+
+    def record(self, device: str, command: str, elapsed_ns: int, bytes_out: int, bytes_in: int, ok: bool = True) -> None:
+        key = (device, command)
+        with self._lock:
+            metrics = self._commands.get(key)
+            if metrics is None:
+                metrics = self._commands[key] = CommandMetrics()
+            if ok:
+                metrics.record(elapsed_ns, bytes_out, bytes_in)
+            else:
+                metrics.errors += 1
+
+    def snapshot(self, reset: bool = False) -> dict[str, dict[str, dict[str, Any]]]:
+        """
+        {device: {command: metrics}}, e.g. for a JSON endpoint. With `reset`
+        the metrics are cleared in the same locked step, so no call recorded
+        in between is lost.
+        """
+        with self._lock:
+            result: dict[str, dict[str, dict[str, Any]]] = {}
+            for (device, command), metrics in sorted(self._commands.items()):
+                result.setdefault(device, {})[command] = metrics.to_dict()
+            if reset:
+                self._commands.clear()
+            return result
+
+    def reset(self) -> None:
+        with self._lock:
+            self._commands.clear()
+
+
+_default_metrics: Optional[BusMetrics] = None
+_default_lock = threading.Lock()
+
+
+def get_bus_metrics() -> BusMetrics:
+    """ Process-wide metrics that instrumented Tics record into by default. """
+    global _default_metrics
+    with _default_lock:
+        if _default_metrics is None:
+            _default_metrics = BusMetrics()
+        return _default_metrics
+
+
+class InstrumentedTicMixin:
+    """
+    Mixin for `TicBase` drivers (put it before the driver in the bases)
+    recording every command and block read into `metrics` under
+    `metrics_device`, which subclasses set to e.g. the bus address.
+    """
+
+    metrics_device: str = "tic"
+    metrics: Optional[BusMetrics] = None
+
+    def _send_command(self, command_code, format, value=None):
+        if format == BLOCK_READ:
+            # the request half of a block read, recorded by _block_read
+            return super()._send_command(command_code, format, value)  # type: ignore
+        metrics = self.metrics or get_bus_metrics()
+        st = perf_counter_ns()
+        ok = False
+        try:
+            result = super()._send_command(command_code, format, value)  # type: ignore
+            ok = True
+            return result
+        finally:
+            metrics.record(
+                self.metrics_device,
+                command_name(command_code),
+                perf_counter_ns() - st,
+                1 + COMMAND_PAYLOAD_BYTES.get(format, 0),
+                0,
+                ok,
+            )
+
+    def _block_read(self, command_code, offset, length, format_response=None):
+        metrics = self.metrics or get_bus_metrics()
+        st = perf_counter_ns()
+        ok = False
+        try:
+            result = super()._block_read(command_code, offset, length, format_response)  # type: ignore
+            ok = True
+            return result
+        finally:
+            metrics.record(
+                self.metrics_device,
+                block_read_name(command_code, offset, length),
+                perf_counter_ns() - st,
+                1 + COMMAND_PAYLOAD_BYTES[BLOCK_READ],
+                length,
+                ok,
+            )
@@ -0,0 +1,124 @@
+import asyncio
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Optional, Self, TypeVar
+
+T = TypeVar("T")
+
+# how long `run` backs off when the command queue is full
+FULL_QUEUE_RETRY_SEC = 0.001
+
+
+class HardwareExecutor:
+    """
+    Runs hardware (I2C) calls one at a time on a single dedicated thread,
+    fed by a bounded command queue.
+
+    `submit` is for threads and blocks while the queue is full, `try_submit`
+    returns None instead; `run` is the awaitable counterpart and yields to
+    the event loop. Calls made from the I/O thread itself run inline, so an
+    executed function may use other executor-backed helpers without
+    deadlocking.
+    """
+
+    def __init__(self, maxsize: int = 64, name: str = "hw-io"):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self._queue: queue.Queue[Optional[tuple[Future, Callable[..., Any], tuple, dict]]] = queue.Queue(maxsize)
+        self._thread = threading.Thread(target=self._worker, name=name, daemon=True)
+        self._closed = False
+        self._thread.start()
+
+    def _worker(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            future, fn, args, kwargs = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+
+    def in_io_thread(self) -> bool:
+        return threading.current_thread() is self._thread
+
+    @property
+    def pending(self) -> int:
+        """ Commands waiting in the queue, not counting the one running. """
+        return self._queue.qsize()
+
+    def _make_item(self, fn: Callable[..., T], args: tuple, kwargs: dict) -> tuple[Future, Callable[..., T], tuple, dict]:
+        if self._closed:
+            raise RuntimeError("hardware executor is shut down")
+        return (Future(), fn, args, kwargs)
+
+    def submit(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> "Future[T]":
+        item = self._make_item(fn, args, kwargs)
+        future = item[0]
+        if self.in_io_thread():
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+            return future
+        self._queue.put(item)
+        return future
+
+    def try_submit(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> "Optional[Future[T]]":
+        """ `submit` that never blocks: returns None instead of waiting when the queue is full. """
+        item = self._make_item(fn, args, kwargs)
+        if self.in_io_thread():
+            return self.submit(fn, *args, **kwargs)
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            return None
+        return item[0]
+
+    def call(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """ Blocking `submit` that returns the result or raises its exception. """
+        return self.submit(fn, *args, **kwargs).result()
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        item = self._make_item(fn, args, kwargs)
+        if self.in_io_thread():
+            return fn(*args, **kwargs)
+        while True:
+            try:
+                self._queue.put_nowait(item)
+                break
+            except queue.Full:
+                await asyncio.sleep(FULL_QUEUE_RETRY_SEC)
+        return await asyncio.wrap_future(item[0])
+
+    def shutdown(self, wait: bool = True) -> None:
+        """ Stop accepting commands; queued ones still run before the thread exits. """
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        if wait and not self.in_io_thread():
+            self._thread.join()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
+
+
+_default_executor: Optional[HardwareExecutor] = None
+_default_lock = threading.Lock()
+
+
+def get_default_executor() -> HardwareExecutor:
+    """ Process wide executor shared by all motors unless one is given explicitly. """
+    global _default_executor
+    with _default_lock:
+        if _default_executor is None:
+            _default_executor = HardwareExecutor()
+        return _default_executor
@@ -0,0 +1,249 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from typing import Iterator, Optional
+
+from smbus2 import SMBus, i2c_msg
+from ticlib import TicI2C
+
+from src.bus_metrics import InstrumentedTicMixin
+
+
+@dataclass
+class BusStats:
+    transactions: int = 0
+    batches: int = 0
+    batched_writes: int = 0
+    # total time callers spent waiting for another thread's transaction
+    lock_wait_sec: float = 0.0
+
+    def to_dict(self) -> dict[str, float]:
+        return asdict(self)
+
+
+class BatchFlushError(OSError):
+    """ Sending a batch failed part way; `unsent` holds the writes that never went out, per address. """
+
+    def __init__(self, cause: OSError, unsent: dict[int, list[bytes]]):
+        super().__init__(f"{sum(map(len, unsent.values()))} batched writes not sent: {cause}")
+        self.unsent = unsent
+
+
+class I2CBus:
+    """
+    One shared handle to an I2C bus. Every transaction holds the bus lock,
+    so devices on the same bus can be driven from several threads, and a
+    write+read pair (e.g. a Tic block read) can't be split by another
+    device's traffic.
+
+    Inside `batch()` the writes of the calling thread are queued per device
+    instead of sent, and go out back to back when the outermost batch
+    exits. The bus is only locked for that flush, the body of the batch
+    (position reads, IK) doesn't hold up other threads. The device queues
+    are drained round robin aligned at their ends: longer queues start
+    early, so the last command of every device, usually its target, goes
+    out in the final round, adjacent on the wire, even when the write
+    cache dropped some of one device's commands. With `combined_writes`
+    the whole batch is one `i2c_rdwr` call, which shortens the gaps further
+    but joins the messages with repeated starts, so every device on the
+    bus must accept those.
+    """
+
+    def __init__(self, bus_num: int, combined_writes: bool = False):
+        self.bus_num = bus_num
+        self.combined_writes = combined_writes
+        self.smbus = SMBus(bus_num)
+        self.stats = BusStats()
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        # writes held back by open batches, per thread, then per device
+        self._queued: dict[int, dict[int, deque[bytes]]] = {}
+        self._waiting: dict[int, int] = {}
+        self._count_lock = threading.Lock()
+
+    @contextmanager
+    def transaction(self, address: int) -> Iterator[None]:
+        """ Hold the bus for a sequence of messages to `address`. """
+        with self._count_lock:
+            self._waiting[address] = self._waiting.get(address, 0) + 1
+        st = time.perf_counter()
+        try:
+            self._lock.acquire()
+        finally:
+            with self._count_lock:
+                self._waiting[address] -= 1
+        try:
+            self.stats.lock_wait_sec += time.perf_counter() - st
+            # this thread's queued writes to the device must land before anything new
+            self._flush_device(address)
+            yield
+        finally:
+            self._lock.release()
+
+    def write(self, address: int, data: bytes) -> None:
+        queued = self._batch_queues()
+        if queued is not None:
+            with self._count_lock:
+                queued.setdefault(address, deque()).append(bytes(data))
+            return
+        with self.transaction(address):
+            self._rdwr(i2c_msg.write(address, data))
+
+    def read(self, address: int, length: int) -> bytes:
+        with self.transaction(address):
+            msg = i2c_msg.read(address, length)
+            self._rdwr(msg)
+            return bytes(msg)[:length]
+
+    def write_read(self, address: int, data: bytes, length: int) -> bytes:
+        """ Write `data`, then read `length` bytes, with no other traffic in between. """
+        with self.transaction(address):
+            self._rdwr(i2c_msg.write(address, data))
+            msg = i2c_msg.read(address, length)
+            self._rdwr(msg)
+            return bytes(msg)[:length]
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """
+        Queue writes made by this thread and send them together on exit.
+        Nests. Raises `BatchFlushError` if the flush fails part way.
+        """
+        if self._batch_queues() is not None:
+            # the outermost batch sends
+            yield
+            return
+        queued: dict[int, deque[bytes]] = {}
+        thread_id = threading.get_ident()
+        self._local.queued = queued
+        with self._count_lock:
+            self._queued[thread_id] = queued
+        try:
+            yield
+        finally:
+            self._local.queued = None
+            try:
+                self._flush(queued)
+            finally:
+                with self._count_lock:
+                    del self._queued[thread_id]
+
+    def pending(self, address: int) -> int:
+        """ Transactions waiting for the bus plus writes queued in open batches, for one device. """
+        with self._count_lock:
+            return self._waiting.get(address, 0) + sum(len(queued.get(address, ())) for queued in self._queued.values())
+
+    def _batch_queues(self) -> Optional[dict[int, deque[bytes]]]:
+        """ This thread's queued writes per device, None outside a batch. """
+        return getattr(self._local, "queued", None)
+
+    def _rdwr(self, *msgs: i2c_msg) -> None:
+        self.smbus.i2c_rdwr(*msgs)
+        self.stats.transactions += 1
+
+    def _flush_device(self, address: int) -> None:
+        queued = self._batch_queues()
+        if not queued:
+            return
+        with self._count_lock:
+            writes = queued.pop(address, None)
+        while writes:
+            self._rdwr(i2c_msg.write(address, writes.popleft()))
+
+    @staticmethod
+    def _tail_aligned(queued: dict[int, deque[bytes]]) -> list[tuple[int, bytes]]:
+        """ Round robin over the device queues, with every queue ending in the last round. """
+        rounds = max(map(len, queued.values()), default=0)
+        writes = []
+        for r in range(rounds):
+            for address, writes_to in queued.items():
+                k = r - (rounds - len(writes_to))
+                if k >= 0:
+                    writes.append((address, writes_to[k]))
+        return writes
+
+    def _flush(self, queued: dict[int, deque[bytes]]) -> None:
+        with self._count_lock:
+            writes = self._tail_aligned(queued)
+            queued.clear()
+        if not writes:
+            return
+        with self._lock:
+            self.stats.batches += 1
+            self.stats.batched_writes += len(writes)
+            if self.combined_writes:
+                try:
+                    self._rdwr(*(i2c_msg.write(address, data) for address, data in writes))
+                except OSError as e:
+                    raise BatchFlushError(e, _by_address(writes)) from e
+                return
+            for k, (address, data) in enumerate(writes):
+                try:
+                    self._rdwr(i2c_msg.write(address, data))
+                except OSError as e:
+                    raise BatchFlushError(e, _by_address(writes[k:])) from e
+
+    def close(self) -> None:
+        with self._lock:
+            self.smbus.close()
+
+
+def _by_address(writes: list[tuple[int, bytes]]) -> dict[int, list[bytes]]:
+    grouped: dict[int, list[bytes]] = {}
+    for address, data in writes:
+        grouped.setdefault(address, []).append(data)
+    return grouped
+
+
+class I2CBusBackend:
+    """ ticlib backend that sends through a shared `I2CBus`. """
+
+    def __init__(self, bus: I2CBus, address: int):
+        self.bus = bus
+        self.address = address
+
+    def read(self, length: int) -> bytes:
+        return self.bus.read(self.address, length)
+
+    def write(self, serialized: bytes) -> None:
+        self.bus.write(self.address, serialized)
+
+    def write_read(self, serialized: bytes, length: int) -> bytes:
+        return self.bus.write_read(self.address, serialized, length)
+
+
+class _AtomicTicI2C(TicI2C):
+    """ `TicI2C` doing block reads as one write+read transaction of the backend. """
+
+    def _block_read(self, command_code, offset, length, format_response=None):
+        result = self.backend.write_read(bytes([command_code, offset, length]), length)
+        if len(result) != length:
+            raise RuntimeError(f"Expected to read {length} bytes, got {len(result)}.")
+        if format_response is None:
+            return result
+        return format_response(result)
+
+
+class BusTicI2C(InstrumentedTicMixin, _AtomicTicI2C):
+    """ `TicI2C` on a shared `I2CBus`, with atomic block reads and per-command metrics. """
+
+    def __init__(self, bus: I2CBus, address: int):
+        super().__init__(I2CBusBackend(bus, address))
+        self.bus = bus
+        self.address = address
+        self.metrics_device = f"i2c-{bus.bus_num}/{address:#04x}"
+
+
+_buses: dict[int, I2CBus] = {}
+_buses_lock = threading.Lock()
+
+
+def get_i2c_bus(bus_num: int) -> I2CBus:
+    """ The process-wide `I2CBus` for `bus_num`, opened on first use. """
+    with _buses_lock:
+        bus = _buses.get(bus_num)
+        if bus is None:
+            bus = _buses[bus_num] = I2CBus(bus_num)
+        return bus
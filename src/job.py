@@ -0,0 +1,435 @@
+import csv
+import queue
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, asdict
+from itertools import islice
+from math import atan2, ceil, hypot, pi, sqrt
+from typing import Iterable, Iterator, Optional, TextIO, TYPE_CHECKING
+
+import numpy as np
+
+from src.consts import vec2f
+from src.trajectory import ArcPath, JointTrajectory, TrajectoryStreamer
+
+if TYPE_CHECKING:
+    from src.arm import Arm
+
+MM_PER_INCH = 25.4
+_GCODE_WORD = re.compile(r"([A-Za-z])\s*([-+]?(?:\d+\.?\d*|\.\d+))")
+_GCODE_COMMENT = re.compile(r"\(.*?\)|;.*")
+
+
+@dataclass(slots=True)
+class JobMove:
+    """
+    One straight move of a job to (x, y) in DEF_LEN_UNIT. `feed` is the
+    requested speed in DEF_LEN_UNIT per second, None for a rapid move.
+    `line_no` points back into the source file for error messages.
+    """
+    x: float
+    y: float
+    feed: Optional[float]
+    line_no: int
+
+
+def parse_gcode(lines: Iterable[str], arc_seg_len: float = 1.0, start: Optional[vec2f] = None) -> Iterator[JobMove]:
+    """
+    Lazily parse the planar G-code subset used for drawing jobs: G0/G1 lines,
+    G2/G3 arcs with I/J center offsets (split into `arc_seg_len` chords),
+    G20/G21 units, G90/G91 positioning and F feed in units per minute.
+    Other words (Z, M codes, ...) are ignored.
+
+    Relative and single-axis moves and arcs build on the current position:
+    `start` (in DEF_LEN_UNIT, where the job begins), or else the first
+    absolute X Y move, before which they raise ValueError.
+    """
+    known = start is not None
+    x, y = start if start is not None else (0.0, 0.0)
+    unit = 1.0
+    absolute = True
+    motion = 0
+    feed: Optional[float] = None
+
+    for line_no, raw in enumerate(lines, start=1):
+        words = _GCODE_WORD.findall(_GCODE_COMMENT.sub("", raw))
+        if not words:
+            continue
+        params: dict[str, float] = {}
+        for letter, value in words:
+            letter = letter.upper()
+            if letter == "G":
+                code = float(value)
+                if code in (0, 1, 2, 3):
+                    motion = int(code)
+                elif code == 20:
+                    unit = MM_PER_INCH
+                elif code == 21:
+                    unit = 1.0
+                elif code == 90:
+                    absolute = True
+                elif code == 91:
+                    absolute = False
+            else:
+                params[letter] = float(value)
+
+        if "F" in params:
+            feed = params["F"] * unit / 60
+        if "X" not in params and "Y" not in params:
+            continue
+        if not known and (not absolute or "X" not in params or "Y" not in params or motion in (2, 3)):
+            raise ValueError(f"line {line_no}: relative, single-axis or arc move before the position is known")
+        known = True
+
+        if absolute:
+            tar_x = params["X"] * unit if "X" in params else x
+            tar_y = params["Y"] * unit if "Y" in params else y
+        else:
+            tar_x = x + params.get("X", 0.0) * unit
+            tar_y = y + params.get("Y", 0.0) * unit
+
+        if motion in (2, 3):
+            center = (x + params.get("I", 0.0) * unit, y + params.get("J", 0.0) * unit)
+            start_ang = atan2(y - center[1], x - center[0])
+            sweep = atan2(tar_y - center[1], tar_x - center[0]) - start_ang
+            if motion == 2:
+                sweep = sweep % -(2 * pi) or -2 * pi
+            else:
+                sweep = sweep % (2 * pi) or 2 * pi
+            arc = ArcPath.from_center((x, y), center, sweep)
+            n_seg = max(ceil(arc.length / arc_seg_len), 1)
+            arc_x, arc_y = arc.points_at(np.linspace(0, arc.length, n_seg + 1)[1:-1])
+            for px, py in zip(arc_x.tolist(), arc_y.tolist()):
+                yield JobMove(px, py, feed, line_no)
+
+        x, y = tar_x, tar_y
+        yield JobMove(x, y, None if motion == 0 else feed, line_no)
+
+
+def parse_csv(lines: Iterable[str]) -> Iterator[JobMove]:
+    """
+    Lazily parse `x,y[,feed]` waypoint rows, feed in DEF_LEN_UNIT per second.
+    A non-numeric first row is taken as a header; blank rows and rows
+    starting with '#' are skipped.
+    """
+    rows = csv.reader(lines)
+    for line_no, row in enumerate(rows, start=1):
+        if not row or not row[0].strip() or row[0].lstrip().startswith("#"):
+            continue
+        try:
+            x, y = float(row[0]), float(row[1])
+            feed = float(row[2]) if len(row) > 2 and row[2].strip() else None
+        except (ValueError, IndexError) as e:
+            if line_no == 1:
+                continue
+            raise ValueError(f"line {line_no}: invalid waypoint row {row!r}") from e
+        yield JobMove(x, y, feed, line_no)
+
+
+def read_job(file: TextIO, fmt: Optional[str] = None, start: Optional[vec2f] = None) -> Iterator[JobMove]:
+    """
+    Moves of an open job file, read line by line; `fmt` is "gcode" or "csv",
+    else guessed from the name. `start` is passed on to `parse_gcode`.
+    """
+    if fmt is None:
+        fmt = "csv" if getattr(file, "name", "").lower().endswith(".csv") else "gcode"
+    if fmt == "csv":
+        return parse_csv(file)
+    if fmt == "gcode":
+        return parse_gcode(file, start=start)
+    raise ValueError(f"unknown job format {fmt!r}")
+
+
+@dataclass
+class JobStats:
+    moves: int = 0
+    chunks: int = 0
+    elapsed: float = 0.0
+    planned_time: float = 0.0
+    # time of planned motion queued ahead of the motors, seen when a chunk starts
+    lead_time: float = 0.0
+    min_lead_time: float = float("inf")
+    underruns: int = 0
+    late_ticks: int = 0
+
+    @property
+    def moves_per_sec(self) -> float:
+        return self.moves / self.elapsed if self.elapsed > 0 else 0.0
+
+    def to_dict(self) -> dict[str, float]:
+        return {**asdict(self), "moves_per_sec": self.moves_per_sec}
+
+
+@dataclass(slots=True)
+class _Segment:
+    start: vec2f
+    end: vec2f
+    length: float
+    direction: vec2f
+    v_max: float
+    line_no: int
+    entry_vel: float = 0.0
+    max_entry_vel: float = 0.0
+
+
+class JobExecutor:
+    """
+    Streams a job's moves to an `Arm` without holding the whole job in memory.
+
+    Moves are read `lookahead` at a time, every new segment is sampled every
+    `check_step` and validated against the arm's workspace checker, and
+    segment junction speeds are planned over the lookahead window with the
+    junction deviation rule and forward/backward acceleration passes, the
+    window's last segment always ending at rest. The first half of the
+    window is then committed as one joint trajectory chunk and the window is
+    refilled. A planner thread keeps up to `queue_chunks` chunks ahead of
+    the streaming thread; the time they cover is the planner's lead.
+    """
+
+    def __init__(
+        self,
+        arm: "Arm",
+        lookahead: int = 32,
+        max_feed: float = 100.0,
+        max_acc: float = 500.0,
+        junction_deviation: float = 0.05,
+        check_step: float = 1.0,
+        dt: float = 0.02,
+        rate_hz: float = 50.0,
+        queue_chunks: int = 4,
+        mode: str = "+-",
+    ):
+        if lookahead < 2:
+            raise ValueError("lookahead must be at least 2")
+        self.arm = arm
+        self.lookahead = lookahead
+        self.max_feed = max_feed
+        self.max_acc = max_acc
+        self.junction_deviation = junction_deviation
+        self.check_step = check_step
+        self.dt = dt
+        self.rate_hz = rate_hz
+        self.queue_chunks = queue_chunks
+        self.mode = mode
+        self.stats = JobStats()
+        self._streamer: Optional[TrajectoryStreamer] = None
+        self._stop = threading.Event()
+
+    def _to_segments(self, moves: list[JobMove], start: vec2f) -> list[_Segment]:
+        segments = []
+        for move in moves:
+            length = hypot(move.x - start[0], move.y - start[1])
+            if length < 1e-9:
+                continue
+            feed = self.max_feed if move.feed is None else min(move.feed, self.max_feed)
+            if feed <= 0:
+                raise ValueError(f"line {move.line_no}: feed must be positive")
+            direction = ((move.x - start[0]) / length, (move.y - start[1]) / length)
+            segments.append(_Segment(start, (move.x, move.y), length, direction, feed, move.line_no))
+            start = (move.x, move.y)
+        return segments
+
+    def _validate(self, segments: list[_Segment]) -> None:
+        """ Check points every `check_step` along all segments with one batch call. """
+        if not segments:
+            return
+        n = np.array([max(ceil(seg.length / self.check_step), 1) for seg in segments])
+        seg_idx = np.repeat(np.arange(len(segments)), n)
+        frac = (np.arange(n.sum()) - np.repeat(np.cumsum(n) - n, n) + 1) / np.repeat(n, n)
+        starts = np.array([seg.start for seg in segments])
+        ends = np.array([seg.end for seg in segments])
+        pts = starts[seg_idx] + (ends - starts)[seg_idx] * frac[:, None]
+        valid = self.arm.workspace_checker.is_pos_valid_batch(pts[:, 0], pts[:, 1], self.mode)
+        if not valid.all():
+            bad = int(np.argmin(valid))
+            seg = segments[seg_idx[bad]]
+            raise ValueError(
+                f"line {seg.line_no}: move leaves the workspace at ({pts[bad, 0]:.2f}, {pts[bad, 1]:.2f})"
+            )
+
+    def _junction_vel(self, prev: _Segment, nxt: _Segment) -> float:
+        # cosine of the angle between the incoming path reversed and the outgoing one
+        cos_theta = -(prev.direction[0] * nxt.direction[0] + prev.direction[1] * nxt.direction[1])
+        v_cap = min(prev.v_max, nxt.v_max)
+        if cos_theta <= -0.999999:
+            return v_cap
+        if cos_theta >= 0.999999:
+            return 0.0
+        sin_half = sqrt((1 - cos_theta) / 2)
+        return min(v_cap, sqrt(self.max_acc * self.junction_deviation * sin_half / (1 - sin_half)))
+
+    def _plan_window(self, window: deque[_Segment], entry_vel: float) -> None:
+        """ Set every segment's entry velocity, the window ending at rest. """
+        window[0].entry_vel = window[0].max_entry_vel = entry_vel
+        for i in range(1, len(window)):
+            window[i].max_entry_vel = self._junction_vel(window[i - 1], window[i])
+
+        exit_vel = 0.0
+        for seg in reversed(window):
+            seg.entry_vel = min(seg.max_entry_vel, sqrt(exit_vel**2 + 2 * self.max_acc * seg.length))
+            exit_vel = seg.entry_vel
+        window[0].entry_vel = entry_vel
+
+        for i in range(1, len(window)):
+            prev = window[i - 1]
+            window[i].entry_vel = min(window[i].entry_vel, sqrt(prev.entry_vel**2 + 2 * self.max_acc * prev.length))
+
+    def _sample_chunk(self, segments: list[_Segment], exit_vel: float) -> JointTrajectory:
+        """ Sample trapezoids with the planned entry/exit speeds every `dt` and solve batch IK. """
+        a = self.max_acc
+        v0 = np.array([seg.entry_vel for seg in segments])
+        v1 = np.append(v0[1:], exit_vel)
+        length = np.array([seg.length for seg in segments])
+        v_max = np.array([seg.v_max for seg in segments])
+
+        v_peak = np.minimum(v_max, np.sqrt((2 * a * length + v0**2 + v1**2) / 2))
+        v_peak = np.maximum(v_peak, np.maximum(v0, v1))
+        t_acc = (v_peak - v0) / a
+        t_dec = (v_peak - v1) / a
+        d_acc = (v_peak**2 - v0**2) / (2 * a)
+        d_dec = (v_peak**2 - v1**2) / (2 * a)
+        t_cruise = np.maximum(length - d_acc - d_dec, 0.0) / v_peak
+        seg_time = t_acc + t_cruise + t_dec
+        seg_start = np.concatenate(([0.0], np.cumsum(seg_time)))
+        total = float(seg_start[-1])
+
+        t = np.minimum(np.arange(max(ceil(total / self.dt), 1) + 1) * self.dt, total)
+        idx = np.clip(np.searchsorted(seg_start, t, side="right") - 1, 0, len(segments) - 1)
+        tau = t - seg_start[idx]
+        ta, tc, td = t_acc[idx], t_cruise[idx], t_dec[idx]
+        s = np.where(
+            tau <= ta,
+            v0[idx] * tau + 0.5 * a * tau**2,
+            np.where(
+                tau <= ta + tc,
+                d_acc[idx] + v_peak[idx] * (tau - ta),
+                length[idx] - v1[idx] * (ta + tc + td - tau) - 0.5 * a * (ta + tc + td - tau) ** 2,
+            ),
+        )
+        s = np.clip(s, 0.0, length[idx])
+
+        starts = np.array([seg.start for seg in segments])
+        dirs = np.array([seg.direction for seg in segments])
+        x = starts[idx, 0] + dirs[idx, 0] * s
+        y = starts[idx, 1] + dirs[idx, 1] * s
+
+        states = self.arm.kine_solver.inverse_kinematics_batch(x, y, self.mode)[0]
+        if not states.valid.all():
+            bad = int(np.argmin(states.valid))
+            raise ValueError(f"line {segments[idx[bad]].line_no}: ({x[bad]:.2f}, {y[bad]:.2f}) is unreachable")
+        return JointTrajectory(
+            t=t, x=x, y=y, q1=np.unwrap(states.lf_base_ang), q2=np.unwrap(states.rt_base_ang), mode=self.mode
+        )
+
+    def plan_chunks(self, moves: Iterable[JobMove], start: vec2f) -> Iterator[tuple[JointTrajectory, int]]:
+        """ Lazily yield (joint trajectory chunk, number of moves it covers), validating as it reads. """
+        moves = iter(moves)
+        window: deque[_Segment] = deque()
+        pos = start
+        entry_vel = 0.0
+        exhausted = False
+
+        while True:
+            if not exhausted and len(window) < self.lookahead:
+                batch = list(islice(moves, self.lookahead - len(window)))
+                exhausted = len(batch) < self.lookahead - len(window)
+                new_segments = self._to_segments(batch, pos)
+                self._validate(new_segments)
+                window.extend(new_segments)
+                if batch:
+                    pos = (batch[-1].x, batch[-1].y)
+            if not window:
+                return
+
+            self._plan_window(window, entry_vel)
+            n_commit = len(window) if exhausted else max(len(window) // 2, 1)
+            committed = [window.popleft() for _ in range(n_commit)]
+            exit_vel = window[0].entry_vel if window else 0.0
+            yield self._sample_chunk(committed, exit_vel), n_commit
+            entry_vel = exit_vel
+
+    def stop(self) -> None:
+        """ Abort a running `run` after the current streaming tick, safe from other threads. """
+        self._stop.set()
+        if self._streamer is not None:
+            self._streamer.stop()
+
+    def run_file(self, file: TextIO, fmt: Optional[str] = None) -> JobStats:
+        """ `run` the moves of a job file, relative G-code moves counting from the arm's current position. """
+        start = self._current_pos()
+        return self.run(read_job(file, fmt, start), start)
+
+    def _current_pos(self) -> vec2f:
+        return self.arm.get_current_state_f()[0].end_effector_pos
+
+    def run(self, moves: Iterable[JobMove], start: Optional[vec2f] = None) -> JobStats:
+        """
+        Execute the job, blocking until the last chunk was streamed. Starts
+        from the arm's current position unless `start` is given; G-code
+        parsed without the same `start` can't use relative moves before its
+        first absolute one, see `run_file`.
+        """
+        if start is None:
+            start = self._current_pos()
+        self.stats = JobStats()
+        self._stop.clear()
+        self._streamer = TrajectoryStreamer(self.arm, self.rate_hz)
+        chunks: queue.Queue[Optional[tuple[JointTrajectory, int]] | BaseException] = queue.Queue(self.queue_chunks)
+        queued_time = [0.0]
+        lock = threading.Lock()
+
+        def put(item) -> bool:
+            # give up once the streaming side stopped, it won't drain the queue anymore
+            while not self._stop.is_set():
+                try:
+                    chunks.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def planner():
+            try:
+                for chunk, n_moves in self.plan_chunks(moves, start):
+                    with lock:
+                        queued_time[0] += chunk.duration
+                    if not put((chunk, n_moves)):
+                        return
+                put(None)
+            except BaseException as e:
+                put(e)
+
+        thread = threading.Thread(target=planner, name="job-planner", daemon=True)
+        st = time.perf_counter()
+        thread.start()
+        try:
+            while True:
+                try:
+                    item = chunks.get_nowait()
+                except queue.Empty:
+                    # the motors caught up with the planner
+                    if self.stats.chunks:
+                        self.stats.underruns += 1
+                    item = chunks.get()
+                if item is None:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                chunk, n_moves = item
+                with lock:
+                    self.stats.lead_time = queued_time[0]
+                    queued_time[0] -= chunk.duration
+                self.stats.min_lead_time = min(self.stats.min_lead_time, self.stats.lead_time)
+                if not self._streamer.stream(chunk):
+                    break
+                self.stats.moves += n_moves
+                self.stats.chunks += 1
+                self.stats.planned_time += chunk.duration
+                self.stats.late_ticks += self._streamer.late_ticks
+        finally:
+            self._stop.set()
+            self.stats.elapsed = time.perf_counter() - st
+            thread.join()
+        return self.stats
@@ -1,10 +1,20 @@
 from dataclasses import dataclass
-from math import sin, cos, atan2, acos, sqrt, pi
-from typing import Sequence
+from math import sin, cos, atan2, acos, sqrt, pi, inf
+from typing import Callable, Optional, Sequence
+import numpy as np
+from numpy.typing import ArrayLike, NDArray
 from pint._typing import QuantityOrUnitLike
 from src.consts import *
 from src.utils import *
 
+IK_MODES: tuple[str, ...] = ("++", "+-", "-+", "--")
+
+
+def wrap_ang_diff(tar: float, cur: float) -> float:
+    """ Signed shortest rotation from cur to tar, in radians within [-pi, pi). Works on arrays too. """
+    return (tar - cur + pi) % (2 * pi) - pi
+
+
 @dataclass
 class ParaScaraSetup:
     # the default of all unit should be in mm
@@ -33,8 +43,109 @@ class ParaScaraState:
 
             self.lf_base_ang.to(ang_unit), # type: ignore
             self.rt_base_ang.to(ang_unit), # type: ignore
-            self.rt_link_ang.to(ang_unit), # type: ignore
             self.lf_link_ang.to(ang_unit), # type: ignore
+            self.rt_link_ang.to(ang_unit), # type: ignore
+        )
+
+
+@dataclass(slots=True)
+class ParaScaraFloatState:
+    """
+    Plain-float counterpart of `ParaScaraState` used by the unit-free kinematics core.
+    Lengths are in DEF_LEN_UNIT and angles are in radians.
+    """
+    end_effector_pos : vec2f
+    lf_base_endpos   : vec2f
+    rt_base_endpos   : vec2f
+
+    lf_base_ang      : float
+    rt_base_ang      : float
+    lf_link_ang      : float
+    rt_link_ang      : float
+
+    def to_quantity(self) -> ParaScaraState:
+        """ Wrap the magnitudes into a unit-tagged `ParaScaraState`. """
+        return ParaScaraState(
+            end_effector_pos=(self.end_effector_pos[0] * DEF_LEN_UNIT, self.end_effector_pos[1] * DEF_LEN_UNIT),
+            lf_base_endpos=(self.lf_base_endpos[0] * DEF_LEN_UNIT, self.lf_base_endpos[1] * DEF_LEN_UNIT),
+            rt_base_endpos=(self.rt_base_endpos[0] * DEF_LEN_UNIT, self.rt_base_endpos[1] * DEF_LEN_UNIT),
+            lf_base_ang=(self.lf_base_ang * ur.rad).to(DEF_ANG_UNIT), # type: ignore
+            rt_base_ang=(self.rt_base_ang * ur.rad).to(DEF_ANG_UNIT), # type: ignore
+            lf_link_ang=(self.lf_link_ang * ur.rad).to(DEF_ANG_UNIT), # type: ignore
+            rt_link_ang=(self.rt_link_ang * ur.rad).to(DEF_ANG_UNIT), # type: ignore
+        )
+
+    @classmethod
+    def from_quantity(cls, state: ParaScaraState) -> "ParaScaraFloatState":
+        """ Strip the units of a `ParaScaraState`. """
+        def pos(p: vec2q) -> vec2f:
+            return (p[0].to(DEF_LEN_UNIT).magnitude, p[1].to(DEF_LEN_UNIT).magnitude)
+
+        return cls(
+            end_effector_pos=pos(state.end_effector_pos),
+            lf_base_endpos=pos(state.lf_base_endpos),
+            rt_base_endpos=pos(state.rt_base_endpos),
+            lf_base_ang=state.lf_base_ang.to(ur.rad).magnitude,
+            rt_base_ang=state.rt_base_ang.to(ur.rad).magnitude,
+            lf_link_ang=state.lf_link_ang.to(ur.rad).magnitude,
+            rt_link_ang=state.rt_link_ang.to(ur.rad).magnitude,
+        )
+
+
+@dataclass(slots=True)
+class ClosestIKSolution:
+    """ IK solution with the least joint travel; travels are signed shortest rotations in radians. """
+    state     : ParaScaraFloatState
+    mode      : str
+    lf_travel : float
+    rt_travel : float
+
+    @property
+    def total_travel(self) -> float:
+        return abs(self.lf_travel) + abs(self.rt_travel)
+
+
+@dataclass
+class ParaScaraBatchState:
+    """
+    Struct-of-arrays counterpart of `ParaScaraState` for many points at once.
+    Lengths are plain floats in DEF_LEN_UNIT and angles are in radians.
+    Entries where `valid` is False hold NaN.
+    """
+    end_effector_pos : NDArray[np.float64]  # (..., 2)
+    lf_base_endpos   : NDArray[np.float64]  # (..., 2)
+    rt_base_endpos   : NDArray[np.float64]  # (..., 2)
+
+    lf_base_ang      : NDArray[np.float64]  # (...)
+    rt_base_ang      : NDArray[np.float64]  # (...)
+    lf_link_ang      : NDArray[np.float64]  # (...)
+    rt_link_ang      : NDArray[np.float64]  # (...)
+
+    valid            : NDArray[np.bool_]    # (...)
+
+    @property
+    def shape(self) -> tuple[int, ...]:
+        return self.valid.shape
+
+    def state_at(self, idx: int | tuple[int, ...]) -> ParaScaraState:
+        """ Build the unit-tagged `ParaScaraState` of a single entry. """
+        if not self.valid[idx]:
+            raise ValueError(f"No valid solution at index {idx}.")
+
+        def pos(arr: NDArray[np.float64]) -> vec2q:
+            return (float(arr[idx][0]) * DEF_LEN_UNIT, float(arr[idx][1]) * DEF_LEN_UNIT)
+
+        def ang(arr: NDArray[np.float64]) -> pqt:
+            return (float(arr[idx]) * ur.rad).to(DEF_ANG_UNIT) # type: ignore
+
+        return ParaScaraState(
+            end_effector_pos=pos(self.end_effector_pos),
+            lf_base_endpos=pos(self.lf_base_endpos),
+            rt_base_endpos=pos(self.rt_base_endpos),
+            lf_base_ang=ang(self.lf_base_ang),
+            rt_base_ang=ang(self.rt_base_ang),
+            lf_link_ang=ang(self.lf_link_ang),
+            rt_link_ang=ang(self.rt_link_ang),
         )
 
 
@@ -44,6 +155,12 @@ class ParaScaraKinematics:
 
     def __init__(self, setup: ParaScaraSetup):
         self.setup = setup
+        # setup magnitudes in DEF_LEN_UNIT, resolved once for the float core
+        self.l1  : float = setup.lf_base_len.to(DEF_LEN_UNIT).magnitude
+        self.l2  : float = setup.lf_link_len.to(DEF_LEN_UNIT).magnitude
+        self.l1p : float = setup.rt_base_len.to(DEF_LEN_UNIT).magnitude
+        self.l2p : float = setup.rt_link_len.to(DEF_LEN_UNIT).magnitude
+        self.d   : float = setup.axis_dist  .to(DEF_LEN_UNIT).magnitude
 
     def forward_kinematics(
         self,
@@ -59,17 +176,28 @@ class ParaScaraKinematics:
           "io" → inward then outward
           "oi" → outward then inward
         """
+        states = self.forward_kinematics_f(
+            lf_base_ang.to(ur.rad).magnitude, rt_base_ang.to(ur.rad).magnitude, mode
+        )
+        return [state.to_quantity() for state in states]
+
+    def forward_kinematics_f(
+        self,
+        lf_base_ang: float,
+        rt_base_ang: float,
+        mode: str = "o"   # allowed values: "i", "o", "io", "oi"
+    ) -> list[ParaScaraFloatState]:
+        """
+        Unit-free `forward_kinematics`: base angles in radians,
+        returned lengths in DEF_LEN_UNIT and angles in radians.
+        """
         if mode not in ("i", "o", "io", "oi"):
             raise ValueError("mode must be one of 'i','o','io','oi'")
 
         # 1) unpack lengths & angles (in DEF_LEN_UNIT / radians)
-        l1   = self.setup.lf_base_len .to(DEF_LEN_UNIT).magnitude
-        l2   = self.setup.lf_link_len .to(DEF_LEN_UNIT).magnitude
-        l1p  = self.setup.rt_base_len .to(DEF_LEN_UNIT).magnitude
-        l2p  = self.setup.rt_link_len .to(DEF_LEN_UNIT).magnitude
-        d    = self.setup.axis_dist   .to(DEF_LEN_UNIT).magnitude
-        q1   = lf_base_ang.to(ur.rad).magnitude
-        q2   = rt_base_ang.to(ur.rad).magnitude
+        l1, l2, l1p, l2p, d = self.l1, self.l2, self.l1p, self.l2p, self.d
+        q1 = lf_base_ang
+        q2 = rt_base_ang
 
         # 2) compute elbow pivots
         x1 = l1 * cos(q1)
@@ -96,14 +224,14 @@ class ParaScaraKinematics:
             xi = xm + sign * h * ( dy / R)
             yi = ym - sign * h * ( dx / R)
 
-            state = ParaScaraState(
-                end_effector_pos=(xi * DEF_LEN_UNIT, yi * DEF_LEN_UNIT),
-                lf_base_endpos   =(x1 * DEF_LEN_UNIT, y1 * DEF_LEN_UNIT),
-                rt_base_endpos   =(x2 * DEF_LEN_UNIT, y2 * DEF_LEN_UNIT),
-                lf_base_ang      =lf_base_ang.to(DEF_ANG_UNIT),                  # type: ignore
-                rt_base_ang      =rt_base_ang.to(DEF_ANG_UNIT),                  # type: ignore
-                lf_link_ang      =(atan2(yi - y1, xi - x1) * ur.rad).to(DEF_ANG_UNIT),  # type: ignore
-                rt_link_ang      =(atan2(yi - y2, xi - x2) * ur.rad).to(DEF_ANG_UNIT),  # type: ignore
+            state = ParaScaraFloatState(
+                end_effector_pos=(xi, yi),
+                lf_base_endpos  =(x1, y1),
+                rt_base_endpos  =(x2, y2),
+                lf_base_ang     =q1,
+                rt_base_ang     =q2,
+                lf_link_ang     =atan2(yi - y1, xi - x1),
+                rt_link_ang     =atan2(yi - y2, xi - x2),
             )
             raw.append((xi, yi, state))
 
@@ -123,20 +251,24 @@ class ParaScaraKinematics:
         }
 
         # 7) assemble results in requested mode order
-        result: list[ParaScaraState] = []
+        result: list[ParaScaraFloatState] = []
         for ch in mode:
             result.append(tag_state[ch])
         return result
 
     def inverse_kinematics(self, x_pos: pqt, y_pos: pqt, mode: str | Sequence[str] = "+-") -> list[ParaScaraState]:
+        states = self.inverse_kinematics_f(
+            x_pos.to(DEF_LEN_UNIT).magnitude, y_pos.to(DEF_LEN_UNIT).magnitude, mode
+        )
+        return [state.to_quantity() for state in states]
+
+    def inverse_kinematics_f(self, x: float, y: float, mode: str | Sequence[str] = "+-") -> list[ParaScaraFloatState]:
+        """
+        Unit-free `inverse_kinematics`: target in DEF_LEN_UNIT,
+        returned lengths in DEF_LEN_UNIT and angles in radians.
+        """
         mode = mode or ["+-"]
-        x: float = x_pos.to(DEF_LEN_UNIT).magnitude
-        y: float = y_pos.to(DEF_LEN_UNIT).magnitude
-        l1: float = self.setup.lf_base_len.to(DEF_LEN_UNIT).magnitude
-        l1p: float = self.setup.rt_base_len.to(DEF_LEN_UNIT).magnitude
-        l2: float = self.setup.lf_link_len.to(DEF_LEN_UNIT).magnitude
-        l2p: float = self.setup.rt_link_len.to(DEF_LEN_UNIT).magnitude
-        d: float = self.setup.axis_dist.to(DEF_LEN_UNIT).magnitude
+        l1, l2, l1p, l2p, d = self.l1, self.l2, self.l1p, self.l2p, self.d
 
         # cosine rule for the left arm
         c_val = sqrt(x**2 + y**2)
@@ -162,7 +294,7 @@ class ParaScaraKinematics:
         else:
             modes = mode
 
-        results: list[ParaScaraState] = []
+        results: list[ParaScaraFloatState] = []
         for m in modes:
             if m not in ("++", "+-", "-+", "--"):
                 raise ValueError(
@@ -171,23 +303,376 @@ class ParaScaraKinematics:
             sign2 = 1 if m[1] == "+" else -1
             q1 = theta + sign1 * gamma
             q2 = pi - psi + sign2 * epsilon
-            
-            # TODO: add angle for second-level arm
 
-            lf_base_endpos : vec2q = (cos(q1) * l1 * DEF_LEN_UNIT, sin(q1) * l1 * DEF_LEN_UNIT)
-            rt_base_endpos : vec2q = ((cos(q2) * l1p + d) * DEF_LEN_UNIT, sin(q2) * l1p * DEF_LEN_UNIT)
-            lf_link_ang = atan2(y - lf_base_endpos[1].magnitude, x - lf_base_endpos[0].magnitude)
-            rt_link_ang = atan2(y - rt_base_endpos[1].magnitude, x - rt_base_endpos[0].magnitude)
+            lf_x, lf_y = cos(q1) * l1, sin(q1) * l1
+            rt_x, rt_y = cos(q2) * l1p + d, sin(q2) * l1p
+            results.append(
+                ParaScaraFloatState(
+                    end_effector_pos=(x, y),
+                    lf_base_endpos=(lf_x, lf_y),
+                    rt_base_endpos=(rt_x, rt_y),
+                    lf_base_ang=q1,
+                    rt_base_ang=q2,
+                    lf_link_ang=atan2(y - lf_y, x - lf_x),
+                    rt_link_ang=atan2(y - rt_y, x - rt_x),
+                )
+            )
+
+        return results
+
+    def forward_kinematics_batch(
+        self,
+        lf_base_ang: ArrayLike,
+        rt_base_ang: ArrayLike,
+        mode: str = "o"   # allowed values: "i", "o", "io", "oi"
+    ) -> list[ParaScaraBatchState]:
+        """
+        Vectorized `forward_kinematics` for arrays of base angles.
+        lf_base_ang, rt_base_ang: plain floats in radians, broadcast against each other.
+        Returns one `ParaScaraBatchState` per character of mode; pairs whose
+        link circles don't intersect are marked invalid instead of being dropped.
+        """
+        if mode not in ("i", "o", "io", "oi"):
+            raise ValueError("mode must be one of 'i','o','io','oi'")
+
+        q1, q2 = np.broadcast_arrays(
+            np.asarray(lf_base_ang, dtype=np.float64), np.asarray(rt_base_ang, dtype=np.float64)
+        )
+        l1, l2, l1p, l2p, d = self.l1, self.l2, self.l1p, self.l2p, self.d
+
+        # elbow pivots
+        x1 = l1 * np.cos(q1)
+        y1 = l1 * np.sin(q1)
+        x2 = d + l1p * np.cos(q2)
+        y2 =     l1p * np.sin(q2)
+
+        # circle–circle intersection
+        dx = x2 - x1
+        dy = y2 - y1
+        R  = np.hypot(dx, dy)
+        valid = (R <= (l2 + l2p)) & (R >= abs(l2 - l2p)) & (R > 0)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            a  = (l2*l2 - l2p*l2p + R*R) / (2 * R)
+            h  = np.sqrt(np.maximum(0.0, l2*l2 - a*a))
+            xm = x1 + a * dx / R
+            ym = y1 + a * dy / R
+            ox = h * dy / R
+            oy = h * dx / R
+
+        # both raw solutions, sign = +1 and sign = -1
+        raw = ((xm + ox, ym - oy), (xm - ox, ym + oy))
+
+        # opening angle between (origin - elbow) and (effector - elbow)
+        def phi(xi: NDArray[np.float64], yi: NDArray[np.float64]) -> NDArray[np.float64]:
+            v2x, v2y = xi - x1, yi - y1
+            dot = -x1 * v2x - y1 * v2y
+            with np.errstate(divide="ignore", invalid="ignore"):
+                cos_phi = dot / (np.hypot(x1, y1) * np.hypot(v2x, v2y))
+            return np.arccos(np.clip(cos_phi, -1.0, 1.0))
+
+        # smaller phi → inward, larger → outward; ties keep the +1 solution inward
+        plus_is_inward = phi(*raw[0]) <= phi(*raw[1])
+        branch_pos = {
+            "i": (np.where(plus_is_inward, raw[0][0], raw[1][0]),
+                  np.where(plus_is_inward, raw[0][1], raw[1][1])),
+            "o": (np.where(plus_is_inward, raw[1][0], raw[0][0]),
+                  np.where(plus_is_inward, raw[1][1], raw[0][1])),
+        }
+
+        def nan_if_invalid(arr: NDArray[np.float64]) -> NDArray[np.float64]:
+            return np.where(valid, arr, np.nan)
+
+        lf_base_endpos = np.stack((nan_if_invalid(x1), nan_if_invalid(y1)), axis=-1)
+        rt_base_endpos = np.stack((nan_if_invalid(x2), nan_if_invalid(y2)), axis=-1)
+
+        results: list[ParaScaraBatchState] = []
+        for ch in mode:
+            xi, yi = (nan_if_invalid(arr) for arr in branch_pos[ch])
             results.append(
-                ParaScaraState(
-                    end_effector_pos=(x_pos, y_pos),
+                ParaScaraBatchState(
+                    end_effector_pos=np.stack((xi, yi), axis=-1),
                     lf_base_endpos=lf_base_endpos,
                     rt_base_endpos=rt_base_endpos,
-                    lf_base_ang=(q1 * ur.rad).to(DEF_ANG_UNIT), # type: ignore
-                    rt_base_ang=(q2 * ur.rad).to(DEF_ANG_UNIT), # type: ignore
-                    lf_link_ang=(lf_link_ang * ur.rad).to(DEF_ANG_UNIT), # type: ignore
-                    rt_link_ang=(rt_link_ang * ur.rad).to(DEF_ANG_UNIT), # type: ignore
+                    lf_base_ang=nan_if_invalid(q1),
+                    rt_base_ang=nan_if_invalid(q2),
+                    lf_link_ang=np.arctan2(yi - y1, xi - x1),
+                    rt_link_ang=np.arctan2(yi - y2, xi - x2),
+                    valid=valid,
+                )
+            )
+        return results
+
+    def inverse_kinematics_batch(
+        self, x_pos: ArrayLike, y_pos: ArrayLike, mode: str | Sequence[str] = "+-"
+    ) -> list[ParaScaraBatchState]:
+        """
+        Vectorized `inverse_kinematics` for arrays of targets.
+        x_pos, y_pos: plain floats in DEF_LEN_UNIT, broadcast against each other.
+        Returns one `ParaScaraBatchState` per mode; unreachable targets are
+        marked invalid instead of raising.
+        """
+        modes = [mode] if isinstance(mode, str) else list(mode or ["+-"])
+        for m in modes:
+            if m not in ("++", "+-", "-+", "--"):
+                raise ValueError(
+                    f"Invalid mode '{m}' — must be one of '++', '+-', '-+', '--'")
+
+        x, y = np.broadcast_arrays(
+            np.asarray(x_pos, dtype=np.float64), np.asarray(y_pos, dtype=np.float64)
+        )
+        l1, l2, l1p, l2p, d = self.l1, self.l2, self.l1p, self.l2p, self.d
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # cosine rule for both arms, same as the scalar version
+            c_val = np.hypot(x, y)
+            theta = np.arctan2(y, x)
+            left = (-l2**2 + l1**2 + c_val**2) / (2 * l1 * c_val)
+
+            e_val = np.hypot(d - x, y)
+            psi = np.arctan2(y, d - x)
+            right = (-l2p**2 + l1p**2 + e_val**2) / (2 * l1p * e_val)
+
+            valid = (np.abs(left) <= 1.0) & (np.abs(right) <= 1.0)
+            gamma = np.where(valid, np.arccos(np.clip(left, -1.0, 1.0)), np.nan)
+            epsilon = np.where(valid, np.arccos(np.clip(right, -1.0, 1.0)), np.nan)
+
+        eff_pos = np.stack((x, y), axis=-1)
+        eff_pos = np.where(valid[..., None], eff_pos, np.nan)
+
+        results: list[ParaScaraBatchState] = []
+        for m in modes:
+            sign1 = 1 if m[0] == "+" else -1
+            sign2 = 1 if m[1] == "+" else -1
+            q1 = theta + sign1 * gamma
+            q2 = pi - psi + sign2 * epsilon
+
+            lf_x, lf_y = np.cos(q1) * l1, np.sin(q1) * l1
+            rt_x, rt_y = np.cos(q2) * l1p + d, np.sin(q2) * l1p
+            results.append(
+                ParaScaraBatchState(
+                    end_effector_pos=eff_pos,
+                    lf_base_endpos=np.stack((lf_x, lf_y), axis=-1),
+                    rt_base_endpos=np.stack((rt_x, rt_y), axis=-1),
+                    lf_base_ang=q1,
+                    rt_base_ang=q2,
+                    lf_link_ang=np.arctan2(y - lf_y, x - lf_x),
+                    rt_link_ang=np.arctan2(y - rt_y, x - rt_x),
+                    valid=valid,
                 )
             )
 
         return results
+
+    def inverse_kinematics_closest_f(
+        self,
+        x: float,
+        y: float,
+        cur_lf_base_ang: float,
+        cur_rt_base_ang: float,
+        modes: Sequence[str] = IK_MODES,
+        state_filter: Optional[Callable[[ParaScaraFloatState], bool]] = None,
+    ) -> ClosestIKSolution:
+        """
+        Solve all `modes` at once and return the solution closest to the current
+        base angles (radians), measured as the summed shortest rotation of both
+        joints. States rejected by `state_filter` are skipped.
+        Raises ValueError if the target is unreachable or every mode is rejected.
+        """
+        best: Optional[ClosestIKSolution] = None
+        for m, state in zip(modes, self.inverse_kinematics_f(x, y, modes)):
+            if state_filter is not None and not state_filter(state):
+                continue
+            solution = ClosestIKSolution(
+                state=state,
+                mode=m,
+                lf_travel=wrap_ang_diff(state.lf_base_ang, cur_lf_base_ang),
+                rt_travel=wrap_ang_diff(state.rt_base_ang, cur_rt_base_ang),
+            )
+            if best is None or solution.total_travel < best.total_travel:
+                best = solution
+        if best is None:
+            raise ValueError("No valid solution in any of the requested modes.")
+        return best
+
+    def inverse_kinematics_closest_batch(
+        self,
+        x_pos: ArrayLike,
+        y_pos: ArrayLike,
+        cur_lf_base_ang: ArrayLike,
+        cur_rt_base_ang: ArrayLike,
+        modes: Sequence[str] = IK_MODES,
+    ) -> tuple[ParaScaraBatchState, NDArray[np.intp], NDArray[np.float64]]:
+        """
+        Vectorized `inverse_kinematics_closest_f`, all inputs broadcast together.
+        Returns (states, mode index into `modes`, (..., 2) signed joint travels in radians).
+        """
+        x, y, cur_lf, cur_rt = np.broadcast_arrays(
+            *(np.asarray(arr, dtype=np.float64) for arr in (x_pos, y_pos, cur_lf_base_ang, cur_rt_base_ang))
+        )
+        per_mode = self.inverse_kinematics_batch(x, y, modes)
+        q1 = np.stack([state.lf_base_ang for state in per_mode])
+        q2 = np.stack([state.rt_base_ang for state in per_mode])
+        travel = np.stack((wrap_ang_diff(q1, cur_lf), wrap_ang_diff(q2, cur_rt)), axis=-1) # type: ignore
+        cost = np.abs(travel).sum(axis=-1)
+        best = np.argmin(np.where(np.isnan(cost), np.inf, cost), axis=0)
+
+        def pick(field: str) -> NDArray[np.float64]:
+            stacked = np.stack([getattr(state, field) for state in per_mode])
+            idx = best[None]
+            while idx.ndim < stacked.ndim:
+                idx = idx[..., None]
+            return np.take_along_axis(stacked, idx, axis=0)[0]
+
+        states = ParaScaraBatchState(
+            end_effector_pos=per_mode[0].end_effector_pos,
+            lf_base_endpos=pick("lf_base_endpos"),
+            rt_base_endpos=pick("rt_base_endpos"),
+            lf_base_ang=pick("lf_base_ang"),
+            rt_base_ang=pick("rt_base_ang"),
+            lf_link_ang=pick("lf_link_ang"),
+            rt_link_ang=pick("rt_link_ang"),
+            valid=per_mode[0].valid,
+        )
+        best_travel = np.take_along_axis(travel, best[None, ..., None], axis=0)[0]
+        return states, best, best_travel
+
+    # velocity kinematics: with u = P - A, v = P - B (links) and A_q, B_q the
+    # elbow velocities per unit base rate, the loop constraints give
+    # [u; v] @ P_dot = diag(u · A_q, v · B_q) @ q_dot, all in DEF_LEN_UNIT / radians.
+
+    def _velocity_terms(self, state: ParaScaraFloatState) -> tuple[float, float, float, float, float, float]:
+        """ (ux, uy, vx, vy, a, b) where a = u · A_q and b = v · B_q. """
+        eff_x, eff_y = state.end_effector_pos
+        lx, ly = state.lf_base_endpos
+        rx, ry = state.rt_base_endpos
+        ux, uy = eff_x - lx, eff_y - ly
+        vx, vy = eff_x - rx, eff_y - ry
+        a = -ux * ly + uy * lx
+        b = -vx * ry + vy * (rx - self.d)
+        return ux, uy, vx, vy, a, b
+
+    def jacobian_f(self, state: ParaScaraFloatState) -> tuple[vec2f, vec2f]:
+        """
+        Forward Jacobian ((dx/dq1, dx/dq2), (dy/dq1, dy/dq2)) at `state`.
+        Raises ValueError at a parallel singularity (links collinear).
+        """
+        ux, uy, vx, vy, a, b = self._velocity_terms(state)
+        det = ux * vy - uy * vx
+        if det == 0.0:
+            raise ValueError("Jacobian undefined: links are collinear (parallel singularity).")
+        return (
+            (vy * a / det, -uy * b / det),
+            (-vx * a / det, ux * b / det),
+        )
+
+    def inv_jacobian_f(self, state: ParaScaraFloatState) -> tuple[vec2f, vec2f]:
+        """
+        Inverse Jacobian ((dq1/dx, dq1/dy), (dq2/dx, dq2/dy)) at `state`.
+        Raises ValueError at a serial singularity (a base and its link aligned).
+        """
+        ux, uy, vx, vy, a, b = self._velocity_terms(state)
+        if a == 0.0 or b == 0.0:
+            raise ValueError("Inverse Jacobian undefined: base and link aligned (serial singularity).")
+        return (
+            (ux / a, uy / a),
+            (vx / b, vy / b),
+        )
+
+    def joint_velocity_f(self, state: ParaScaraFloatState, x_vel: float, y_vel: float) -> vec2f:
+        """ Velocity-level IK: base angular rates (rad / time) for an end effector velocity. """
+        (j11, j12), (j21, j22) = self.inv_jacobian_f(state)
+        return (j11 * x_vel + j12 * y_vel, j21 * x_vel + j22 * y_vel)
+
+    def manipulability_f(self, state: ParaScaraFloatState) -> float:
+        """ |det J|: 0 at serial singularities, inf at parallel singularities. """
+        ux, uy, vx, vy, a, b = self._velocity_terms(state)
+        det = ux * vy - uy * vx
+        return abs(a * b / det) if det != 0.0 else inf
+
+    def condition_number_f(self, state: ParaScaraFloatState) -> float:
+        """ Condition number of J (1 is isotropic), inf at either singularity. """
+        ux, uy, vx, vy, a, b = self._velocity_terms(state)
+        if a == 0.0 or b == 0.0:
+            return inf
+        # singular values of the 2x2 inverse Jacobian have the same ratio as those of J
+        p, q, r, t = ux / a, uy / a, vx / b, vy / b
+        sq_sum = p * p + q * q + r * r + t * t
+        det = p * t - q * r
+        disc = sqrt(max(0.0, sq_sum * sq_sum - 4 * det * det))
+        sigma_min_sq = (sq_sum - disc) / 2
+        if sigma_min_sq <= 0.0:
+            return inf
+        return sqrt((sq_sum + disc) / 2 / sigma_min_sq)
+
+    def link_cos_f(self, state: ParaScaraFloatState) -> float:
+        """
+        Cosine of the angle between the two links; -1 when they are stretched
+        into a straight line (parallel singularity). Cheaper than the acos-based angle.
+        """
+        ux, uy, vx, vy, _, _ = self._velocity_terms(state)
+        norm_sq = (ux * ux + uy * uy) * (vx * vx + vy * vy)
+        if norm_sq == 0.0:
+            return 1.0
+        return (ux * vx + uy * vy) / sqrt(norm_sq)
+
+    def _velocity_terms_batch(self, state: ParaScaraBatchState) -> tuple[NDArray[np.float64], ...]:
+        u = state.end_effector_pos - state.lf_base_endpos
+        v = state.end_effector_pos - state.rt_base_endpos
+        lx, ly = state.lf_base_endpos[..., 0], state.lf_base_endpos[..., 1]
+        rx, ry = state.rt_base_endpos[..., 0], state.rt_base_endpos[..., 1]
+        ux, uy, vx, vy = u[..., 0], u[..., 1], v[..., 0], v[..., 1]
+        a = -ux * ly + uy * lx
+        b = -vx * ry + vy * (rx - self.d)
+        return ux, uy, vx, vy, a, b
+
+    def jacobian_batch(self, state: ParaScaraBatchState) -> NDArray[np.float64]:
+        """ (..., 2, 2) forward Jacobians; NaN/inf where invalid or singular. """
+        ux, uy, vx, vy, a, b = self._velocity_terms_batch(state)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            inv_det = 1.0 / (ux * vy - uy * vx)
+            return np.stack(
+                (
+                    np.stack((vy * a * inv_det, -uy * b * inv_det), axis=-1),
+                    np.stack((-vx * a * inv_det, ux * b * inv_det), axis=-1),
+                ),
+                axis=-2,
+            )
+
+    def inv_jacobian_batch(self, state: ParaScaraBatchState) -> NDArray[np.float64]:
+        """ (..., 2, 2) inverse Jacobians; NaN/inf where invalid or singular. """
+        ux, uy, vx, vy, a, b = self._velocity_terms_batch(state)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.stack(
+                (np.stack((ux / a, uy / a), axis=-1), np.stack((vx / b, vy / b), axis=-1)),
+                axis=-2,
+            )
+
+    def joint_velocity_batch(
+        self, state: ParaScaraBatchState, x_vel: ArrayLike, y_vel: ArrayLike
+    ) -> NDArray[np.float64]:
+        """ (..., 2) base angular rates for arrays of end effector velocities. """
+        vel = np.stack(np.broadcast_arrays(np.asarray(x_vel, dtype=np.float64), np.asarray(y_vel, dtype=np.float64)), axis=-1)
+        return np.einsum("...ij,...j->...i", self.inv_jacobian_batch(state), vel)
+
+    def manipulability_batch(self, state: ParaScaraBatchState) -> NDArray[np.float64]:
+        ux, uy, vx, vy, a, b = self._velocity_terms_batch(state)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.abs(a * b / (ux * vy - uy * vx))
+
+    def condition_number_batch(self, state: ParaScaraBatchState) -> NDArray[np.float64]:
+        ux, uy, vx, vy, a, b = self._velocity_terms_batch(state)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            p, q, r, t = ux / a, uy / a, vx / b, vy / b
+            sq_sum = p * p + q * q + r * r + t * t
+            det = p * t - q * r
+            disc = np.sqrt(np.maximum(0.0, sq_sum * sq_sum - 4 * det * det))
+            sigma_min_sq = (sq_sum - disc) / 2
+            cond = np.sqrt((sq_sum + disc) / 2 / sigma_min_sq)
+        cond = np.where((a == 0.0) | (b == 0.0) | (sigma_min_sq <= 0.0), np.inf, cond)
+        return np.where(state.valid, cond, np.nan)
+
+    def link_cos_batch(self, state: ParaScaraBatchState) -> NDArray[np.float64]:
+        ux, uy, vx, vy, _, _ = self._velocity_terms_batch(state)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return (ux * vx + uy * vy) / np.sqrt((ux * ux + uy * uy) * (vx * vx + vy * vy))
@@ -0,0 +1,83 @@
+from collections import OrderedDict
+from dataclasses import dataclass, asdict, replace
+from threading import Lock
+from typing import Sequence, override
+
+from src.kinematics import ParaScaraKinematics, ParaScaraSetup, ParaScaraFloatState
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def to_dict(self) -> dict[str, float]:
+        return {**asdict(self), "hit_rate": self.hit_rate}
+
+
+class CachedParaScaraKinematics(ParaScaraKinematics):
+    """
+    `ParaScaraKinematics` with a bounded LRU cache in front of inverse kinematics.
+
+    Targets are snapped to a grid of `resolution` (DEF_LEN_UNIT) and solved at
+    the snapped point, so every target in one cell shares the same solution
+    and its `end_effector_pos` is the snapped point, up to resolution / 2 off
+    the requested target per axis.
+    Unreachable targets are cached too and raise the same ValueError on a hit.
+    The Quantity-based `inverse_kinematics` goes through the cache as well.
+    Every call returns its own copies of the cached states.
+    """
+
+    def __init__(self, setup: ParaScaraSetup, maxsize: int = 1024, resolution: float = 0.01):
+        super().__init__(setup)
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        if resolution <= 0:
+            raise ValueError("resolution must be positive")
+        self.maxsize = maxsize
+        self.resolution = resolution
+        self.stats = CacheStats()
+        self._ik_cache: OrderedDict[tuple[int, int, str | tuple[str, ...]], list[ParaScaraFloatState] | str] = OrderedDict()
+        self._lock = Lock()
+
+    @override
+    def inverse_kinematics_f(self, x: float, y: float, mode: str | Sequence[str] = "+-") -> list[ParaScaraFloatState]:
+        mode_key = mode if isinstance(mode, str) else tuple(mode)
+        key = (round(x / self.resolution), round(y / self.resolution), mode_key)
+
+        with self._lock:
+            cached = self._ik_cache.get(key)
+            if cached is not None:
+                self._ik_cache.move_to_end(key)
+                self.stats.hits += 1
+            else:
+                self.stats.misses += 1
+
+        if cached is None:
+            try:
+                cached = super().inverse_kinematics_f(key[0] * self.resolution, key[1] * self.resolution, mode)
+            except ValueError as e:
+                cached = str(e)
+            with self._lock:
+                self._ik_cache[key] = cached
+                if len(self._ik_cache) > self.maxsize:
+                    self._ik_cache.popitem(last=False)
+                    self.stats.evictions += 1
+
+        if isinstance(cached, str):
+            raise ValueError(cached)
+        return [replace(state) for state in cached]
+
+    def clear_cache(self) -> None:
+        with self._lock:
+            self._ik_cache.clear()
+
+    @property
+    def cache_size(self) -> int:
+        return len(self._ik_cache)
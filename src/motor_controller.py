@@ -1,9 +1,28 @@
-from smbus2 import SMBus
-from ticlib import TicI2C, SMBus2Backend
-from ticlib.ticlib import TicBase
+from ticlib.ticlib import TicBase, GET_VARIABLE_CMD
 from enum import Enum
-from dataclasses import dataclass
-from typing import Optional
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from dataclasses import dataclass, asdict
+from typing import Callable, Generator, Iterator, Optional, override
+from src.utils import clamp
+from src.hw_executor import HardwareExecutor, get_default_executor
+from src.i2c_bus import BusTicI2C, get_i2c_bus
+import asyncio
+import struct
+import time
+
+# bounds and ETA fraction of the adaptive poll interval used while waiting for a move
+POLL_MIN_SEC = 0.002
+POLL_MAX_SEC = 0.1
+POLL_ETA_FRACTION = 0.5
+
+# Tic variable blocks read by `TicMotorController.get_status`. A block read is
+# at most 15 bytes over I2C/serial, so the status takes two: operation state
+# through target position (0x00-0x0D), then current position and velocity (0x22-0x29)
+_STATUS_BLOCK = (0x00, struct.Struct("<BBHIxBi"))
+_MOTION_BLOCK = (0x22, struct.Struct("<ii"))
+PLANNING_MODE_OFF = 0
+PLANNING_MODE_TARGET_POSITION = 1
+PLANNING_MODE_TARGET_VELOCITY = 2
 
 
 class StepMode(Enum):
@@ -29,6 +48,51 @@ class StepMode(Enum):
         return self.value.divisor
 
 
+@dataclass(frozen=True, slots=True)
+class TicStatus:
+    """
+    Snapshot of the Tic variables needed to track a move, taken with block
+    reads. Positions and velocity are in microsteps as seen by the motor
+    controller, i.e. already sign-flipped for reversed motors; velocity is
+    in microsteps per 10000 s like the Tic reports it.
+    """
+    operation_state: int
+    misc_flags: int
+    error_status: int
+    errors_occurred: int
+    planning_mode: int
+    target_position: int
+    current_position: int
+    current_velocity: int
+
+    @property
+    def is_moving(self) -> bool:
+        if self.current_velocity != 0:
+            return True
+        return self.planning_mode == PLANNING_MODE_TARGET_POSITION and self.current_position != self.target_position
+
+    @property
+    def remaining_steps(self) -> int:
+        if self.planning_mode != PLANNING_MODE_TARGET_POSITION:
+            return 0
+        return abs(self.target_position - self.current_position)
+
+
+@dataclass
+class WriteCacheStats:
+    writes: int = 0
+    skipped: int = 0
+    invalidations: int = 0
+
+    @property
+    def skip_rate(self) -> float:
+        total = self.writes + self.skipped
+        return self.skipped / total if total else 0.0
+
+    def to_dict(self) -> dict[str, float]:
+        return {**asdict(self), "skip_rate": self.skip_rate}
+
+
 class TicMotorController:
     def __init__(
         self,
@@ -39,38 +103,86 @@ class TicMotorController:
         max_deg_per_sec: float = 360,
         max_acc_deg_per_sec2: float = 1800,
         deg_per_step: float = 1.8,
+        executor: Optional[HardwareExecutor] = None,
     ) -> None:
         self.tic = tic_base
+        # the *_async methods run their I2C transactions on this executor's thread
+        self.executor = executor if executor is not None else get_default_executor()
         self.is_reversed = is_reversed
         self.step_mode = step_mode
         self.gear_ratio = gear_ratio
         self.max_deg_per_sec = max_deg_per_sec
         self.max_acc_deg_per_sec2 = max_acc_deg_per_sec2
 
-        self.tic.deenergize()
-        self.tic.set_step_mode(step_mode.mode_code)
+        # last commanded values, so the motion can be predicted without reading the Tic
+        self.cmd_deg_per_sec = max_deg_per_sec
+        self.cmd_acc_deg_per_sec2 = max_acc_deg_per_sec2
+        self.cmd_target_step: Optional[int] = None
+        self.cmd_target_time = 0.0
+        # bumped whenever the position counter is redefined, e.g. by reset_pos
+        self.pos_epoch = 0
+        # raw values last written to the Tic, writes of the same value are skipped
+        self._shadow: dict[str, int] = {}
+        self.write_stats = WriteCacheStats()
+
+        self.deenergize()
+        self._write("step_mode", self.tic.set_step_mode, step_mode.mode_code)
 
         self.deg_per_micro_step = deg_per_step / step_mode.divisor * gear_ratio
         self.set_spd(max_deg_per_sec)
         self.set_acc(max_acc_deg_per_sec2)
         self.mstep_per_rev = round(360 / self.deg_per_micro_step)
 
+    def _write(self, name: str, setter: Callable[[int], None], value: int) -> bool:
+        """ Send `setter(value)` unless `value` is what was last written for `name`; returns whether it was sent. """
+        if self._shadow.get(name) == value:
+            self.write_stats.skipped += 1
+            return False
+        try:
+            setter(value)
+        except Exception:
+            # the write may or may not have landed
+            self.invalidate_write_cache()
+            raise
+        self._shadow[name] = value
+        self.write_stats.writes += 1
+        return True
+
+    def invalidate_write_cache(self) -> None:
+        """ Forget the last written values, so the next write of each is sent. """
+        if self._shadow:
+            self._shadow.clear()
+            self.write_stats.invalidations += 1
+
     def set_spd(self, max_deg_per_sec: float):
         max_mstep_per_sec = round(max_deg_per_sec / self.deg_per_micro_step * 100_00)
-        self.tic.set_max_speed(max_mstep_per_sec)
+        self._write("max_speed", self.tic.set_max_speed, max_mstep_per_sec)
+        self.cmd_deg_per_sec = max_deg_per_sec
 
     def set_acc(self, max_acc_deg_per_sec2: float):
         max_mstep_per_sec2 = round(max_acc_deg_per_sec2 / self.deg_per_micro_step * 100)
-        self.tic.set_max_acceleration(max_mstep_per_sec2)
-        self.tic.set_max_deceleration(max_mstep_per_sec2)
+        self._write("max_acceleration", self.tic.set_max_acceleration, max_mstep_per_sec2)
+        self._write("max_deceleration", self.tic.set_max_deceleration, max_mstep_per_sec2)
+        self.cmd_acc_deg_per_sec2 = max_acc_deg_per_sec2
+
+    def set_current_limit(self, limit: int):
+        """ Set the coil current limit, `limit` is the Tic's current limit code. """
+        self._write("current_limit", self.tic.set_current_limit, limit)
+
+    def deenergize(self):
+        self.invalidate_write_cache()
+        self.tic.deenergize()
 
     def reset_pos(self, cur_deg: float):
         step = self.deg_to_step(cur_deg)
         if self.is_reversed:
             step = -step
+        self.invalidate_write_cache()
         self.tic.halt_and_set_position(step)
         self.tic.exit_safe_start()
         self.tic.energize()
+        self.cmd_target_step = None
+        self.pos_epoch += 1
 
     def move_to_angle(
         self,
@@ -78,8 +190,11 @@ class TicMotorController:
         is_cw: bool,
         max_deg_per_sec: Optional[float] = None,
         max_acc_deg_per_sec2: Optional[float] = None,
+        cur_step: Optional[int] = None,
     ):
-        cur_step = self.get_current_position()
+        """ `cur_step` is the current position if the caller just read it, saving a read. """
+        if cur_step is None:
+            cur_step = self.get_current_position()
         cur_deg = self.step_to_deg(cur_step)
         disp = self.calc_deg_disp(cur_deg, tar_deg, is_cw)
         disp_step = self.deg_to_step(disp, is_cw)
@@ -97,11 +212,23 @@ class TicMotorController:
         max_acc_deg_per_sec2: Optional[float] = None,
     ): 
         cur_step = self.get_current_position()
-        cur_deg = self.step_to_deg(cur_step)
+        disp = self.calc_close_dir_disp(tar_deg, cur_step)
+        self.move_to_angle(tar_deg, disp > 0, max_deg_per_sec, max_acc_deg_per_sec2, cur_step)
+
+    def calc_close_dir_disp(self, tar_deg: float, cur_step: Optional[int] = None) -> float:
+        """ Signed displacement in degrees `move_to_angle_in_close_dir` would travel, without moving. """
+        cur_deg = self.step_to_deg(self.get_current_position() if cur_step is None else cur_step)
         disp_cw = self.calc_deg_disp(cur_deg, tar_deg, True)
         disp_ccw = self.calc_deg_disp(cur_deg, tar_deg, False)
-        disp = disp_cw if abs(disp_cw) < abs(disp_ccw) else disp_ccw
-        self.move_to_angle(tar_deg, disp > 0, max_deg_per_sec, max_acc_deg_per_sec2)
+        return disp_cw if abs(disp_cw) < abs(disp_ccw) else disp_ccw
+
+    @staticmethod
+    def calc_move_time(disp_deg: float, deg_per_sec: float, acc_deg_per_sec2: float) -> float:
+        """ Duration of a rest-to-rest trapezoidal move, as ramped by the Tic. """
+        disp = abs(disp_deg)
+        if disp * acc_deg_per_sec2 <= deg_per_sec**2:
+            return 2 * (disp / acc_deg_per_sec2) ** 0.5
+        return disp / deg_per_sec + deg_per_sec / acc_deg_per_sec2
 
     def move_to_angle_blocking(
         self,
@@ -117,8 +244,11 @@ class TicMotorController:
         deg = self.wrap_deg(deg, is_positive)
         return round(deg / self.deg_per_micro_step)
     
-    def get_current_deg(self) -> float:
-        return self.step_to_deg(self.get_current_position())
+    def get_current_deg(self, status: Optional[TicStatus] = None) -> float:
+        """ Current angle in [0, 360), from `status` if given, otherwise read from the Tic. """
+        if status is None:
+            return self.step_to_deg(self.get_current_position())
+        return self.step_to_deg(status.current_position)
 
     def move_to_angle_blocking_in_close_dir(
         self, 
@@ -145,9 +275,37 @@ class TicMotorController:
         return cls.wrap_deg(tar_deg - cur_deg, is_cw)
 
     def set_target_position(self, tar_step: int):
+        raw_step = -tar_step if self.is_reversed else tar_step
+        if self._write("target_position", self.tic.set_target_position, raw_step):
+            self.cmd_target_step = tar_step
+            self.cmd_target_time = time.monotonic()
+
+    def _read_block(self, block: tuple[int, struct.Struct]) -> tuple:
+        offset, layout = block
+        return layout.unpack(self.tic._block_read(GET_VARIABLE_CMD, offset, layout.size))
+
+    def get_status(self) -> TicStatus:
+        """ Position, target, velocity and error flags in two block reads. """
+        op_state, misc, err_status, err_occurred, planning, target = self._read_block(_STATUS_BLOCK)
+        cur_pos, cur_vel = self._read_block(_MOTION_BLOCK)
+        if err_status:
+            # the Tic stopped driving the motor, possibly reset, so resend everything afterwards
+            self.invalidate_write_cache()
         if self.is_reversed:
-            tar_step = -tar_step
-        self.tic.set_target_position(tar_step)
+            target, cur_pos, cur_vel = -target, -cur_pos, -cur_vel
+        return TicStatus(op_state, misc, err_status, err_occurred, planning, target, cur_pos, cur_vel)
+
+    def get_position_and_velocity(self) -> tuple[int, float]:
+        """ Current position in microsteps and speed in degrees per second, in one block read. """
+        cur_pos, cur_vel = self._read_block(_MOTION_BLOCK)
+        if self.is_reversed:
+            cur_pos, cur_vel = -cur_pos, -cur_vel
+        return cur_pos, cur_vel / 100_00 * self.deg_per_micro_step
+
+    def get_current_velocity(self) -> float:
+        """ Current speed reported by the Tic, in degrees per second. """
+        vel = self.tic.get_current_velocity() / 100_00 * self.deg_per_micro_step
+        return -vel if self.is_reversed else vel
 
     def get_current_position(self):
         if self.is_reversed:
@@ -159,14 +317,86 @@ class TicMotorController:
             return -self.tic.get_target_position()
         return self.tic.get_target_position()
 
-    def is_moving(self):
-        if (self.get_current_position != self.get_target_position()):
-            print(f"current: {self.get_current_position()}, target: {self.get_target_position()}")
-        return self.get_current_position() != self.get_target_position()
+    def is_moving(self) -> bool:
+        return self.get_status().is_moving
+
+    def batch_writes(self) -> AbstractContextManager:
+        """ Context in which commands may be held back and sent together with other motors' on exit. """
+        return nullcontext()
+
+    def pending(self) -> int:
+        """ Transactions queued for this motor's Tic, 0 if the transport doesn't queue. """
+        return 0
+
+    def _reach_poll_intervals(self) -> Generator[float, None, None]:
+        """
+        Yield how long to sleep before polling again, until the target is reached.
+        The interval is a fraction of the time the remaining distance takes at
+        the Tic's current velocity, so polls are sparse during long moves and
+        dense near arrival.
+        """
+        while (status := self.get_status()).is_moving:
+            remaining = status.remaining_steps
+            mstep_per_sec = abs(status.current_velocity) / 100_00
+            if remaining == 0:
+                # velocity mode or still braking, check again soon
+                eta = 0.0
+            elif mstep_per_sec > 0:
+                eta = remaining / mstep_per_sec
+            else:
+                # at rest, e.g. just before a move starts, assume the configured speed
+                eta = remaining * self.deg_per_micro_step / self.max_deg_per_sec
+            yield clamp(eta * POLL_ETA_FRACTION, POLL_MIN_SEC, POLL_MAX_SEC)
+
+    def block_until_reach(self, timeout: Optional[float] = None):
+        """ Wait until the target position is reached, raising TimeoutError after `timeout` seconds. """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for interval in self._reach_poll_intervals():
+            if deadline is not None:
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    raise TimeoutError(f"motor did not reach its target within {timeout} s")
+                interval = min(interval, left)
+            time.sleep(interval)
 
-    def block_until_reach(self):
-        while self.is_moving():
-            pass
+    async def block_until_reach_async(self, timeout: Optional[float] = None):
+        """ Awaitable `block_until_reach`, polling on the executor and sleeping on the event loop. """
+        polls = self._reach_poll_intervals()
+        async with asyncio.timeout(timeout):
+            while (interval := await self.executor.run(next, polls, None)) is not None:
+                await asyncio.sleep(interval)
+
+    async def set_spd_async(self, max_deg_per_sec: float):
+        await self.executor.run(self.set_spd, max_deg_per_sec)
+
+    async def set_acc_async(self, max_acc_deg_per_sec2: float):
+        await self.executor.run(self.set_acc, max_acc_deg_per_sec2)
+
+    async def reset_pos_async(self, cur_deg: float):
+        await self.executor.run(self.reset_pos, cur_deg)
+
+    async def move_to_angle_async(
+        self,
+        tar_deg: float,
+        is_cw: bool,
+        max_deg_per_sec: Optional[float] = None,
+        max_acc_deg_per_sec2: Optional[float] = None,
+    ):
+        await self.executor.run(self.move_to_angle, tar_deg, is_cw, max_deg_per_sec, max_acc_deg_per_sec2)
+
+    async def move_to_angle_in_close_dir_async(
+        self,
+        tar_deg: float,
+        max_deg_per_sec: Optional[float] = None,
+        max_acc_deg_per_sec2: Optional[float] = None,
+    ):
+        await self.executor.run(self.move_to_angle_in_close_dir, tar_deg, max_deg_per_sec, max_acc_deg_per_sec2)
+
+    async def get_current_deg_async(self) -> float:
+        return await self.executor.run(self.get_current_deg)
+
+    async def is_moving_async(self) -> bool:
+        return await self.executor.run(self.is_moving)
 
 
 class I2CticMotorController(TicMotorController):
@@ -180,10 +410,12 @@ class I2CticMotorController(TicMotorController):
         max_deg_per_sec: float = 360,
         max_acc_deg_per_sec2: float = 1800,
         deg_per_step: float = 1.8,
+        executor: Optional[HardwareExecutor] = None,
     ) -> None:
-        bus = SMBus(bus_num)
-        backend = SMBus2Backend(bus, address)
-        tic = TicI2C(backend)
+        # motors on the same bus number share one handle and lock
+        self.bus = get_i2c_bus(bus_num)
+        self.address = address
+        tic = BusTicI2C(self.bus, address)
         super().__init__(
             tic,
             is_reversed,
@@ -192,4 +424,20 @@ class I2CticMotorController(TicMotorController):
             max_deg_per_sec,
             max_acc_deg_per_sec2,
             deg_per_step,
+            executor,
         )
+
+    @override
+    @contextmanager
+    def batch_writes(self) -> Iterator[None]:
+        try:
+            with self.bus.batch():
+                yield
+        except BaseException:
+            # the queued writes are already in the write cache but may not have reached the Tic
+            self.invalidate_write_cache()
+            raise
+
+    @override
+    def pending(self) -> int:
+        return self.bus.pending(self.address)
@@ -0,0 +1,236 @@
+from array import array
+from typing import Iterable, Iterator, overload
+
+import numpy as np
+from numpy.typing import NDArray
+from pint._typing import QuantityOrUnitLike
+
+from src.consts import pqt, ur, vec2f, vec2q, DEF_LEN_UNIT, DEF_ANG_UNIT
+from src.kinematics import ParaScaraBatchState, ParaScaraFloatState, ParaScaraState
+
+# slot layout of a packed state; lengths in DEF_LEN_UNIT, angles in radians
+STATE_FIELDS: tuple[str, ...] = (
+    "eff_x", "eff_y",
+    "lf_base_x", "lf_base_y",
+    "rt_base_x", "rt_base_y",
+    "lf_base_ang", "rt_base_ang",
+    "lf_link_ang", "rt_link_ang",
+)
+STATE_WIDTH = len(STATE_FIELDS)
+
+
+def _float_row(state: "AnyState") -> tuple[float, ...]:
+    if isinstance(state, PackedParaScaraState):
+        return tuple(state.data)
+    if isinstance(state, ParaScaraState):
+        state = ParaScaraFloatState.from_quantity(state)
+    return (
+        *state.end_effector_pos,
+        *state.lf_base_endpos,
+        *state.rt_base_endpos,
+        state.lf_base_ang,
+        state.rt_base_ang,
+        state.lf_link_ang,
+        state.rt_link_ang,
+    )
+
+
+class PackedParaScaraState:
+    """
+    Compact `ParaScaraState` backed by one array of STATE_WIDTH doubles.
+    The unit-tagged attributes mirror `ParaScaraState`; each read builds
+    just that quantity and nothing is kept, so call `to_quantity` once and
+    reuse it when reading many of them.
+    Hashable by value, like a tuple of its floats.
+    """
+
+    __slots__ = ("data",)
+
+    def __init__(self, data: Iterable[float]):
+        self.data = array("d", data)
+        if len(self.data) != STATE_WIDTH:
+            raise ValueError(f"expected {STATE_WIDTH} values, got {len(self.data)}")
+
+    @classmethod
+    def pack(cls, state: "AnyState") -> "PackedParaScaraState":
+        return cls(_float_row(state))
+
+    def to_float(self) -> ParaScaraFloatState:
+        d = self.data
+        return ParaScaraFloatState(
+            end_effector_pos=(d[0], d[1]),
+            lf_base_endpos=(d[2], d[3]),
+            rt_base_endpos=(d[4], d[5]),
+            lf_base_ang=d[6],
+            rt_base_ang=d[7],
+            lf_link_ang=d[8],
+            rt_link_ang=d[9],
+        )
+
+    def to_quantity(self) -> ParaScaraState:
+        return self.to_float().to_quantity()
+
+    def to_unit(self, dis_unit: QuantityOrUnitLike, ang_unit: QuantityOrUnitLike) -> ParaScaraState:
+        return self.to_quantity().to_unit(dis_unit, ang_unit)
+
+    def _pos(self, k: int) -> vec2q:
+        return (self.data[k] * DEF_LEN_UNIT, self.data[k + 1] * DEF_LEN_UNIT)
+
+    def _ang(self, k: int) -> pqt:
+        return (self.data[k] * ur.rad).to(DEF_ANG_UNIT)  # type: ignore
+
+    @property
+    def end_effector_pos(self) -> vec2q:
+        return self._pos(0)
+
+    @property
+    def lf_base_endpos(self) -> vec2q:
+        return self._pos(2)
+
+    @property
+    def rt_base_endpos(self) -> vec2q:
+        return self._pos(4)
+
+    @property
+    def lf_base_ang(self) -> pqt:
+        return self._ang(6)
+
+    @property
+    def rt_base_ang(self) -> pqt:
+        return self._ang(7)
+
+    @property
+    def lf_link_ang(self) -> pqt:
+        return self._ang(8)
+
+    @property
+    def rt_link_ang(self) -> pqt:
+        return self._ang(9)
+
+    @property
+    def end_effector_pos_f(self) -> vec2f:
+        return (self.data[0], self.data[1])
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, PackedParaScaraState) and self.data == other.data
+
+    def __hash__(self) -> int:
+        # a tuple hashes -0.0 and 0.0 alike, matching __eq__
+        return hash(tuple(self.data))
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={value:.4g}" for name, value in zip(STATE_FIELDS, self.data))
+        return f"PackedParaScaraState({fields})"
+
+
+AnyState = ParaScaraState | ParaScaraFloatState | PackedParaScaraState
+
+
+class ParaScaraStateArray:
+    """
+    Growable sequence of states (e.g. a trajectory or telemetry history)
+    stored as one (N, STATE_WIDTH) float64 buffer, with column views by field.
+    """
+
+    def __init__(self, capacity: int = 64):
+        self._buf = np.empty((max(capacity, 1), STATE_WIDTH), dtype=np.float64)
+        self._len = 0
+
+    @classmethod
+    def from_rows(cls, rows: NDArray[np.float64]) -> "ParaScaraStateArray":
+        rows = np.asarray(rows, dtype=np.float64).reshape(-1, STATE_WIDTH)
+        arr = cls(len(rows))
+        arr._buf[: len(rows)] = rows
+        arr._len = len(rows)
+        return arr
+
+    @classmethod
+    def from_batch(cls, batch: ParaScaraBatchState) -> "ParaScaraStateArray":
+        """ Pack the valid entries of a batch result, in flattened order. """
+        valid = batch.valid.reshape(-1)
+        rows = np.concatenate(
+            (
+                batch.end_effector_pos.reshape(-1, 2),
+                batch.lf_base_endpos.reshape(-1, 2),
+                batch.rt_base_endpos.reshape(-1, 2),
+                batch.lf_base_ang.reshape(-1, 1),
+                batch.rt_base_ang.reshape(-1, 1),
+                batch.lf_link_ang.reshape(-1, 1),
+                batch.rt_link_ang.reshape(-1, 1),
+            ),
+            axis=1,
+        )
+        return cls.from_rows(rows[valid])
+
+    def _reserve(self, n: int) -> None:
+        if n <= len(self._buf):
+            return
+        new_buf = np.empty((max(n, 2 * len(self._buf)), STATE_WIDTH), dtype=np.float64)
+        new_buf[: self._len] = self._buf[: self._len]
+        self._buf = new_buf
+
+    def append(self, state: AnyState) -> None:
+        self._reserve(self._len + 1)
+        self._buf[self._len] = _float_row(state)
+        self._len += 1
+
+    def extend(self, states: Iterable[AnyState]) -> None:
+        for state in states:
+            self.append(state)
+
+    def clear(self) -> None:
+        self._len = 0
+
+    @property
+    def rows(self) -> NDArray[np.float64]:
+        """ (N, STATE_WIDTH) view of the stored states. """
+        return self._buf[: self._len]
+
+    def column(self, name: str) -> NDArray[np.float64]:
+        return self.rows[:, STATE_FIELDS.index(name)]
+
+    @property
+    def end_effector_pos(self) -> NDArray[np.float64]:
+        return self.rows[:, 0:2]
+
+    @property
+    def lf_base_endpos(self) -> NDArray[np.float64]:
+        return self.rows[:, 2:4]
+
+    @property
+    def rt_base_endpos(self) -> NDArray[np.float64]:
+        return self.rows[:, 4:6]
+
+    def to_batch(self) -> ParaScaraBatchState:
+        rows = self.rows.copy()
+        return ParaScaraBatchState(
+            end_effector_pos=rows[:, 0:2],
+            lf_base_endpos=rows[:, 2:4],
+            rt_base_endpos=rows[:, 4:6],
+            lf_base_ang=rows[:, 6],
+            rt_base_ang=rows[:, 7],
+            lf_link_ang=rows[:, 8],
+            rt_link_ang=rows[:, 9],
+            valid=np.ones(len(rows), dtype=np.bool_),
+        )
+
+    @property
+    def nbytes(self) -> int:
+        return self.rows.nbytes
+
+    def __len__(self) -> int:
+        return self._len
+
+    @overload
+    def __getitem__(self, idx: int) -> PackedParaScaraState: ...
+    @overload
+    def __getitem__(self, idx: slice) -> "ParaScaraStateArray": ...
+
+    def __getitem__(self, idx: int | slice) -> "PackedParaScaraState | ParaScaraStateArray":
+        if isinstance(idx, slice):
+            return ParaScaraStateArray.from_rows(self.rows[idx])
+        return PackedParaScaraState(self.rows[idx].tolist())
+
+    def __iter__(self) -> Iterator[PackedParaScaraState]:
+        for row in self.rows.tolist():
+            yield PackedParaScaraState(row)
@@ -0,0 +1,174 @@
+import heapq
+from collections import OrderedDict
+from math import ceil, hypot, sqrt
+from threading import Lock
+from typing import Optional
+
+import numpy as np
+from numpy.typing import NDArray
+
+from src.consts import vec2f
+from src.kinematics_cache import CacheStats
+from src.trajectory import PolylinePath
+from src.workspace import CELL_VALID, WorkspaceGrid
+
+# 8-connected moves as (d_row, d_col, cost in cells)
+_NEIGHBOURS = tuple(
+    (di, dj, sqrt(di * di + dj * dj)) for di in (-1, 0, 1) for dj in (-1, 0, 1) if di or dj
+)
+
+
+class GridPathPlanner:
+    """
+    Shortest valid end effector paths on a `WorkspaceGrid`.
+
+    A* over the 8-connected interior cells (CELL_VALID, so paths keep at
+    least one cell away from the exact workspace border), followed by
+    line-of-sight shortcutting. When the straight segment is already clear
+    no search runs at all. Smoothed cell paths are kept in an LRU cache per
+    (start cell, goal cell), so repeated pick/place cycles don't replan.
+    Positions are plain floats in DEF_LEN_UNIT.
+    """
+
+    def __init__(self, grid: WorkspaceGrid, cache_size: int = 256):
+        if cache_size <= 0:
+            raise ValueError("cache_size must be positive")
+        self.grid = grid
+        self.free: NDArray[np.bool_] = grid.cells == CELL_VALID
+        self._free_flat: list[bool] = self.free.reshape(-1).tolist()
+        self.cache_size = cache_size
+        self.stats = CacheStats()
+        self._cache: OrderedDict[tuple[tuple[int, int], tuple[int, int]], list[tuple[int, int]]] = OrderedDict()
+        self._lock = Lock()
+
+    def _cell_of(self, pos: vec2f, name: str) -> tuple[int, int]:
+        idx = self.grid.cell_index(*pos)
+        if idx is None or not self.grid.occupancy[idx]:
+            raise ValueError(f"{name} ({pos[0]:.2f}, {pos[1]:.2f}) is not in the workspace.")
+        return idx
+
+    def is_segment_clear(self, a: vec2f, b: vec2f, endpoint_cells: tuple[tuple[int, int], ...] = ()) -> bool:
+        """ Whether every point of the segment lies in a free cell, or one of `endpoint_cells`. """
+        n = max(ceil(hypot(b[0] - a[0], b[1] - a[1]) / (self.grid.resolution / 2)), 1)
+        u = np.linspace(0.0, 1.0, n + 1)
+        x = a[0] + u * (b[0] - a[0])
+        y = a[1] + u * (b[1] - a[1])
+        i = np.floor((y - self.grid.y_min) / self.grid.resolution).astype(np.intp)
+        j = np.floor((x - self.grid.x_min) / self.grid.resolution).astype(np.intp)
+        n_y, n_x = self.grid.shape
+        inside = (i >= 0) & (i < n_y) & (j >= 0) & (j < n_x)
+        if not inside.all():
+            return False
+        ok = self.free[i, j]
+        for ci, cj in endpoint_cells:
+            ok |= (i == ci) & (j == cj)
+        return bool(ok.all())
+
+    def _search(self, start: tuple[int, int], goal: tuple[int, int]) -> Optional[list[tuple[int, int]]]:
+        """ A* with the octile distance heuristic; returns the cell path or None. """
+        n_y, n_x = self.grid.shape
+        free = self._free_flat
+        start_flat, goal_flat = start[0] * n_x + start[1], goal[0] * n_x + goal[1]
+        gi, gj = goal
+
+        def heuristic(i: int, j: int) -> float:
+            di, dj = abs(i - gi), abs(j - gj)
+            return max(di, dj) + (sqrt(2) - 1) * min(di, dj)
+
+        g_score = {start_flat: 0.0}
+        came_from: dict[int, int] = {}
+        open_heap = [(heuristic(*start), 0.0, start_flat)]
+        closed: set[int] = set()
+        while open_heap:
+            _, g, cur = heapq.heappop(open_heap)
+            if cur == goal_flat:
+                path = [cur]
+                while cur in came_from:
+                    cur = came_from[cur]
+                    path.append(cur)
+                return [divmod(flat, n_x) for flat in reversed(path)]
+            if cur in closed:
+                continue
+            closed.add(cur)
+            ci, cj = divmod(cur, n_x)
+            for di, dj, cost in _NEIGHBOURS:
+                ni, nj = ci + di, cj + dj
+                if not (0 <= ni < n_y and 0 <= nj < n_x):
+                    continue
+                nxt = ni * n_x + nj
+                if nxt in closed or not (free[nxt] or nxt == goal_flat):
+                    continue
+                # no corner cutting between two blocked cells
+                if di and dj and not (free[ci * n_x + nj] or free[ni * n_x + cj]):
+                    continue
+                new_g = g + cost
+                if new_g < g_score.get(nxt, float("inf")):
+                    g_score[nxt] = new_g
+                    came_from[nxt] = cur
+                    heapq.heappush(open_heap, (new_g + heuristic(ni, nj), new_g, nxt))
+        return None
+
+    def _shortcut(self, cells: list[tuple[int, int]]) -> list[tuple[int, int]]:
+        """ Greedily drop waypoints that the previous kept one can see past. """
+        ends = (cells[0], cells[-1])
+        centers = [self.grid.cell_center(*cell) for cell in cells]
+        kept = [0]
+        while kept[-1] != len(cells) - 1:
+            cur = kept[-1]
+            nxt = cur + 1
+            for k in range(len(cells) - 1, cur + 1, -1):
+                if self.is_segment_clear(centers[cur], centers[k], ends):
+                    nxt = k
+                    break
+            kept.append(nxt)
+        return [cells[k] for k in kept]
+
+    def plan(self, start: vec2f, goal: vec2f) -> list[vec2f]:
+        """
+        Waypoints from `start` to `goal`, both included, whose connecting
+        segments stay inside the workspace. Raises ValueError if either end
+        is outside the workspace or no path exists.
+        """
+        start_cell = self._cell_of(start, "start")
+        goal_cell = self._cell_of(goal, "goal")
+        if self.is_segment_clear(start, goal, (start_cell, goal_cell)):
+            return [start, goal]
+
+        key = (start_cell, goal_cell)
+        with self._lock:
+            cells = self._cache.get(key)
+            if cells is not None:
+                self._cache.move_to_end(key)
+                self.stats.hits += 1
+            else:
+                self.stats.misses += 1
+
+        if cells is None:
+            found = self._search(start_cell, goal_cell)
+            if found is None:
+                raise ValueError(
+                    f"No valid path from ({start[0]:.2f}, {start[1]:.2f}) to ({goal[0]:.2f}, {goal[1]:.2f})."
+                )
+            cells = self._shortcut(found)
+            with self._lock:
+                self._cache[key] = cells
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+                    self.stats.evictions += 1
+
+        inner = [self.grid.cell_center(*cell) for cell in cells[1:-1]]
+        # the cached path was smoothed between cell centers, keep those if the exact ends can't see past them
+        ends = (start_cell, goal_cell)
+        if not inner or not self.is_segment_clear(start, inner[0], ends):
+            inner.insert(0, self.grid.cell_center(*start_cell))
+        if not self.is_segment_clear(inner[-1], goal, ends):
+            inner.append(self.grid.cell_center(*goal_cell))
+        return [start, *inner, goal]
+
+    def plan_polyline(self, start: vec2f, goal: vec2f) -> PolylinePath:
+        """ `plan` as a path for `plan_trajectory` or `time_optimal_trajectory`. """
+        return PolylinePath(self.plan(start, goal))
+
+    def clear_cache(self) -> None:
+        with self._lock:
+            self._cache.clear()
@@ -1,11 +1,13 @@
 from src.mecanum_chassis import MecanumChassis
-from src.arm import Arm, LinkAngleChecker
+from src.arm import Arm, GridChecker
 from src.pusher import Pusher
 from src.motor_controller import I2CticMotorController, StepMode
 from src.consts import ur
 from src.kinematics import ParaScaraSetup
+from src.kinematics_cache import CachedParaScaraKinematics
+from src.workspace import DEF_CACHE_DIR
 from dataclasses import dataclass
-from typing import Self
+from typing import Optional, Self
 from gpiozero import Motor
 
 
@@ -22,7 +24,8 @@ class Robot:
         self.arm.clean_up()
 
 
-def _get_default_robot() -> Robot:
+def _get_default_robot(cache_dir: Optional[str] = DEF_CACHE_DIR) -> Robot:
+    """ `cache_dir` holds the precomputed workspace grid, None builds it in memory every time. """
     lf_step_motor = I2CticMotorController(
         bus_num=1, address=15, is_reversed=True, step_mode=StepMode._4
     )
@@ -32,8 +35,8 @@ def _get_default_robot() -> Robot:
     )
 
     CURRENT_LIMIT = 9
-    lf_step_motor.tic.set_current_limit(CURRENT_LIMIT)
-    rt_step_motor.tic.set_current_limit(CURRENT_LIMIT)
+    lf_step_motor.set_current_limit(CURRENT_LIMIT)
+    rt_step_motor.set_current_limit(CURRENT_LIMIT)
 
     arm_setup = ParaScaraSetup(
         lf_base_len=85 * ur.mm,
@@ -43,11 +46,15 @@ def _get_default_robot() -> Robot:
         axis_dist=55 * ur.mm,
     )
 
+    # shared so the workspace check and the move of one teleop tick solve IK once
+    arm_kine_solver = CachedParaScaraKinematics(arm_setup)
+
     arm = Arm(
         setup=arm_setup,
         lf_motor=lf_step_motor,
         rt_motor=rt_step_motor,
-        workspace_checker=LinkAngleChecker(arm_setup),
+        workspace_checker=GridChecker(arm_setup, cache_dir=cache_dir, kine_solver=arm_kine_solver),
+        kine_solver=arm_kine_solver,
     )
 
     lf_tp_dc_motor = Motor(forward=15, backward=14, pwm=True)
@@ -0,0 +1,107 @@
+from dataclasses import dataclass, asdict
+from threading import Lock
+from typing import Any, Callable, Hashable, Optional
+
+from src.hw_executor import HardwareExecutor, get_default_executor
+
+
+@dataclass
+class SchedulerStats:
+    submitted: int = 0
+    executed: int = 0
+    coalesced: int = 0
+    failed: int = 0
+
+    @property
+    def coalesce_rate(self) -> float:
+        return self.coalesced / self.submitted if self.submitted else 0.0
+
+    def to_dict(self) -> dict[str, float]:
+        return {**asdict(self), "coalesce_rate": self.coalesce_rate}
+
+
+class SupersedingScheduler:
+    """
+    Non-blocking front of a `HardwareExecutor` that keeps at most one pending
+    command per key (e.g. per actuator). Submitting while the previous
+    command for the same key is still queued replaces it, so when the bus is
+    slower than the input rate the backlog, and with it the latency, stays
+    bounded to one command per key.
+
+    `submit` never waits for the executor, so it is safe on an event loop:
+    if the executor queue is full the command just stays pending, and runs
+    after the next command this scheduler dispatches, or with the next
+    submit once there is room.
+
+    Commands must be submitted from outside the executor's thread; failures
+    are counted and kept in `last_error` instead of being raised.
+    """
+
+    def __init__(self, executor: Optional[HardwareExecutor] = None):
+        self.executor = executor if executor is not None else get_default_executor()
+        self.stats = SchedulerStats()
+        self.last_error: Optional[BaseException] = None
+        self._pending: dict[Hashable, tuple[Callable[..., Any], tuple, dict]] = {}
+        # keys with a dispatch waiting in the executor queue
+        self._queued: set[Hashable] = set()
+        self._lock = Lock()
+
+    def submit(self, key: Hashable, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> bool:
+        """ Queue `fn(*args, **kwargs)` under `key`. Returns True if it superseded a pending command. """
+        with self._lock:
+            self.stats.submitted += 1
+            superseded = key in self._pending
+            self._pending[key] = (fn, args, kwargs)
+            if superseded:
+                self.stats.coalesced += 1
+            # only the first command of a burst needs a dispatch, later ones ride on it
+            if key in self._queued:
+                return superseded
+            self._queued.add(key)
+        if self.executor.try_submit(self._dispatch, key) is None:
+            with self._lock:
+                self._queued.discard(key)
+        return superseded
+
+    def _dispatch(self, key: Hashable) -> None:
+        with self._lock:
+            self._queued.discard(key)
+            entry = self._pending.pop(key, None)
+        # None if cancelled, or already run by an earlier dispatch after a cancel
+        if entry is not None:
+            self._run(key, entry)
+        self._run_undispatched()
+
+    def _run_undispatched(self) -> None:
+        """ Run the pending commands whose dispatch found the executor queue full. """
+        while True:
+            with self._lock:
+                key = next((key for key in self._pending if key not in self._queued), None)
+                if key is None:
+                    return
+                entry = self._pending.pop(key)
+            self._run(key, entry)
+
+    def _run(self, key: Hashable, entry: tuple[Callable[..., Any], tuple, dict]) -> None:
+        fn, args, kwargs = entry
+        try:
+            fn(*args, **kwargs)
+            self.stats.executed += 1
+        except Exception as e:
+            self.stats.failed += 1
+            self.last_error = e
+            print(f"WARNING: scheduled command for {key!r} failed: {e}")
+
+    def cancel(self, key: Hashable) -> bool:
+        """ Drop the pending command for `key`, if any. """
+        with self._lock:
+            return self._pending.pop(key, None) is not None
+
+    @property
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """ Block until every command submitted so far has run. """
+        self.executor.submit(self._run_undispatched).result(timeout)
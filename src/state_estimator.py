@@ -0,0 +1,142 @@
+import time
+from dataclasses import dataclass, asdict
+from math import copysign
+from typing import Optional, TYPE_CHECKING
+
+from src.kinematics import ParaScaraFloatState, ParaScaraState
+from src.motor_controller import TicMotorController
+from src.utils import to_rad
+
+if TYPE_CHECKING:
+    from src.arm import Arm
+
+# integration step of the joint motion model, in seconds
+MODEL_STEP_SEC = 0.002
+
+
+class JointEstimator:
+    """
+    Dead-reckons one motor's position from its last commanded target, speed
+    and acceleration, following the same ramp the Tic applies: accelerate
+    towards the target and brake so it stops on it. Positions are in
+    degrees, unwrapped (same counting as the Tic's step counter).
+    """
+
+    def __init__(self, motor: TicMotorController):
+        self.motor = motor
+        self.pos = 0.0
+        self.vel = 0.0
+        self.time = 0.0
+        self.target: Optional[float] = None
+        self.synced = False
+        self._target_time = 0.0
+        self._epoch = motor.pos_epoch
+
+    @property
+    def needs_sync(self) -> bool:
+        return not self.synced or self._epoch != self.motor.pos_epoch
+
+    def sync(self, now: float) -> float:
+        """ Replace the model state with a hardware reading; returns the prediction error in degrees. """
+        predicted = None if self.needs_sync else self.predict(now)
+        pos_step, self.vel = self.motor.get_position_and_velocity()
+        self.pos = pos_step * self.motor.deg_per_micro_step
+        self.time = now
+        self._take_target()
+        self.synced = True
+        self._epoch = self.motor.pos_epoch
+        return 0.0 if predicted is None else abs(predicted - self.pos)
+
+    def _take_target(self) -> None:
+        step = self.motor.cmd_target_step
+        self.target = None if step is None else step * self.motor.deg_per_micro_step
+        self._target_time = self.motor.cmd_target_time
+
+    def _advance(self, until: float) -> None:
+        tar = self.target
+        v_max = self.motor.cmd_deg_per_sec
+        acc = self.motor.cmd_acc_deg_per_sec2
+        while self.time < until:
+            if tar is None or (self.pos == tar and self.vel == 0.0):
+                # holding position, nothing to integrate
+                self.time = until
+                return
+            dt = min(MODEL_STEP_SEC, until - self.time)
+            self.time += dt
+            dist = tar - self.pos
+            stop_dist = self.vel * self.vel / (2 * acc)
+            if self.vel * dist > 0 and stop_dist >= abs(dist):
+                new_vel = self.vel - copysign(acc * dt, self.vel)
+            else:
+                new_vel = self.vel + copysign(acc * dt, dist)
+            new_vel = max(-v_max, min(v_max, new_vel))
+            step = (self.vel + new_vel) / 2 * dt
+            if abs(dist) < 1e-9 or (step >= dist > 0) or (step <= dist < 0):
+                self.pos, self.vel = tar, 0.0
+            else:
+                self.pos += step
+                self.vel = new_vel
+
+    def predict(self, now: float) -> float:
+        """ Estimated position at `now`, advancing the model; no bus access. """
+        if self.motor.cmd_target_time > self._target_time:
+            # the old target applies until the new one was sent
+            self._advance(min(self.motor.cmd_target_time, now))
+            self._take_target()
+        self._advance(now)
+        return self.pos
+
+
+@dataclass
+class EstimatorStats:
+    predictions: int = 0
+    resyncs: int = 0
+    last_error_deg: float = 0.0
+    max_error_deg: float = 0.0
+    mean_error_deg: float = 0.0
+
+    def to_dict(self) -> dict[str, float]:
+        return asdict(self)
+
+
+class ArmStateEstimator:
+    """
+    Arm pose without I2C reads: both joints are dead-reckoned with
+    `JointEstimator` and only read back from the Tics every
+    `resync_interval` seconds (and after a position reset). The prediction
+    error seen at every resync is tracked in `stats` to tune the interval.
+    """
+
+    def __init__(self, arm: "Arm", resync_interval: float = 0.5):
+        self.arm = arm
+        self.resync_interval = resync_interval
+        self.joints = (JointEstimator(arm.lf_motor), JointEstimator(arm.rt_motor))
+        self.stats = EstimatorStats()
+        self._last_sync = float("-inf")
+
+    def resync(self, now: Optional[float] = None) -> None:
+        now = time.monotonic() if now is None else now
+        error = max(joint.sync(now) for joint in self.joints)
+        self._last_sync = now
+        s = self.stats
+        s.resyncs += 1
+        s.last_error_deg = error
+        s.max_error_deg = max(s.max_error_deg, error)
+        s.mean_error_deg += (error - s.mean_error_deg) / s.resyncs
+
+    def get_joint_degs(self, now: Optional[float] = None) -> tuple[float, float]:
+        """ Estimated (left, right) base angles in degrees within [0, 360). """
+        now = time.monotonic() if now is None else now
+        if now - self._last_sync >= self.resync_interval or any(joint.needs_sync for joint in self.joints):
+            self.resync(now)
+        else:
+            self.stats.predictions += 1
+        lf, rt = (joint.predict(now) % 360 for joint in self.joints)
+        return lf, rt
+
+    def get_current_state_f(self, mode: str = 'o', now: Optional[float] = None) -> list[ParaScaraFloatState]:
+        lf_deg, rt_deg = self.get_joint_degs(now)
+        return self.arm.kine_solver.forward_kinematics_f(to_rad(lf_deg), to_rad(rt_deg), mode)
+
+    def get_current_state(self, mode: str = 'o', now: Optional[float] = None) -> list[ParaScaraState]:
+        return [state.to_quantity() for state in self.get_current_state_f(mode, now)]
@@ -0,0 +1,202 @@
+import time
+from dataclasses import dataclass
+from typing import Optional, TYPE_CHECKING
+
+import numpy as np
+from numpy.typing import NDArray
+
+from src.trajectory import JointTrajectory, TrajectoryStreamer
+
+if TYPE_CHECKING:
+    from src.arm import Arm
+
+TEACH_MAGIC = b"SCTR"
+TEACH_FORMAT_VERSION = 1
+# file layout: header, then one little-endian record per sample
+_HEADER_DTYPE = np.dtype([("magic", "S4"), ("version", "<u2"), ("mode", "S2"), ("count", "<u4")])
+_SAMPLE_DTYPE = np.dtype([("t", "<f8"), ("x", "<f4"), ("y", "<f4"), ("q1", "<f4"), ("q2", "<f4")])
+
+
+def douglas_peucker(points: NDArray[np.float64], tolerance: float) -> NDArray[np.intp]:
+    """
+    Indices of the points kept by Douglas-Peucker simplification of the
+    (N, D) polyline `points`: every dropped point lies within `tolerance`
+    of the segment between its kept neighbours. Iterative, so long
+    recordings don't hit the recursion limit.
+    """
+    n = len(points)
+    if n <= 2:
+        return np.arange(n)
+    keep = np.zeros(n, dtype=np.bool_)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        lo, hi = stack.pop()
+        if hi - lo < 2:
+            continue
+        a, b = points[lo], points[hi]
+        seg = b - a
+        seg_len_sq = float(seg @ seg)
+        rel = points[lo + 1:hi] - a
+        if seg_len_sq > 0:
+            u = np.clip(rel @ seg / seg_len_sq, 0.0, 1.0)
+            rel = rel - u[:, None] * seg
+        dist_sq = np.einsum("ij,ij->i", rel, rel)
+        far = int(np.argmax(dist_sq))
+        if dist_sq[far] > tolerance * tolerance:
+            mid = lo + 1 + far
+            keep[mid] = True
+            stack.append((lo, mid))
+            stack.append((mid, hi))
+    return np.flatnonzero(keep)
+
+
+@dataclass
+class TeachRecording:
+    """
+    Commanded arm motion over time: seconds since the start, end effector
+    position in DEF_LEN_UNIT and base angles in radians (unwrapped).
+    """
+    t  : NDArray[np.float64]
+    x  : NDArray[np.float64]
+    y  : NDArray[np.float64]
+    q1 : NDArray[np.float64]
+    q2 : NDArray[np.float64]
+    mode : str = "+-"
+
+    def __len__(self) -> int:
+        return len(self.t)
+
+    @property
+    def duration(self) -> float:
+        return float(self.t[-1] - self.t[0]) if len(self.t) else 0.0
+
+    def compress(self, tolerance: float = 0.5, time_tolerance: float = 0.05) -> "TeachRecording":
+        """
+        Douglas-Peucker over position and time: a sample is dropped only if
+        linear interpolation between the kept ones reproduces it within
+        `tolerance` (DEF_LEN_UNIT) in space and about `time_tolerance`
+        seconds in time, so pauses and speed changes survive.
+        """
+        time_scale = tolerance / time_tolerance if time_tolerance > 0 else 0.0
+        idx = douglas_peucker(np.column_stack((self.x, self.y, self.t * time_scale)), tolerance)
+        return TeachRecording(self.t[idx], self.x[idx], self.y[idx], self.q1[idx], self.q2[idx], self.mode)
+
+    def save(self, path: str) -> None:
+        header = np.array([(TEACH_MAGIC, TEACH_FORMAT_VERSION, self.mode.encode(), len(self))], dtype=_HEADER_DTYPE)
+        samples = np.empty(len(self), dtype=_SAMPLE_DTYPE)
+        samples["t"], samples["x"], samples["y"] = self.t, self.x, self.y
+        samples["q1"], samples["q2"] = self.q1, self.q2
+        with open(path, "wb") as f:
+            f.write(header.tobytes())
+            f.write(samples.tobytes())
+
+    @classmethod
+    def load(cls, path: str) -> "TeachRecording":
+        with open(path, "rb") as f:
+            header = np.frombuffer(f.read(_HEADER_DTYPE.itemsize), dtype=_HEADER_DTYPE)
+            if len(header) != 1 or header["magic"][0] != TEACH_MAGIC:
+                raise ValueError(f"{path} is not a teach recording")
+            if header["version"][0] != TEACH_FORMAT_VERSION:
+                raise ValueError(f"unsupported teach recording version {header['version'][0]}")
+            count = int(header["count"][0])
+            samples = np.frombuffer(f.read(count * _SAMPLE_DTYPE.itemsize), dtype=_SAMPLE_DTYPE)
+        if len(samples) != count:
+            raise ValueError(f"{path} is truncated")
+        return cls(
+            *(samples[name].astype(np.float64) for name in ("t", "x", "y", "q1", "q2")),
+            mode=header["mode"][0].decode(),
+        )
+
+
+class TeachRecorder:
+    """
+    Collects commanded targets while teaching, e.g. from `ArmTeleop`.
+    Joint angles are solved with the arm's IK at record time, in the IK
+    mode the caller moved the arm with; the recording takes the mode of
+    its first sample, which is the one `replay` moves to its start in.
+    """
+
+    def __init__(self, arm: "Arm"):
+        self.arm = arm
+        self.recording = False
+        self._rows: list[tuple[float, float, float, float, float]] = []
+        self._mode: Optional[str] = None
+        self._t0 = 0.0
+
+    def start(self) -> None:
+        self._rows.clear()
+        self._mode = None
+        self._t0 = time.monotonic()
+        self.recording = True
+
+    def record(self, x: float, y: float, mode: str) -> None:
+        if not self.recording:
+            return
+        state = self.arm.kine_solver.inverse_kinematics_f(x, y, mode)[0]
+        if self._mode is None:
+            self._mode = mode
+        self._rows.append((time.monotonic() - self._t0, x, y, state.lf_base_ang, state.rt_base_ang))
+
+    def stop(self) -> TeachRecording:
+        self.recording = False
+        rows = np.array(self._rows, dtype=np.float64).reshape(-1, 5)
+        return TeachRecording(
+            t=rows[:, 0],
+            x=rows[:, 1],
+            y=rows[:, 2],
+            q1=np.unwrap(rows[:, 3]),
+            q2=np.unwrap(rows[:, 4]),
+            mode=self._mode or "+-",
+        )
+
+
+def limited_speedup(arm: "Arm", rec: TeachRecording, speedup: float) -> float:
+    """
+    Largest factor up to `speedup` at which replaying `rec` stays within both
+    motors' max_deg_per_sec and max_acc_deg_per_sec2.
+    """
+    if len(rec) < 2:
+        return speedup
+    dt = np.maximum(np.diff(rec.t), 1e-6)
+    factor = speedup
+    for q, motor in ((rec.q1, arm.lf_motor), (rec.q2, arm.rt_motor)):
+        vel = np.abs(np.degrees(np.diff(q) / dt))
+        peak_vel = float(vel.max(initial=0.0))
+        if peak_vel * factor > motor.max_deg_per_sec:
+            factor = motor.max_deg_per_sec / peak_vel
+        if len(dt) > 1:
+            # velocity change between consecutive segments over their mean duration
+            acc = np.abs(np.diff(np.degrees(np.diff(q) / dt)) / ((dt[1:] + dt[:-1]) / 2))
+            peak_acc = float(acc.max(initial=0.0))
+            if peak_acc * factor**2 > motor.max_acc_deg_per_sec2:
+                factor = (motor.max_acc_deg_per_sec2 / peak_acc) ** 0.5
+    return factor
+
+
+def replay(
+    arm: "Arm",
+    rec: TeachRecording,
+    speedup: float = 1.0,
+    rate_hz: float = 50.0,
+    respect_limits: bool = True,
+) -> float:
+    """
+    Move to the recording's start, then stream it `speedup` times faster,
+    lowered as needed to respect the joint limits. Blocks until done and
+    returns the speed-up actually used.
+    """
+    if speedup <= 0:
+        raise ValueError("speedup must be positive")
+    if len(rec) == 0:
+        return speedup
+    if respect_limits:
+        speedup = min(speedup, limited_speedup(arm, rec, speedup))
+
+    arm.move_to_pos_f(float(rec.x[0]), float(rec.y[0]), mode=rec.mode)
+    arm.block_until_reach()
+    traj = JointTrajectory(
+        t=(rec.t - rec.t[0]) / speedup, x=rec.x, y=rec.y, q1=rec.q1, q2=rec.q2, mode=rec.mode
+    )
+    TrajectoryStreamer(arm, rate_hz).stream(traj)
+    return speedup
@@ -0,0 +1,250 @@
+import struct
+import threading
+import time
+from math import copysign
+from typing import Callable, Optional
+
+from ticlib.ticlib import TicBase, GET_VARIABLE_CMD
+
+from src.bus_metrics import COMMAND_PAYLOAD_BYTES
+
+# integration step of the simulated step planner, in seconds
+SIM_STEP_SEC = 0.0005
+# largest block read the Tic answers over I2C
+MAX_BLOCK_READ = 15
+
+# error_status bits
+ERR_INTENTIONALLY_DEENERGIZED = 1 << 0
+ERR_SAFE_START_VIOLATION = 1 << 7
+
+PLANNING_OFF = 0
+PLANNING_POSITION = 1
+PLANNING_VELOCITY = 2
+
+# operation_state values
+STATE_DEENERGIZED = 2
+STATE_NORMAL = 10
+
+# microsteps per full step for each step mode code
+STEP_MODE_DIVISORS = {0: 1, 1: 2, 2: 4, 3: 8, 4: 16, 5: 32, 6: 64, 7: 128, 8: 256}
+
+# (offset, layout, attribute) of the simulated variables
+_VARIABLE_LAYOUT = (
+    (0x00, "B", "operation_state"),
+    (0x01, "B", "misc_flags"),
+    (0x02, "<H", "error_status"),
+    (0x04, "<I", "errors_occurred"),
+    (0x09, "B", "planning_mode"),
+    (0x0A, "<i", "target_position"),
+    (0x0E, "<i", "target_velocity"),
+    (0x12, "<I", "starting_speed"),
+    (0x16, "<I", "max_speed"),
+    (0x1A, "<I", "max_deceleration"),
+    (0x1E, "<I", "max_acceleration"),
+    (0x22, "<i", "current_position"),
+    (0x26, "<i", "current_velocity"),
+    (0x2A, "<i", "acting_target_position"),
+    (0x32, "B", "device_reset"),
+    (0x49, "B", "step_mode"),
+    (0x4A, "B", "current_limit"),
+)
+_VARIABLES_SIZE = 0x56
+
+
+class SimulatedTic(TicBase):
+    """
+    In-memory stand-in for a Tic stepper controller, usable wherever
+    `TicI2C` is, e.g. as the `tic_base` of a `TicMotorController`.
+
+    Commands and variable reads go through the same `_send_command` /
+    `_block_read` entry points as the real drivers, and each costs
+    `latency_sec` plus `sec_per_byte` per byte on the wire (a block read
+    is a write and a read), so control loops can be timed against a bus
+    of realistic speed. Motion follows the Tic's step planner: ramps at
+    max_acceleration / max_deceleration up to max_speed, in position or
+    velocity mode. The motor only moves while energized, out of safe
+    start and without errors. Positions count microsteps of the current
+    step mode, like on the Tic.
+    """
+
+    def __init__(
+        self,
+        latency_sec: float = 0.0,
+        sec_per_byte: float = 0.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.latency_sec = latency_sec
+        self.sec_per_byte = sec_per_byte
+        self.clock = clock
+        self.transactions = 0
+        self._lock = threading.Lock()
+        self._power_on()
+        super().__init__()
+
+    def _power_on(self) -> None:
+        """ State after power-up or a reset command. """
+        self.misc_flags = 0
+        self.errors_occurred = 0
+        self.device_reset = 0
+        self.error_status = ERR_INTENTIONALLY_DEENERGIZED | ERR_SAFE_START_VIOLATION
+        self.planning_mode = PLANNING_OFF
+        self.target_position = 0
+        self.target_velocity = 0
+        self.starting_speed = 0
+        # same units as the Tic: microsteps per 10000 s and per 100 s^2
+        self.max_speed = 2_000_000
+        self.max_acceleration = 40_000
+        self.max_deceleration = 0
+        self.step_mode = 0
+        self.current_limit = 0
+        self.position = 0.0
+        self.velocity = 0.0
+        self._time = self.clock()
+
+    @property
+    def operation_state(self) -> int:
+        return STATE_DEENERGIZED if self.error_status & ERR_INTENTIONALLY_DEENERGIZED else STATE_NORMAL
+
+    @property
+    def current_position(self) -> int:
+        return round(self.position)
+
+    @property
+    def current_velocity(self) -> int:
+        return round(self.velocity * 100_00)
+
+    @property
+    def acting_target_position(self) -> int:
+        """ Position the step planner is heading to: the target while it runs a position move, else where it is. """
+        if self.planning_mode == PLANNING_POSITION and not self.error_status:
+            return self.target_position
+        return self.current_position
+
+    @property
+    def full_steps(self) -> float:
+        """ Motor shaft position in full steps. """
+        return self.position / STEP_MODE_DIVISORS[self.step_mode]
+
+    def _bus_delay(self, n_bytes: int, n_transfers: int = 1) -> None:
+        delay = self.latency_sec * n_transfers + self.sec_per_byte * n_bytes
+        if delay > 0:
+            time.sleep(delay)
+
+    def _send_command(self, command_code, format, value=None):
+        n_bytes = 1 + COMMAND_PAYLOAD_BYTES.get(format, 0)
+        self._bus_delay(n_bytes)
+        with self._lock:
+            self.transactions += 1
+            self._advance(self.clock())
+            self._apply(command_code, value)
+
+    def _block_read(self, command_code, offset, length, format_response=None):
+        if not 1 <= length <= MAX_BLOCK_READ:
+            raise ValueError(f"block read length must be between 1 and {MAX_BLOCK_READ}, got {length}")
+        self._bus_delay(3 + length, n_transfers=2)
+        with self._lock:
+            self.transactions += 1
+            self._advance(self.clock())
+            if command_code == GET_VARIABLE_CMD:
+                image = self._variables_image()
+            else:
+                # settings aren't simulated, they read as zero
+                image = bytes(0x100)
+        result = bytes(image[offset:offset + length]).ljust(length, b"\0")
+        if format_response is None:
+            return result
+        return format_response(result)
+
+    def _variables_image(self) -> bytearray:
+        image = bytearray(_VARIABLES_SIZE)
+        for offset, layout, name in _VARIABLE_LAYOUT:
+            struct.pack_into(layout, image, offset, getattr(self, name))
+        return image
+
+    def _apply(self, command_code: int, value: Optional[int]) -> None:
+        match command_code:
+            case 0xE0:  # set_target_position
+                self.target_position = value
+                self.planning_mode = PLANNING_POSITION
+            case 0xE3:  # set_target_velocity
+                self.target_velocity = value
+                self.planning_mode = PLANNING_VELOCITY
+            case 0xEC:  # halt_and_set_position
+                self.position = float(value)
+                self.velocity = 0.0
+                self.target_position = value
+                self.planning_mode = PLANNING_OFF
+            case 0x89:  # halt_and_hold
+                self.velocity = 0.0
+                self.planning_mode = PLANNING_OFF
+            case 0x86:  # deenergize
+                self.velocity = 0.0
+                self.error_status |= ERR_INTENTIONALLY_DEENERGIZED
+            case 0x85:  # energize
+                self.error_status &= ~ERR_INTENTIONALLY_DEENERGIZED
+            case 0x83:  # exit_safe_start
+                self.error_status &= ~ERR_SAFE_START_VIOLATION
+            case 0x8F:  # enter_safe_start
+                self.error_status |= ERR_SAFE_START_VIOLATION
+            case 0xB0:  # reset
+                self._power_on()
+                self.device_reset = 1
+            case 0xE6:  # set_max_speed
+                self.max_speed = value
+            case 0xE5:  # set_starting_speed
+                self.starting_speed = value
+            case 0xEA:  # set_max_acceleration
+                self.max_acceleration = value
+            case 0xE9:  # set_max_deceleration
+                self.max_deceleration = value
+            case 0x94:  # set_step_mode
+                if value not in STEP_MODE_DIVISORS:
+                    raise ValueError(f"invalid step mode {value}")
+                self.step_mode = value
+            case 0x91:  # set_current_limit
+                self.current_limit = value
+        if self.error_status:
+            self.errors_occurred |= self.error_status
+
+    def _advance(self, until: float) -> None:
+        """ Run the step planner up to `until`. """
+        if self.error_status & ERR_INTENTIONALLY_DEENERGIZED:
+            self._time = until
+            return
+        v_max = self.max_speed / 100_00
+        acc = self.max_acceleration / 100
+        dec = self.max_deceleration / 100 or acc
+        while self._time < until:
+            dt = min(SIM_STEP_SEC, until - self._time)
+            self._time += dt
+            if self.error_status or self.planning_mode == PLANNING_OFF:
+                # errors make the Tic decelerate to a stop
+                tar_vel = 0.0
+            elif self.planning_mode == PLANNING_VELOCITY:
+                tar_vel = max(-v_max, min(v_max, self.target_velocity / 100_00))
+            else:
+                dist = self.target_position - self.position
+                if self.velocity == 0.0 and abs(dist) < 0.5:
+                    self.position = float(self.target_position)
+                    self._time = until
+                    return
+                stop_dist = self.velocity * self.velocity / (2 * dec)
+                if self.velocity * dist > 0 and stop_dist >= abs(dist):
+                    tar_vel = 0.0
+                else:
+                    tar_vel = copysign(v_max, dist)
+            if tar_vel == self.velocity == 0.0:
+                self._time = until
+                return
+            slowing = abs(tar_vel) < abs(self.velocity) or tar_vel * self.velocity < 0
+            rate = (dec if slowing else acc) * dt
+            new_vel = tar_vel if abs(tar_vel - self.velocity) <= rate else self.velocity + copysign(rate, tar_vel - self.velocity)
+            step = (self.velocity + new_vel) / 2 * dt
+            if self.planning_mode == PLANNING_POSITION and not self.error_status:
+                dist = self.target_position - self.position
+                if (step >= dist > 0) or (step <= dist < 0):
+                    # land on the target instead of overshooting it
+                    self.position, self.velocity = float(self.target_position), 0.0
+                    continue
+            self.position += step
+            self.velocity = new_vel
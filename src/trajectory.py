@@ -0,0 +1,528 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from math import atan2, hypot, pi, sqrt
+from threading import Event
+from time import perf_counter, sleep
+from typing import Optional, Sequence, override, TYPE_CHECKING
+
+import numpy as np
+from numpy.typing import ArrayLike, NDArray
+
+from src.consts import vec2f
+from src.kinematics import ParaScaraKinematics
+from src.utils import clamp, to_deg
+
+if TYPE_CHECKING:
+    from src.arm import Arm, ArmWorkspaceChecker
+
+
+# re-integrations of time_optimal_trajectory slowing down samples that break the limits
+TOPP_REFINE_PASSES = 4
+# relative excess over the limits the refinement leaves to the final time stretch
+TOPP_LIMIT_TOL = 1e-3
+
+
+class CartesianPath(ABC):
+    """
+    Geometric end effector path parametrized by arc length s in [0, length].
+    Lengths are plain floats in DEF_LEN_UNIT.
+    """
+
+    @property
+    @abstractmethod
+    def length(self) -> float:
+        pass
+
+    @abstractmethod
+    def points_at(self, s: ArrayLike) -> tuple[NDArray[np.float64], NDArray[np.float64]]:
+        """ (x, y) arrays of the points at arc lengths `s` """
+        pass
+
+    def tangents_at(self, s: ArrayLike) -> tuple[NDArray[np.float64], NDArray[np.float64]]:
+        """ (dx/ds, dy/ds) at arc lengths `s`, by central differences unless overridden """
+        s_arr = np.asarray(s, dtype=np.float64)
+        h = 1e-4 * max(self.length, 1.0)
+        x0, y0 = self.points_at(np.maximum(s_arr - h, 0.0))
+        x1, y1 = self.points_at(np.minimum(s_arr + h, self.length))
+        span = np.minimum(s_arr + h, self.length) - np.maximum(s_arr - h, 0.0)
+        return (x1 - x0) / span, (y1 - y0) / span
+
+    @property
+    def start(self) -> vec2f:
+        x, y = self.points_at(0.0)
+        return (float(x), float(y))
+
+    @property
+    def end(self) -> vec2f:
+        x, y = self.points_at(self.length)
+        return (float(x), float(y))
+
+
+class LinePath(CartesianPath):
+    def __init__(self, start: vec2f, end: vec2f):
+        self._start = start
+        self._end = end
+        self._length = hypot(end[0] - start[0], end[1] - start[1])
+
+    @property
+    @override
+    def length(self) -> float:
+        return self._length
+
+    @override
+    def points_at(self, s: ArrayLike) -> tuple[NDArray[np.float64], NDArray[np.float64]]:
+        u = np.asarray(s, dtype=np.float64) / self._length if self._length > 0 else np.zeros_like(s, dtype=np.float64)
+        x = self._start[0] + u * (self._end[0] - self._start[0])
+        y = self._start[1] + u * (self._end[1] - self._start[1])
+        return x, y
+
+    @override
+    def tangents_at(self, s: ArrayLike) -> tuple[NDArray[np.float64], NDArray[np.float64]]:
+        shape = np.shape(s)
+        if self._length == 0:
+            return np.zeros(shape), np.zeros(shape)
+        return (
+            np.full(shape, (self._end[0] - self._start[0]) / self._length),
+            np.full(shape, (self._end[1] - self._start[1]) / self._length),
+        )
+
+
+class PolylinePath(CartesianPath):
+    """ Straight segments through `points`, e.g. a planned path around invalid regions. """
+
+    def __init__(self, points: Sequence[vec2f]):
+        if len(points) < 1:
+            raise ValueError("a polyline needs at least one point")
+        self.points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        seg_len = np.hypot(*np.diff(self.points, axis=0).T)
+        self._cum_len = np.concatenate(([0.0], np.cumsum(seg_len)))
+
+    @property
+    @override
+    def length(self) -> float:
+        return float(self._cum_len[-1])
+
+    @override
+    def points_at(self, s: ArrayLike) -> tuple[NDArray[np.float64], NDArray[np.float64]]:
+        s_arr = np.asarray(s, dtype=np.float64)
+        return np.interp(s_arr, self._cum_len, self.points[:, 0]), np.interp(s_arr, self._cum_len, self.points[:, 1])
+
+    @override
+    def tangents_at(self, s: ArrayLike) -> tuple[NDArray[np.float64], NDArray[np.float64]]:
+        s_arr = np.asarray(s, dtype=np.float64)
+        if len(self.points) < 2 or self.length == 0:
+            return np.zeros(s_arr.shape), np.zeros(s_arr.shape)
+        seg = np.clip(np.searchsorted(self._cum_len, s_arr, side="right") - 1, 0, len(self.points) - 2)
+        delta = self.points[seg + 1] - self.points[seg]
+        norm = np.maximum(np.hypot(delta[..., 0], delta[..., 1]), 1e-12)
+        return delta[..., 0] / norm, delta[..., 1] / norm
+
+
+class ArcPath(CartesianPath):
+    """
+    Circular arc around `center`, from `start_ang` sweeping `sweep_ang`
+    radians (positive is counter clockwise).
+    """
+
+    def __init__(self, center: vec2f, radius: float, start_ang: float, sweep_ang: float):
+        if radius <= 0:
+            raise ValueError("radius must be positive")
+        self.center = center
+        self.radius = radius
+        self.start_ang = start_ang
+        self.sweep_ang = sweep_ang
+
+    @classmethod
+    def from_center(cls, start: vec2f, center: vec2f, sweep_ang: float) -> "ArcPath":
+        """ Arc starting at `start` around `center`, e.g. for G2/G3 style moves. """
+        radius = hypot(start[0] - center[0], start[1] - center[1])
+        start_ang = atan2(start[1] - center[1], start[0] - center[0])
+        return cls(center, radius, start_ang, sweep_ang)
+
+    @property
+    @override
+    def length(self) -> float:
+        return self.radius * abs(self.sweep_ang)
+
+    @override
+    def points_at(self, s: ArrayLike) -> tuple[NDArray[np.float64], NDArray[np.float64]]:
+        ang = self.start_ang + np.sign(self.sweep_ang) * np.asarray(s, dtype=np.float64) / self.radius
+        return self.center[0] + self.radius * np.cos(ang), self.center[1] + self.radius * np.sin(ang)
+
+    @override
+    def tangents_at(self, s: ArrayLike) -> tuple[NDArray[np.float64], NDArray[np.float64]]:
+        direction = np.sign(self.sweep_ang)
+        ang = self.start_ang + direction * np.asarray(s, dtype=np.float64) / self.radius
+        return -direction * np.sin(ang), direction * np.cos(ang)
+
+
+class MotionProfile(ABC):
+    """
+    Symmetric rest-to-rest timing law s(t) over `distance`, limited to
+    `max_vel` and `max_acc`. The peak velocity is lowered when the
+    distance is too short to reach `max_vel`.
+    """
+
+    def __init__(self, distance: float, max_vel: float, max_acc: float):
+        if distance < 0:
+            raise ValueError("distance must not be negative")
+        if max_vel <= 0 or max_acc <= 0:
+            raise ValueError("max_vel and max_acc must be positive")
+        self.distance = distance
+        self.max_acc = max_acc
+        self.peak_vel = min(max_vel, self._peak_vel_for(distance, max_acc))
+        self.acc_time = self._ramp_time(self.peak_vel, max_acc)
+        acc_dist = self.peak_vel * self.acc_time / 2
+        cruise_dist = distance - 2 * acc_dist
+        self.cruise_time = cruise_dist / self.peak_vel if self.peak_vel > 0 else 0.0
+
+    @property
+    def duration(self) -> float:
+        return 2 * self.acc_time + self.cruise_time
+
+    @staticmethod
+    @abstractmethod
+    def _ramp_time(vel: float, max_acc: float) -> float:
+        """ time needed to ramp from rest to `vel` """
+        pass
+
+    @staticmethod
+    @abstractmethod
+    def _peak_vel_for(distance: float, max_acc: float) -> float:
+        """ peak velocity of the profile without a cruise phase """
+        pass
+
+    @abstractmethod
+    def _ramp(self, t: NDArray[np.float64]) -> tuple[NDArray[np.float64], NDArray[np.float64]]:
+        """ (s, v) during the acceleration phase, t in [0, acc_time] """
+        pass
+
+    def sample(self, t: ArrayLike) -> tuple[NDArray[np.float64], NDArray[np.float64]]:
+        """ (s, v) at times `t`, clamped to [0, duration] """
+        t_arr = np.clip(np.asarray(t, dtype=np.float64), 0.0, self.duration)
+        ta, tc = self.acc_time, self.cruise_time
+        s_acc, v_acc = self._ramp(np.minimum(t_arr, ta))
+        s_dec, v_dec = self._ramp(np.clip(self.duration - t_arr, 0.0, ta))
+        s_cruise = self.peak_vel * ta / 2 + self.peak_vel * (t_arr - ta)
+
+        s = np.where(t_arr <= ta, s_acc, np.where(t_arr <= ta + tc, s_cruise, self.distance - s_dec))
+        v = np.where(t_arr <= ta, v_acc, np.where(t_arr <= ta + tc, self.peak_vel, v_dec))
+        return s, v
+
+
+class TrapezoidalProfile(MotionProfile):
+    """ Constant acceleration ramps, the same law the Tic applies to a single move. """
+
+    @staticmethod
+    @override
+    def _ramp_time(vel: float, max_acc: float) -> float:
+        return vel / max_acc
+
+    @staticmethod
+    @override
+    def _peak_vel_for(distance: float, max_acc: float) -> float:
+        return sqrt(distance * max_acc)
+
+    @override
+    def _ramp(self, t: NDArray[np.float64]) -> tuple[NDArray[np.float64], NDArray[np.float64]]:
+        return 0.5 * self.max_acc * t**2, self.max_acc * t
+
+
+class SCurveProfile(MotionProfile):
+    """
+    Sinusoidal (cycloidal) ramps: acceleration rises and falls smoothly to
+    `max_acc`, so the jerk stays bounded, at the cost of pi / 2 longer ramps.
+    """
+
+    @staticmethod
+    @override
+    def _ramp_time(vel: float, max_acc: float) -> float:
+        return pi * vel / (2 * max_acc)
+
+    @staticmethod
+    @override
+    def _peak_vel_for(distance: float, max_acc: float) -> float:
+        return sqrt(2 * distance * max_acc / pi)
+
+    @override
+    def _ramp(self, t: NDArray[np.float64]) -> tuple[NDArray[np.float64], NDArray[np.float64]]:
+        if self.acc_time == 0:
+            return np.zeros_like(t), np.zeros_like(t)
+        w = pi / self.acc_time
+        s = self.peak_vel / 2 * (t - np.sin(w * t) / w)
+        v = self.peak_vel / 2 * (1 - np.cos(w * t))
+        return s, v
+
+
+@dataclass
+class JointTrajectory:
+    """
+    Timed joint waypoints of a Cartesian move. Times in seconds, positions in
+    DEF_LEN_UNIT and joint angles in radians, unwrapped so consecutive
+    samples never jump by a full turn.
+    """
+    t  : NDArray[np.float64]
+    x  : NDArray[np.float64]
+    y  : NDArray[np.float64]
+    q1 : NDArray[np.float64]
+    q2 : NDArray[np.float64]
+    mode : str = "+-"
+
+    @property
+    def duration(self) -> float:
+        return float(self.t[-1]) if len(self.t) else 0.0
+
+    def __len__(self) -> int:
+        return len(self.t)
+
+    def joint_velocities(self) -> tuple[NDArray[np.float64], NDArray[np.float64]]:
+        """ (dq1/dt, dq2/dt) in rad/s from finite differences """
+        if len(self.t) < 2:
+            return np.zeros_like(self.q1), np.zeros_like(self.q2)
+        return np.gradient(self.q1, self.t), np.gradient(self.q2, self.t)
+
+    def max_joint_speed_deg(self) -> tuple[float, float]:
+        dq1, dq2 = self.joint_velocities()
+        return to_deg(float(np.abs(dq1).max(initial=0.0))), to_deg(float(np.abs(dq2).max(initial=0.0)))
+
+    def joint_accelerations(self) -> tuple[NDArray[np.float64], NDArray[np.float64]]:
+        """ (d2q1/dt2, d2q2/dt2) in rad/s^2 from finite differences """
+        if len(self.t) < 2:
+            return np.zeros_like(self.q1), np.zeros_like(self.q2)
+        dq1, dq2 = self.joint_velocities()
+        return np.gradient(dq1, self.t), np.gradient(dq2, self.t)
+
+    def max_joint_acc_deg(self) -> tuple[float, float]:
+        ddq1, ddq2 = self.joint_accelerations()
+        return to_deg(float(np.abs(ddq1).max(initial=0.0))), to_deg(float(np.abs(ddq2).max(initial=0.0)))
+
+
+def plan_trajectory(
+    kine: ParaScaraKinematics,
+    path: CartesianPath,
+    profile: MotionProfile,
+    dt: float = 0.02,
+    mode: str = "+-",
+    checker: Optional["ArmWorkspaceChecker"] = None,
+) -> JointTrajectory:
+    """
+    Sample `path` every `dt` seconds of `profile` and solve all waypoints with
+    one batch IK call. Raises ValueError if any waypoint is unreachable or
+    rejected by `checker`.
+    """
+    if dt <= 0:
+        raise ValueError("dt must be positive")
+    if abs(profile.distance - path.length) > 1e-9 * max(1.0, path.length):
+        raise ValueError("profile distance does not match the path length")
+
+    n = max(int(np.ceil(profile.duration / dt)), 1)
+    t = np.minimum(np.arange(n + 1) * dt, profile.duration)
+    s, _ = profile.sample(t)
+    x, y = path.points_at(s)
+
+    states = kine.inverse_kinematics_batch(x, y, mode)[0]
+    valid = states.valid
+    if checker is not None:
+        valid = valid & checker.is_pos_valid_batch(x, y, mode)
+    if not valid.all():
+        idx = int(np.argmin(valid))
+        raise ValueError(f"Waypoint {idx} at ({x[idx]:.2f}, {y[idx]:.2f}) is not in the workspace.")
+
+    return JointTrajectory(
+        t=t,
+        x=x,
+        y=y,
+        q1=np.unwrap(states.lf_base_ang),
+        q2=np.unwrap(states.rt_base_ang),
+        mode=mode,
+    )
+
+
+def time_optimal_trajectory(
+    kine: ParaScaraKinematics,
+    path: CartesianPath,
+    max_deg_per_sec: tuple[float, float],
+    max_acc_deg_per_sec2: tuple[float, float],
+    n_samples: int = 500,
+    mode: str = "+-",
+    max_cart_vel: Optional[float] = None,
+) -> tuple[JointTrajectory, float]:
+    """
+    Fastest rest-to-rest timing of `path` under per-joint speed and
+    acceleration limits (left, right), by the two-pass phase plane method
+    on u = (ds/dt)^2 over `n_samples` path samples.
+
+    Joint path derivatives come from the inverse Jacobian: q' = J^-1 p',
+    q'' by differencing q'. With q_dot = q' s_dot and
+    q_ddot = q' s_ddot + q'' u, the speed limits cap u pointwise and the
+    acceleration limits bound s_ddot = u' / 2 in the forward
+    (accelerating) and backward (braking) passes. The result is checked
+    by differencing the sampled joint motion, samples breaking a limit
+    (curvature or corners between samples) are slowed down and the passes
+    rerun, so the returned trajectory keeps within the limits.
+    Returns the timed joint trajectory and its cycle time in seconds.
+    """
+    if n_samples < 2:
+        raise ValueError("n_samples must be at least 2")
+    if path.length == 0:
+        n_samples = 1
+    s = np.linspace(0.0, path.length, n_samples)
+    x, y = path.points_at(s)
+
+    states = kine.inverse_kinematics_batch(x, y, mode)[0]
+    if not states.valid.all():
+        idx = int(np.argmin(states.valid))
+        raise ValueError(f"Path sample {idx} at ({x[idx]:.2f}, {y[idx]:.2f}) is unreachable.")
+    q1, q2 = np.unwrap(states.lf_base_ang), np.unwrap(states.rt_base_ang)
+    if n_samples == 1:
+        return JointTrajectory(t=np.zeros(1), x=x, y=y, q1=q1, q2=q2, mode=mode), 0.0
+
+    tx, ty = path.tangents_at(s)
+    dq = np.einsum("...ij,...j->...i", kine.inv_jacobian_batch(states), np.stack((tx, ty), axis=-1))  # (n, 2)
+    if not np.isfinite(dq).all():
+        idx = int(np.argmin(np.isfinite(dq).all(axis=-1)))
+        raise ValueError(f"Path passes through a singularity near ({x[idx]:.2f}, {y[idx]:.2f}).")
+    ddq = np.gradient(dq, s, axis=0)
+
+    v_max = np.radians(np.asarray(max_deg_per_sec, dtype=np.float64))
+    a_max = np.radians(np.asarray(max_acc_deg_per_sec2, dtype=np.float64))
+
+    # velocity limit curve: |q'| s_dot <= v_max, and |q''| u <= a_max where q' vanishes
+    abs_dq = np.abs(dq)
+    with np.errstate(divide="ignore"):
+        u_lim = np.min((v_max / abs_dq) ** 2, axis=-1)
+        u_lim = np.minimum(u_lim, np.min(np.where(abs_dq < 1e-9, a_max / np.abs(ddq), np.inf), axis=-1))
+    if max_cart_vel is not None:
+        u_lim = np.minimum(u_lim, max_cart_vel**2)
+
+    # normalize each joint constraint to c * s_ddot + b * u in [-a_max, a_max] with c >= 0
+    sign = np.where(dq < 0, -1.0, 1.0)
+    c, b = dq * sign, ddq * sign
+    active = c > 1e-9
+
+    c_safe = np.where(active, c, 1.0)
+    b_over_c, a_over_c = b / c_safe, a_max / c_safe
+
+    # joint j's lower bound on s_ddot only stays below joint k's upper bound up to some u
+    for j, k in ((0, 1), (1, 0)):
+        coef = np.where(active[:, j] & active[:, k], b_over_c[:, k] - b_over_c[:, j], 0.0)
+        with np.errstate(divide="ignore"):
+            u_lim = np.minimum(u_lim, np.where(coef > 0, (a_over_c[:, j] + a_over_c[:, k]) / coef, np.inf))
+
+    def acc_bounds(i: int, u: float) -> tuple[float, float]:
+        lo, hi = -np.inf, np.inf
+        for j in range(2):
+            if active[i, j]:
+                lo = max(lo, (-a_max[j] - b[i, j] * u) / c[i, j])
+                hi = min(hi, (a_max[j] - b[i, j] * u) / c[i, j])
+        return lo, hi
+
+    ds = s[1] - s[0]
+
+    def integrate(u_lim: NDArray[np.float64]) -> tuple[NDArray[np.float64], NDArray[np.float64]]:
+        u = u_lim.copy()
+        u[0] = 0.0
+        for i in range(n_samples - 1):
+            _, hi = acc_bounds(i, u[i])
+            u[i + 1] = min(u[i + 1], max(u[i] + 2 * max(hi, 0.0) * ds, 0.0))
+        u[-1] = 0.0
+        for i in range(n_samples - 1, 0, -1):
+            lo, _ = acc_bounds(i, u[i])
+            u[i - 1] = min(u[i - 1], max(u[i] - 2 * min(lo, 0.0) * ds, 0.0))
+
+        s_dot = np.sqrt(np.maximum(u, 0.0))
+        seg_vel = s_dot[:-1] + s_dot[1:]
+        if (seg_vel <= 0).any():
+            raise ValueError("Path cannot be traversed within the joint limits.")
+        return u, np.concatenate(([0.0], np.cumsum(2 * ds / seg_vel)))
+
+    # the limits only hold at the samples, where the path curves or has a
+    # corner the sampled joint motion can still exceed them: slow down the
+    # offending samples and integrate again, then stretch time for the rest
+    q = np.stack((q1, q2), axis=-1)
+    for _ in range(TOPP_REFINE_PASSES):
+        u, t = integrate(u_lim)
+        ratio = _joint_limit_ratio(t, q, v_max, a_max)
+        over = ratio > 1 + TOPP_LIMIT_TOL
+        if not over.any():
+            break
+        u_lim = np.where(over, u / ratio**2, u_lim)
+    t *= max(float(_joint_limit_ratio(t, q, v_max, a_max).max()), 1.0)
+
+    return JointTrajectory(t=t, x=x, y=y, q1=q1, q2=q2, mode=mode), float(t[-1])
+
+
+def _joint_limit_ratio(
+    t: NDArray[np.float64], q: NDArray[np.float64], v_max: NDArray[np.float64], a_max: NDArray[np.float64]
+) -> NDArray[np.float64]:
+    """
+    Per sample, the largest |q_dot| / v_max and sqrt(|q_ddot| / a_max) over
+    the joints, from the velocities of the segments next to it and their
+    difference; above 1 the sampled motion breaks a limit, and stretching
+    time by the ratio brings it back within.
+    """
+    dt = np.diff(t)
+    vel = np.diff(q, axis=0) / dt[:, None]
+    acc = np.diff(vel, axis=0) / ((dt[:-1] + dt[1:]) / 2)[:, None]
+    seg_ratio = np.max(np.abs(vel) / v_max, axis=-1)
+    ratio = np.zeros(len(t))
+    ratio[:-1] = seg_ratio
+    ratio[1:] = np.maximum(ratio[1:], seg_ratio)
+    ratio[1:-1] = np.maximum(ratio[1:-1], np.sqrt(np.max(np.abs(acc) / a_max, axis=-1)))
+    return ratio
+
+
+class TrajectoryStreamer:
+    """
+    Feeds a `JointTrajectory` to the arm motors at a fixed rate. On every
+    tick each motor is sent the next waypoint, with its max speed set so it
+    gets there by the following tick.
+    """
+
+    def __init__(self, arm: "Arm", rate_hz: float = 50.0, min_deg_per_sec: float = 1.0):
+        if rate_hz <= 0:
+            raise ValueError("rate_hz must be positive")
+        self.arm = arm
+        self.period = 1.0 / rate_hz
+        self.min_deg_per_sec = min_deg_per_sec
+        self.late_ticks = 0
+        self._stop = Event()
+
+    def stop(self) -> None:
+        """ Abort a running `stream` after its current tick, safe from other threads. """
+        self._stop.set()
+
+    def resample(self, traj: JointTrajectory) -> tuple[NDArray[np.float64], NDArray[np.float64], NDArray[np.float64]]:
+        """ (t, q1, q2) at the streaming rate, joint angles in degrees """
+        n = max(int(np.ceil(traj.duration / self.period)), 1)
+        t = np.minimum(np.arange(n + 1) * self.period, traj.duration)
+        q1 = np.degrees(np.interp(t, traj.t, traj.q1))
+        q2 = np.degrees(np.interp(t, traj.t, traj.q2))
+        return t, q1, q2
+
+    def stream(self, traj: JointTrajectory) -> bool:
+        """
+        Block until the whole trajectory has been sent, or `stop` was called.
+        Returns False if it was stopped early.
+        """
+        self._stop.clear()
+        self.late_ticks = 0
+        t, q1, q2 = self.resample(traj)
+        motors = ((self.arm.lf_motor, q1), (self.arm.rt_motor, q2))
+
+        st = perf_counter()
+        for k in range(1, len(t)):
+            if self._stop.is_set():
+                return False
+            seg_time = max(t[k] - t[k - 1], 1e-3)
+            with self.arm.batch_writes():
+                for motor, q in motors:
+                    spd = clamp(abs(q[k] - q[k - 1]) / seg_time, self.min_deg_per_sec, motor.max_deg_per_sec)
+                    motor.move_to_angle_in_close_dir(q[k] % 360, spd, motor.max_acc_deg_per_sec2)
+
+            wait = st + t[k] - perf_counter()
+            if wait > 0:
+                sleep(wait)
+            else:
+                self.late_ticks += 1
+        return True
@@ -0,0 +1,310 @@
+import hashlib
+import json
+import os
+from math import floor
+from typing import Optional, TYPE_CHECKING
+
+import numpy as np
+from numpy.typing import ArrayLike, NDArray
+
+from src.consts import pqt, ur, vec2f
+from src.kinematics import ParaScaraKinematics, ParaScaraSetup
+
+if TYPE_CHECKING:
+    from src.arm import ArmWorkspaceChecker
+
+
+def _default_cache_dir() -> Optional[str]:
+    """ $SCARA_CACHE_DIR if set (empty disables the disk cache), else ~/.cache/scara_robotic_arm. """
+    path = os.environ.get("SCARA_CACHE_DIR")
+    if path is None:
+        return os.path.join(os.path.expanduser("~"), ".cache", "scara_robotic_arm")
+    return path or None
+
+
+DEF_CACHE_DIR = _default_cache_dir()
+GRID_FORMAT_VERSION = 2
+
+# values of WorkspaceGrid.cells
+CELL_INVALID = 0
+CELL_VALID = 1
+CELL_BOUNDARY = 2
+
+
+def workspace_key(setup: ParaScaraSetup, threshold_ang: pqt, resolution: float, mode: str) -> str:
+    """ Hash of everything a precomputed workspace grid depends on. """
+    kine = ParaScaraKinematics(setup)
+    desc = {
+        "version": GRID_FORMAT_VERSION,
+        "setup": [kine.l1, kine.l2, kine.l1p, kine.l2p, kine.d],
+        "threshold_rad": threshold_ang.to(ur.rad).m,
+        "resolution": resolution,
+        "mode": mode,
+    }
+    return hashlib.sha1(json.dumps(desc, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def reach_bounds(kine: ParaScaraKinematics, margin: float = 0.0) -> tuple[float, float, float, float]:
+    """ Bounding box (x_min, x_max, y_min, y_max) of the points both arms can reach. """
+    lf_reach = kine.l1 + kine.l2
+    rt_reach = kine.l1p + kine.l2p
+    x_min = max(-lf_reach, kine.d - rt_reach) - margin
+    x_max = min(lf_reach, kine.d + rt_reach) + margin
+    y_reach = min(lf_reach, rt_reach) + margin
+    return x_min, x_max, -y_reach, y_reach
+
+
+class WorkspaceGrid:
+    """
+    Occupancy grid of valid end effector positions for one IK mode.
+
+    Cell (i, j) covers y in [y_min + i * res, y_min + (i + 1) * res) and the
+    analogous x range; its validity is evaluated at the cell center. Cells
+    whose 3x3 neighbourhood mixes valid and invalid centers are flagged as
+    boundary cells, where lookups should fall back to an exact check.
+
+    For projection, every cell also stores the flat index of the nearest
+    valid cell center (itself when valid), so snapping an invalid target
+    back into the workspace is a single lookup.
+    Lengths are plain floats in DEF_LEN_UNIT.
+    """
+
+    def __init__(
+        self,
+        occupancy: NDArray[np.bool_],
+        x_min: float,
+        y_min: float,
+        resolution: float,
+        mode: str = "+-",
+        nearest_valid: Optional[NDArray[np.int32]] = None,
+    ):
+        self.occupancy = occupancy
+        self.x_min = x_min
+        self.y_min = y_min
+        self.resolution = resolution
+        self.mode = mode
+        self.boundary = self._find_boundary(occupancy)
+        # valid cells with at least one invalid neighbour, the discrete workspace border
+        self.inner_boundary = self.boundary & occupancy
+
+        cells = np.where(self.boundary, CELL_BOUNDARY, occupancy.astype(np.uint8))
+        self.cells: NDArray[np.uint8] = cells.astype(np.uint8)
+        # nested lists make single-cell lookups cheaper than numpy scalar indexing
+        self._cell_rows: list[list[int]] = self.cells.tolist()
+
+        if nearest_valid is None:
+            nearest_valid = self._find_nearest_valid(occupancy)
+        self.nearest_valid = nearest_valid
+        self._nearest_rows: list[list[int]] = nearest_valid.tolist()
+        self._border_points = self.boundary_points()
+
+    @classmethod
+    def build(
+        cls,
+        checker: "ArmWorkspaceChecker",
+        resolution: float = 1.0,
+        mode: str = "+-",
+    ) -> "WorkspaceGrid":
+        """ Evaluate `checker` on every cell center with the batch kinematics. """
+        if resolution <= 0:
+            raise ValueError("resolution must be positive")
+        kine = ParaScaraKinematics(checker.setup)
+        x_min, x_max, y_min, y_max = reach_bounds(kine, margin=resolution)
+        n_x = int(np.ceil((x_max - x_min) / resolution))
+        n_y = int(np.ceil((y_max - y_min) / resolution))
+        xs = x_min + (np.arange(n_x) + 0.5) * resolution
+        ys = y_min + (np.arange(n_y) + 0.5) * resolution
+        grid_x, grid_y = np.meshgrid(xs, ys)
+        occupancy = checker.is_pos_valid_batch(grid_x, grid_y, mode)
+        return cls(occupancy, x_min, y_min, resolution, mode)
+
+    @classmethod
+    def load_or_build(
+        cls,
+        checker: "ArmWorkspaceChecker",
+        key: str,
+        resolution: float = 1.0,
+        mode: str = "+-",
+        cache_dir: Optional[str] = DEF_CACHE_DIR,
+    ) -> "WorkspaceGrid":
+        """
+        Load the grid stored under `key` in `cache_dir`, or build and store it.
+        Pass cache_dir=None to always build in memory.
+        """
+        if cache_dir is None:
+            return cls.build(checker, resolution, mode)
+
+        path = os.path.join(cache_dir, f"workspace_{key}.npz")
+        if os.path.exists(path):
+            try:
+                return cls.load(path)
+            except (OSError, KeyError, ValueError) as e:
+                print(f"WARNING: failed to load workspace grid from {path}, rebuilding: {e}")
+
+        grid = cls.build(checker, resolution, mode)
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            grid.save(path)
+        except OSError as e:
+            print(f"WARNING: failed to save workspace grid to {path}: {e}")
+        return grid
+
+    def save(self, path: str) -> None:
+        # write then rename so a crash never leaves a truncated cache file behind
+        tmp_path = f"{path}.tmp.npz"
+        np.savez_compressed(
+            tmp_path,
+            occupancy=self.occupancy,
+            origin=np.array([self.x_min, self.y_min]),
+            resolution=np.array(self.resolution),
+            mode=np.array(self.mode),
+            nearest_valid=self.nearest_valid,
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "WorkspaceGrid":
+        with np.load(path) as data:
+            x_min, y_min = (float(v) for v in data["origin"])
+            return cls(
+                data["occupancy"].astype(np.bool_),
+                x_min,
+                y_min,
+                float(data["resolution"]),
+                str(data["mode"]),
+                data["nearest_valid"].astype(np.int32),
+            )
+
+    @staticmethod
+    def _find_boundary(occupancy: NDArray[np.bool_]) -> NDArray[np.bool_]:
+        padded = np.pad(occupancy, 1, constant_values=False)
+        n_y, n_x = occupancy.shape
+        any_valid = np.zeros_like(occupancy)
+        all_valid = np.ones_like(occupancy)
+        for di in range(3):
+            for dj in range(3):
+                window = padded[di:di + n_y, dj:dj + n_x]
+                any_valid |= window
+                all_valid &= window
+        return any_valid & ~all_valid
+
+    @staticmethod
+    def _find_nearest_valid(occupancy: NDArray[np.bool_], row_block: int = 16) -> NDArray[np.int32]:
+        """
+        Flat index of the nearest valid cell for every cell, -1 if there is none.
+        Exact Euclidean nearest neighbour, computed separably: first the
+        nearest valid column within every row, then for every cell the best
+        row, in O(cells * rows) time and O(cells) memory.
+        """
+        n_y, n_x = occupancy.shape
+        if not occupancy.any():
+            return np.full((n_y, n_x), -1, dtype=np.int32)
+        cols = np.arange(n_x)
+        left = np.maximum.accumulate(np.where(occupancy, cols, -1), axis=1)
+        right = np.minimum.accumulate(np.where(occupancy, cols, n_x)[:, ::-1], axis=1)[:, ::-1]
+        left_dist = np.where(left >= 0, cols - left, np.inf)
+        right_dist = np.where(right < n_x, right - cols, np.inf)
+        use_left = left_dist <= right_dist
+        row_col = np.where(use_left, left, right)
+        row_dist_sq = np.minimum(left_dist, right_dist) ** 2
+
+        rows = np.arange(n_y, dtype=np.float64)
+        nearest = np.empty((n_y, n_x), dtype=np.int32)
+        for st in range(0, n_y, row_block):
+            target_rows = rows[st:st + row_block]
+            # (block, source row, col): squared distance via the source row's nearest valid column
+            dist_sq = (target_rows[:, None, None] - rows[None, :, None]) ** 2 + row_dist_sq[None, :, :]
+            best_row = np.argmin(dist_sq, axis=1)
+            nearest[st:st + row_block] = best_row * n_x + row_col[best_row, cols]
+        return nearest
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return self.occupancy.shape  # type: ignore
+
+    @property
+    def extent(self) -> tuple[float, float, float, float]:
+        """ (x_min, x_max, y_min, y_max), e.g. for matplotlib's imshow(origin="lower") """
+        n_y, n_x = self.shape
+        return (
+            self.x_min,
+            self.x_min + n_x * self.resolution,
+            self.y_min,
+            self.y_min + n_y * self.resolution,
+        )
+
+    def cell_index(self, x: float, y: float) -> Optional[tuple[int, int]]:
+        """ (row, col) of the cell containing (x, y), or None outside the grid. """
+        i = floor((y - self.y_min) / self.resolution)
+        j = floor((x - self.x_min) / self.resolution)
+        n_y, n_x = self.shape
+        if 0 <= i < n_y and 0 <= j < n_x:
+            return i, j
+        return None
+
+    def cell_center(self, i: int, j: int) -> vec2f:
+        return (
+            self.x_min + (j + 0.5) * self.resolution,
+            self.y_min + (i + 0.5) * self.resolution,
+        )
+
+    def lookup(self, x: float, y: float) -> int:
+        """ CELL_INVALID, CELL_VALID or CELL_BOUNDARY for the cell containing (x, y). """
+        idx = self.cell_index(x, y)
+        if idx is None:
+            return CELL_INVALID
+        return self._cell_rows[idx[0]][idx[1]]
+
+    def lookup_batch(self, x: ArrayLike, y: ArrayLike) -> NDArray[np.uint8]:
+        x_arr, y_arr = np.broadcast_arrays(np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64))
+        n_y, n_x = self.shape
+        with np.errstate(invalid="ignore"):
+            i = np.floor((y_arr - self.y_min) / self.resolution)
+            j = np.floor((x_arr - self.x_min) / self.resolution)
+        inside = (i >= 0) & (i < n_y) & (j >= 0) & (j < n_x)
+        i = np.where(inside, i, 0).astype(np.intp)
+        j = np.where(inside, j, 0).astype(np.intp)
+        return np.where(inside, self.cells[i, j], CELL_INVALID).astype(np.uint8)
+
+    def nearest_valid_point(self, x: float, y: float) -> Optional[vec2f]:
+        """
+        Center of the valid cell nearest to the cell containing (x, y), or
+        None if nothing is valid. Points outside the grid, which are out of
+        reach anyway, search the border cells directly.
+        """
+        idx = self.cell_index(x, y)
+        if idx is None:
+            if len(self._border_points) == 0:
+                return None
+            dist_sq = (self._border_points[:, 0] - x) ** 2 + (self._border_points[:, 1] - y) ** 2
+            px, py = self._border_points[int(np.argmin(dist_sq))]
+            return (float(px), float(py))
+        flat = self._nearest_rows[idx[0]][idx[1]]
+        if flat < 0:
+            return None
+        return self.cell_center(*divmod(flat, self.shape[1]))
+
+    @property
+    def distance_field(self) -> NDArray[np.float64]:
+        """ Distance from every cell center to the nearest valid cell center, 0 inside. """
+        n_y, n_x = self.shape
+        nearest_i, nearest_j = np.divmod(self.nearest_valid, n_x)
+        i, j = np.indices(self.shape)
+        dist = np.hypot(nearest_i - i, nearest_j - j) * self.resolution
+        return np.where(self.nearest_valid >= 0, dist, np.inf)
+
+    def boundary_points(self) -> NDArray[np.float64]:
+        """ (N, 2) centers of the valid cells on the workspace border, for plotting. """
+        i, j = np.nonzero(self.inner_boundary)
+        return np.stack(
+            (self.x_min + (j + 0.5) * self.resolution, self.y_min + (i + 0.5) * self.resolution),
+            axis=-1,
+        )
+
+    def valid_points(self) -> NDArray[np.float64]:
+        """ (N, 2) cell centers of all valid cells, for plotting. """
+        i, j = np.nonzero(self.occupancy)
+        return np.stack(
+            (self.x_min + (j + 0.5) * self.resolution, self.y_min + (i + 0.5) * self.resolution),
+            axis=-1,
+        )
@@ -0,0 +1,121 @@
+from typing import Optional
+
+import pytest
+from smbus2 import i2c_msg
+from ticlib.ticlib import COMMANDS, GET_VARIABLE_CMD, VARIABLES, TicBase
+
+import src.i2c_bus
+
+from src.consts import ur
+from src.kinematics import ParaScaraSetup
+
+# Scripts in this directory that drive real hardware, open windows or are
+# run by hand; pytest only collects the unit tests next to them.
+collect_ignore = [
+    "test_arm.py",
+    "test_arm_resetter.py",
+    "test_control_loop_benchmark.py",
+    "test_dataclasses_json.py",
+    "test_dc_motor.py",
+    "test_kinematics_benchmark.py",
+    "test_motor_controller.py",
+    "test_move_arm_by_gamepad.py",
+    "test_move_arm_horizontal.py",
+    "test_pwm_dc_motor.py",
+    "test_servo.py",
+    "test_simulation.py",
+    "test_stepper_motor.py",
+    "test_webcam.py",
+]
+
+
+@pytest.fixture(scope="session")
+def setup() -> ParaScaraSetup:
+    """ The 85/85/85/85/55 mm arm built in src/robot.py. """
+    return ParaScaraSetup(
+        lf_base_len=85 * ur.mm,
+        rt_base_len=85 * ur.mm,
+        lf_link_len=85 * ur.mm,
+        rt_link_len=85 * ur.mm,
+        axis_dist=55 * ur.mm,
+    )
+
+
+class FakeSMBus:
+    """ Records the messages sent to it; reads return `reply`, zero padded. """
+
+    def __init__(self, bus_num: int):
+        self.bus_num = bus_num
+        self.log: list[tuple[str, int, bytes]] = []
+        self.calls = 0
+        self.reply = b""
+        self.fail = False
+
+    def i2c_rdwr(self, *msgs: i2c_msg) -> None:
+        if self.fail:
+            raise OSError("remote I/O error")
+        self.calls += 1
+        for msg in msgs:
+            if msg.flags & 1:  # I2C_M_RD
+                data = self.reply[:msg.len].ljust(msg.len, b"\0")
+                for k, b in enumerate(data):
+                    msg.buf[k] = b
+                self.log.append(("r", msg.addr, data))
+            else:
+                self.log.append(("w", msg.addr, bytes(msg)))
+
+    def close(self) -> None:
+        pass
+
+
+@pytest.fixture
+def fake_smbus(monkeypatch):
+    """ `I2CBus` opened in the test talks to a `FakeSMBus`, reachable as `bus.smbus`. """
+    monkeypatch.setattr(src.i2c_bus, "SMBus", FakeSMBus)
+    return FakeSMBus
+
+
+_SETTER_VARIABLES = {code: name[len("set_"):] for name, code, _ in COMMANDS if name.startswith("set_")}
+HALT_AND_SET_POSITION = 0xEC
+
+
+class FakeTic(TicBase):
+    """
+    Tic whose variables sit in `values` and never change on their own:
+    setters store their value, everything else (e.g. current_position)
+    is set by the test. Commands and block reads are counted.
+    """
+
+    def __init__(self):
+        self.values = {name: 0 for name, _, _, _ in VARIABLES}
+        self.commands: list[tuple[int, Optional[int]]] = []
+        self.reads = 0
+        super().__init__()
+
+    @property
+    def transactions(self) -> int:
+        return len(self.commands) + self.reads
+
+    def _send_command(self, command_code, format, value=None):
+        self.commands.append((command_code, value))
+        if command_code == HALT_AND_SET_POSITION:
+            self.values["current_position"] = self.values["target_position"] = value
+        elif command_code in _SETTER_VARIABLES and _SETTER_VARIABLES[command_code] in self.values:
+            self.values[_SETTER_VARIABLES[command_code]] = value
+
+    def _block_read(self, command_code, offset, length, format_response=None):
+        self.reads += 1
+        image = bytearray(0x100)
+        if command_code == GET_VARIABLE_CMD:
+            for name, var_offset, size, _ in VARIABLES:
+                image[var_offset:var_offset + size] = self.values[name].to_bytes(size, "little", signed=self.values[name] < 0)
+        result = bytes(image[offset:offset + length])
+        if format_response is None:
+            return result
+        return format_response(result)
+
+
+@pytest.fixture
+def fake_tic():
+    """ The `FakeTic` class, to build as many as a test needs. """
+    return FakeTic
@@ -0,0 +1,50 @@
+import pytest
+
+from src.arm import Arm, CombinedChecker, GridChecker, LinkAngleChecker, NoChecker
+from src.motor_controller import TicMotorController
+
+VALID = (10.0, 100.0)
+# reachable, but the links fold too far for the angle threshold
+INVALID = (20.0, 60.0)
+UNREACHABLE = (500.0, 500.0)
+
+
+@pytest.fixture(scope="module")
+def link_checker(setup):
+    return LinkAngleChecker(setup)
+
+
+@pytest.fixture(scope="module")
+def grid_checker(setup):
+    return GridChecker(setup, resolution=2.0, cache_dir=None)
+
+
+def test_link_checker_projects_valid_positions_only(link_checker):
+    assert link_checker.is_pos_valid_f(*VALID)
+    assert link_checker.project_pos_f(*VALID) == VALID
+    assert link_checker.project_pos_f(*INVALID) is None
+    assert link_checker.project_pos_f(*UNREACHABLE) is None
+
+
+@pytest.mark.parametrize("pos", [INVALID, UNREACHABLE])
+def test_grid_checker_projects_into_workspace(grid_checker, link_checker, pos):
+    x, y = grid_checker.project_pos_f(*pos)
+    assert link_checker.is_pos_valid_f(x, y)
+
+
+def test_combined_checker_with_link_checker_first(link_checker, grid_checker):
+    combined = CombinedChecker(link_checker, grid_checker)
+    assert combined.project_pos_f(*VALID) == VALID
+    for pos in (INVALID, UNREACHABLE):
+        projected = combined.project_pos_f(*pos)
+        assert projected is not None and combined.is_pos_valid_f(*projected)
+
+
+def test_no_checker_projects_anything(setup):
+    assert NoChecker(setup).project_pos_f(*UNREACHABLE) == UNREACHABLE
+
+
+def test_arm_project_pos_with_link_checker(setup, link_checker, fake_tic):
+    arm = Arm(setup, TicMotorController(fake_tic(), False), TicMotorController(fake_tic(), False), link_checker)
+    assert arm.project_pos_f(*VALID) == VALID
+    assert arm.project_pos_f(*UNREACHABLE) is None
@@ -0,0 +1,80 @@
+import pytest
+
+from src.arm import Arm, LinkAngleChecker
+from src.motor_controller import TicMotorController
+from src.utils import to_deg
+
+START_DEG = (120.0, 60.0)
+# mostly one joint moves, so the other one gets scaled limits
+COORD_TARGET = (10.0, 100.0)
+PLAIN_TARGET = (12.0, 101.0)
+FOLDED_TARGET = (20.0, 60.0)
+
+
+@pytest.fixture
+def arm(setup, fake_tic):
+    arm = Arm(
+        setup,
+        TicMotorController(fake_tic(), False),
+        TicMotorController(fake_tic(), False),
+        LinkAngleChecker(setup),
+    )
+    arm.reset_deg(*START_DEG)
+    return arm
+
+
+def limits(arm):
+    return [(motor.tic.values["max_speed"], motor.tic.values["max_acceleration"]) for motor in (arm.lf_motor, arm.rt_motor)]
+
+
+def test_coordinated_move_scales_one_joint(arm):
+    configured = limits(arm)
+    arm.move_to_pos_coordinated_f(*COORD_TARGET)
+    scaled = limits(arm)
+    assert scaled != configured
+    assert all(spd <= c_spd and acc <= c_acc for (spd, acc), (c_spd, c_acc) in zip(scaled, configured))
+
+
+@pytest.mark.parametrize("move", ["move_to_pos_f", "move_to_pos_closest_f"])
+def test_plain_moves_restore_configured_limits(arm, move):
+    configured = limits(arm)
+    arm.move_to_pos_coordinated_f(*COORD_TARGET)
+    getattr(arm, move)(*PLAIN_TARGET)
+    assert limits(arm) == configured
+
+
+def test_plain_move_speed_argument_still_applies(arm):
+    configured = limits(arm)
+    arm.move_to_pos_coordinated_f(*COORD_TARGET)
+    arm.move_to_pos_f(*PLAIN_TARGET, deg_per_sec=30)
+    for (spd, _), motor in zip(limits(arm), (arm.lf_motor, arm.rt_motor)):
+        assert spd == round(30 / motor.deg_per_micro_step * 100_00)
+    assert [acc for _, acc in limits(arm)] == [acc for _, acc in configured]
+
+
+@pytest.mark.parametrize("move", ["move_to_pos_f", "move_to_pos_coordinated_f"])
+def test_one_position_read_per_motor(arm, move):
+    getattr(arm, move)(*COORD_TARGET)
+    reads = [motor.tic.reads for motor in (arm.lf_motor, arm.rt_motor)]
+    getattr(arm, move)(*PLAIN_TARGET)
+    assert [motor.tic.reads - n for motor, n in zip((arm.lf_motor, arm.rt_motor), reads)] == [1, 1]
+
+
+@pytest.mark.parametrize("mode", ["+-", "++"])
+def test_closest_move_keeps_the_current_posture(arm, mode):
+    state = arm.kine_solver.inverse_kinematics_f(*PLAIN_TARGET, mode)[0]
+    assert arm.workspace_checker.is_state_valid_f(state)
+    arm.reset_deg(to_deg(state.lf_base_ang) + 3, to_deg(state.rt_base_ang) - 3)
+
+    solution = arm.move_to_pos_closest_f(*PLAIN_TARGET)
+    assert solution.mode == mode
+    for motor, ang in ((arm.lf_motor, state.lf_base_ang), (arm.rt_motor, state.rt_base_ang)):
+        assert motor.step_to_deg(motor.get_target_position()) == pytest.approx(to_deg(ang) % 360, abs=motor.deg_per_micro_step)
+
+
+def test_closest_move_skips_states_the_checker_rejects(arm):
+    # the links fold too far in "+-" here, although the arm already is in that posture
+    state = arm.kine_solver.inverse_kinematics_f(*FOLDED_TARGET, "+-")[0]
+    assert not arm.workspace_checker.is_state_valid_f(state)
+    arm.reset_deg(to_deg(state.lf_base_ang), to_deg(state.rt_base_ang))
+    assert arm.move_to_pos_closest_f(*FOLDED_TARGET).mode != "+-"
@@ -0,0 +1,127 @@
+import asyncio
+import time
+
+import pytest
+
+from src.arm import Arm, NoChecker
+from src.motor_controller import POLL_ETA_FRACTION, POLL_MAX_SEC, POLL_MIN_SEC, TicMotorController
+
+
+class FakeClock:
+    """ time.monotonic that only advances when slept on; the sleeps are recorded. """
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps: list[float] = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, sec: float) -> None:
+        self.sleeps.append(sec)
+        self.now += sec
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(time, "monotonic", clock)
+    monkeypatch.setattr(time, "sleep", clock.sleep)
+    return clock
+
+
+@pytest.fixture
+def ramp_tic(fake_tic):
+    class RampTic(fake_tic):
+        """ Runs to its target at a constant `speed` in microsteps per second of `clock`. """
+
+        def __init__(self, clock, speed):
+            super().__init__()
+            self.clock = clock
+            self.speed = speed
+            self.pos = 0.0
+            self.last = clock()
+            # target position planning mode
+            self.values["planning_mode"] = 1
+
+        def _block_read(self, command_code, offset, length, format_response=None):
+            now = self.clock()
+            remaining = self.values["target_position"] - self.pos
+            step = min(abs(remaining), self.speed * (now - self.last))
+            self.pos += step if remaining > 0 else -step
+            self.last = now
+            self.values["current_position"] = round(self.pos)
+            moving = self.values["current_position"] != self.values["target_position"] and self.speed > 0
+            self.values["current_velocity"] = round(self.speed * 100_00) if moving else 0
+            return super()._block_read(command_code, offset, length, format_response)
+
+    return RampTic
+
+
+def motor_with(tic, target):
+    motor = TicMotorController(tic, False)
+    tic.values["target_position"] = target
+    return motor
+
+
+def test_polls_sparse_while_far_dense_near_arrival(clock, ramp_tic):
+    motor = motor_with(ramp_tic(clock, 1000), 2000)
+    st = clock.now
+    motor.block_until_reach()
+    arrival = st + 2.0
+    assert motor.tic.values["current_position"] == 2000
+    assert all(POLL_MIN_SEC <= sec <= POLL_MAX_SEC for sec in clock.sleeps)
+    assert clock.sleeps[0] == POLL_MAX_SEC
+    assert clock.sleeps[-1] < POLL_MAX_SEC
+    # never sleeps past the arrival by more than the shortest poll
+    assert arrival <= clock.now <= arrival + POLL_MIN_SEC + 1e-9
+    assert len(clock.sleeps) < 2.0 / POLL_MAX_SEC + 15
+
+
+def test_poll_at_rest_assumes_configured_speed(clock, ramp_tic):
+    motor = motor_with(ramp_tic(clock, 0), 40)
+    polls = motor._reach_poll_intervals()
+    eta = 40 * motor.deg_per_micro_step / motor.max_deg_per_sec
+    assert next(polls) == pytest.approx(eta * POLL_ETA_FRACTION)
+
+
+def test_no_poll_when_already_there(clock, ramp_tic):
+    motor = motor_with(ramp_tic(clock, 1000), 0)
+    motor.block_until_reach(timeout=0.0)
+    assert clock.sleeps == []
+
+
+def test_timeout(clock, ramp_tic):
+    motor = motor_with(ramp_tic(clock, 0), 40)
+    st = clock.now
+    with pytest.raises(TimeoutError):
+        motor.block_until_reach(timeout=0.35)
+    # the last sleep is cut short at the deadline
+    assert clock.now - st == pytest.approx(0.35)
+
+
+def test_arm_timeout_covers_both_motors(setup, clock, ramp_tic):
+    lf_motor = motor_with(ramp_tic(clock, 1000), 300)
+    rt_motor = motor_with(ramp_tic(clock, 0), 40)
+    arm = Arm(setup, lf_motor, rt_motor, NoChecker(setup))
+    st = clock.now
+    with pytest.raises(TimeoutError):
+        arm.block_until_reach(timeout=0.5)
+    assert lf_motor.tic.values["current_position"] == 300
+    assert clock.now - st == pytest.approx(0.5)
+
+
+def test_async_wait(ramp_tic):
+    motor = motor_with(ramp_tic(time.monotonic, 2000), 200)
+    st = time.monotonic()
+    asyncio.run(motor.block_until_reach_async(timeout=2.0))
+    assert motor.tic.values["current_position"] == 200
+    assert time.monotonic() - st >= 0.1
+
+
+def test_async_timeout(ramp_tic):
+    motor = motor_with(ramp_tic(time.monotonic, 0), 40)
+    st = time.monotonic()
+    with pytest.raises(TimeoutError):
+        asyncio.run(motor.block_until_reach_async(timeout=0.05))
+    assert time.monotonic() - st < 1.0
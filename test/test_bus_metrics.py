@@ -0,0 +1,80 @@
+import struct
+
+import pytest
+from ticlib.ticlib import GET_VARIABLE_CMD
+
+from src.bus_metrics import HIST_BUCKETS, BusMetrics, CommandMetrics, block_read_name, command_name
+from src.i2c_bus import BusTicI2C, I2CBus
+
+ADDRESS = 0x0E
+DEVICE = "i2c-1/0x0e"
+
+
+@pytest.fixture
+def tic(fake_smbus):
+    tic = BusTicI2C(I2CBus(1), ADDRESS)
+    tic.metrics = BusMetrics()
+    return tic
+
+
+def test_names():
+    assert command_name(0xE0) == "set_target_position"
+    assert block_read_name(GET_VARIABLE_CMD, 0x22, 4) == "get_current_position"
+    assert block_read_name(GET_VARIABLE_CMD, 0x00, 14) == "get_variables_0x00+14"
+
+
+def test_block_read_is_recorded_once(tic):
+    tic.bus.smbus.reply = struct.pack("<i", -1234)
+    assert tic.get_current_position() == -1234
+
+    metrics = tic.metrics.snapshot()
+    assert list(metrics) == [DEVICE]
+    # the request half of the read isn't a command of its own
+    assert list(metrics[DEVICE]) == ["get_current_position"]
+    read = metrics[DEVICE]["get_current_position"]
+    assert read["count"] == 1
+    assert (read["bytes_out"], read["bytes_in"]) == (3, 4)
+    assert tic.bus.smbus.log == [("w", ADDRESS, bytes([GET_VARIABLE_CMD, 0x22, 4])), ("r", ADDRESS, struct.pack("<i", -1234))]
+
+
+def test_commands_are_recorded(tic):
+    tic.set_target_position(100)
+    tic.set_target_position(200)
+    tic.energize()
+    metrics = tic.metrics.snapshot()[DEVICE]
+    assert metrics["set_target_position"]["count"] == 2
+    assert metrics["set_target_position"]["bytes_out"] == 10
+    assert metrics["energize"]["count"] == 1
+    assert metrics["energize"]["bytes_out"] == 1
+
+
+def test_failed_calls_count_as_errors(tic):
+    tic.bus.smbus.fail = True
+    with pytest.raises(OSError):
+        tic.get_current_position()
+    read = tic.metrics.snapshot()[DEVICE]["get_current_position"]
+    assert (read["count"], read["errors"]) == (0, 1)
+
+
+def test_snapshot_and_reset(tic):
+    tic.energize()
+    first = tic.metrics.snapshot(reset=True)
+    assert first[DEVICE]["energize"]["count"] == 1
+    assert tic.metrics.snapshot() == {}
+    tic.energize()
+    assert tic.metrics.snapshot()[DEVICE]["energize"]["count"] == 1
+
+
+def test_histogram_and_percentiles():
+    metrics = CommandMetrics()
+    for us in (1, 3, 3, 3, 100):
+        metrics.record(us * 1000, 1, 0)
+    assert metrics.count == 5
+    assert metrics.max_ns == 100_000
+    assert metrics.percentile_us(0.5) == 4.0
+    assert metrics.percentile_us(1.0) == 128.0
+    assert metrics.to_dict()["histogram_us"] == {"2": 1, "4": 3, "128": 1}
+
+    metrics.record(10**12, 1, 0)
+    assert metrics.histogram[HIST_BUCKETS - 1] == 1
+    assert metrics.to_dict()["histogram_us"]["inf"] == 1
@@ -0,0 +1,93 @@
+"""
+Throughput of the arm control loop against simulated Tics, with a bus cost
+per transaction and per byte (defaults approximate 100 kHz I2C). Prints one
+JSON document like test_kinematics_benchmark.py:
+
+    python test/test_control_loop_benchmark.py --latency-us 100 --out loop.json
+"""
+import sys
+import os
+import argparse
+import json
+import platform
+import time
+from typing import Callable
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src.arm import Arm, LinkAngleChecker
+from src.motor_controller import TicMotorController, StepMode
+from src.tic_sim import SimulatedTic
+from test_kinematics_benchmark import bench, setup
+
+# calls made after timing to count bus transactions per call
+TRANSACTION_COUNT_CALLS = 20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--out", help="also write the JSON results to this file")
+    parser.add_argument("--min-time", type=float, default=0.5, help="seconds spent per benchmark")
+    parser.add_argument("--latency-us", type=float, default=100, help="fixed cost of every bus transfer")
+    parser.add_argument("--us-per-byte", type=float, default=90, help="cost of every byte on the wire")
+    args = parser.parse_args()
+
+    tics = [SimulatedTic(args.latency_us * 1e-6, args.us_per_byte * 1e-6) for _ in range(2)]
+    lf_motor, rt_motor = (TicMotorController(tic, True, StepMode._4) for tic in tics)
+    arm = Arm(setup, lf_motor, rt_motor, workspace_checker=LinkAngleChecker(setup))
+    arm.reset_deg(120, 60)
+
+    targets = [(10.0, 100.0), (12.0, 101.0)]
+    tick = 0
+
+    def move_coordinated() -> None:
+        nonlocal tick
+        tick += 1
+        arm.move_to_pos_coordinated_f(*targets[tick % 2])
+
+    def teleop_tick() -> None:
+        move_coordinated()
+        arm.get_estimated_state_f()
+
+    def teleop_tick_held() -> None:
+        # stick held still: same target every tick
+        arm.move_to_pos_coordinated_f(*targets[0])
+        arm.get_estimated_state_f()
+
+    cases: dict[str, tuple[Callable[[], object], int]] = {
+        "motor.is_moving": (lf_motor.is_moving, 1),
+        "motor.get_status": (lf_motor.get_status, 1),
+        "motor.get_current_deg": (lf_motor.get_current_deg, 1),
+        "arm.is_moving": (arm.is_moving, 1),
+        "arm.get_current_state_f": (arm.get_current_state_f, 1),
+        "arm.get_estimated_state_f": (arm.get_estimated_state_f, 1),
+        "arm.move_to_pos_coordinated_f": (move_coordinated, 1),
+        "teleop_tick": (teleop_tick, 1),
+        "teleop_tick_held": (teleop_tick_held, 1),
+    }
+
+    results = {}
+    for name, (fn, items) in cases.items():
+        results[name] = bench(fn, items, min_time=args.min_time)
+        before = sum(tic.transactions for tic in tics)
+        for _ in range(TRANSACTION_COUNT_CALLS):
+            fn()
+        results[name]["transactions_per_call"] = (sum(tic.transactions for tic in tics) - before) / TRANSACTION_COUNT_CALLS
+        print(f"{name:40s} {results[name]['us_per_call']:12.3f} us/call", file=sys.stderr)
+
+    report = {
+        "latency_us": args.latency_us,
+        "us_per_byte": args.us_per_byte,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "timestamp": time.time(),
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
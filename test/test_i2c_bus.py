@@ -0,0 +1,160 @@
+import threading
+
+from ticlib.ticlib import GET_VARIABLE_CMD
+
+import pytest
+
+from src.i2c_bus import BatchFlushError, BusTicI2C, I2CBus, get_i2c_bus
+from src.motor_controller import I2CticMotorController
+
+LF, RT = 0x0E, 0x0F
+SET_TARGET_POSITION, SET_MAX_SPEED, SET_MAX_ACCELERATION = 0xE0, 0xE6, 0xEA
+
+
+def commands(log):
+    return [(addr, data[0]) for kind, addr, data in log if kind == "w"]
+
+
+def test_writes_outside_a_batch_go_out_immediately(fake_smbus):
+    bus = I2CBus(1)
+    tic = BusTicI2C(bus, LF)
+    tic.set_target_position(10)
+    assert commands(bus.smbus.log) == [(LF, SET_TARGET_POSITION)]
+    assert bus.stats.transactions == 1
+    assert bus.stats.batches == 0
+
+
+def test_batch_sends_round_robin_on_exit(fake_smbus):
+    bus = I2CBus(1)
+    lf, rt = BusTicI2C(bus, LF), BusTicI2C(bus, RT)
+    with bus.batch():
+        for tic, target in ((lf, 10), (rt, 20)):
+            tic.set_max_speed(1000)
+            tic.set_target_position(target)
+        assert bus.smbus.log == []
+        assert bus.pending(LF) == bus.pending(RT) == 2
+    # the targets of both devices end up adjacent
+    assert commands(bus.smbus.log) == [
+        (LF, SET_MAX_SPEED),
+        (RT, SET_MAX_SPEED),
+        (LF, SET_TARGET_POSITION),
+        (RT, SET_TARGET_POSITION),
+    ]
+    assert bus.stats.batches == 1
+    assert bus.stats.batched_writes == 4
+    assert bus.pending(LF) == 0
+
+
+def test_unequal_queues_end_together(fake_smbus):
+    bus = I2CBus(1)
+    lf, rt = BusTicI2C(bus, LF), BusTicI2C(bus, RT)
+    with bus.batch():
+        # e.g. lf's limits were unchanged and skipped by the write cache
+        lf.set_target_position(10)
+        rt.set_max_speed(1000)
+        rt.set_max_acceleration(1000)
+        rt.set_target_position(20)
+    assert commands(bus.smbus.log) == [
+        (RT, SET_MAX_SPEED),
+        (RT, SET_MAX_ACCELERATION),
+        (LF, SET_TARGET_POSITION),
+        (RT, SET_TARGET_POSITION),
+    ]
+
+
+def test_failed_flush_reports_unsent_writes(fake_smbus):
+    bus = I2CBus(1)
+    lf, rt = BusTicI2C(bus, LF), BusTicI2C(bus, RT)
+    with pytest.raises(BatchFlushError) as e:
+        with bus.batch():
+            lf.set_target_position(10)
+            rt.set_target_position(20)
+            bus.smbus.fail = True
+    assert {address: [data[0] for data in writes] for address, writes in e.value.unsent.items()} == {
+        LF: [SET_TARGET_POSITION],
+        RT: [SET_TARGET_POSITION],
+    }
+    assert bus.pending(LF) == bus.pending(RT) == 0
+
+
+def test_batch_body_does_not_hold_the_bus(fake_smbus):
+    bus = I2CBus(1)
+    lf, rt = BusTicI2C(bus, LF), BusTicI2C(bus, RT)
+    other_thread_done = threading.Event()
+
+    def read_rt():
+        rt.get_current_position()
+        other_thread_done.set()
+
+    with bus.batch():
+        lf.set_target_position(10)
+        reader = threading.Thread(target=read_rt)
+        reader.start()
+        assert other_thread_done.wait(1)
+        # the other thread neither waited for nor sent this batch
+        assert commands(bus.smbus.log) == [(RT, GET_VARIABLE_CMD)]
+        assert bus.pending(LF) == 1
+    reader.join()
+    assert commands(bus.smbus.log)[-1] == (LF, SET_TARGET_POSITION)
+
+
+def test_nested_batches_flush_once(fake_smbus):
+    bus = I2CBus(1)
+    tic = BusTicI2C(bus, LF)
+    with bus.batch():
+        with bus.batch():
+            tic.energize()
+        assert bus.smbus.log == []
+        tic.exit_safe_start()
+    assert len(commands(bus.smbus.log)) == 2
+    assert bus.stats.batches == 1
+
+
+def test_combined_writes_use_one_transfer(fake_smbus):
+    bus = I2CBus(1, combined_writes=True)
+    lf, rt = BusTicI2C(bus, LF), BusTicI2C(bus, RT)
+    with bus.batch():
+        lf.set_target_position(1)
+        rt.set_target_position(2)
+    assert bus.smbus.calls == 1
+    assert len(commands(bus.smbus.log)) == 2
+
+
+def test_read_in_a_batch_flushes_that_device_first(fake_smbus):
+    bus = I2CBus(1)
+    lf, rt = BusTicI2C(bus, LF), BusTicI2C(bus, RT)
+    with bus.batch():
+        lf.set_target_position(1)
+        rt.set_target_position(2)
+        lf.get_current_position()
+        # the read went out after lf's queued write, rt's write still waits
+        assert commands(bus.smbus.log) == [(LF, SET_TARGET_POSITION), (LF, GET_VARIABLE_CMD)]
+        assert bus.pending(RT) == 1
+    assert commands(bus.smbus.log)[-1] == (RT, SET_TARGET_POSITION)
+
+
+def test_block_reads_are_not_interleaved(fake_smbus):
+    bus = I2CBus(1)
+    tics = [BusTicI2C(bus, address) for address in (LF, RT)]
+
+    def poll(tic):
+        for _ in range(200):
+            tic.get_current_position()
+
+    threads = [threading.Thread(target=poll, args=(tic,)) for tic in tics]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    log = bus.smbus.log
+    assert len(log) == 800
+    for request, reply in zip(log[::2], log[1::2]):
+        assert request[0] == "w" and reply[0] == "r"
+        assert request[1] == reply[1]
+
+
+def test_motors_on_one_bus_share_it(fake_smbus, monkeypatch):
+    monkeypatch.setattr("src.i2c_bus._buses", {})
+    lf, rt = I2CticMotorController(1, LF, False), I2CticMotorController(1, RT, True)
+    assert lf.bus is rt.bus is get_i2c_bus(1)
+    assert get_i2c_bus(2) is not lf.bus
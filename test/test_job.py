@@ -0,0 +1,114 @@
+import io
+from math import hypot
+
+import numpy as np
+import pytest
+
+from src.arm import Arm, LinkAngleChecker
+from src.job import JobExecutor, JobMove, parse_csv, parse_gcode, read_job
+from src.motor_controller import TicMotorController
+
+START = (10.0, 100.0)
+
+
+@pytest.fixture
+def executor(setup, fake_tic):
+    arm = Arm(
+        setup,
+        TicMotorController(fake_tic(), False),
+        TicMotorController(fake_tic(), False),
+        LinkAngleChecker(setup),
+    )
+    return JobExecutor(arm, lookahead=4, max_feed=50.0, max_acc=200.0)
+
+
+def xy(moves):
+    return [(round(move.x, 6), round(move.y, 6)) for move in moves]
+
+
+def test_gcode_units_feed_and_comments():
+    moves = list(parse_gcode(["G21 G90 ; mm", "G0 X10 Y100", "(pen down)", "G1 X20 F600", "G20", "G1 X1 Y4"]))
+    assert xy(moves) == [(10, 100), (20, 100), (25.4, 101.6)]
+    assert [move.feed for move in moves] == [None, 10.0, 10.0]
+    assert [move.line_no for move in moves] == [2, 4, 6]
+
+
+def test_gcode_relative_moves_count_from_start():
+    assert xy(parse_gcode(["G91", "G1 X1 Y1", "G1 X-2"], start=START)) == [(11, 101), (9, 101)]
+
+
+@pytest.mark.parametrize("lines", [["G91", "G1 X1 Y1"], ["G1 X5"], ["G2 X10 Y0 I5 J0"]])
+def test_gcode_rejects_moves_from_an_unknown_position(lines):
+    with pytest.raises(ValueError, match=f"line {len(lines)}:"):
+        list(parse_gcode(lines))
+
+
+def test_gcode_relative_moves_after_first_absolute_move():
+    assert xy(parse_gcode(["G1 X10 Y100", "G91", "G1 Y5", "G90 G1 X0"])) == [(10, 100), (10, 105), (0, 105)]
+
+
+def test_gcode_arc_stays_on_circle():
+    moves = list(parse_gcode(["G3 X-10 Y100 I-10 J0"], arc_seg_len=1.0, start=START))
+    assert xy(moves[-1:]) == [(-10, 100)]
+    assert len(moves) == int(np.ceil(np.pi * 10))
+    radii = [hypot(move.x, move.y - 100) for move in moves]
+    assert np.allclose(radii, 10)
+    # counter clockwise from (10, 100) goes through y > 100
+    assert all(move.y >= 100 - 1e-9 for move in moves)
+
+
+def test_csv_header_feed_and_bad_rows():
+    assert xy(parse_csv(["x,y,feed", "10,100,5", "", "# skip", "20,100"])) == [(10, 100), (20, 100)]
+    assert [move.feed for move in parse_csv(["10,100,5", "20,100"])] == [5.0, None]
+    with pytest.raises(ValueError, match="line 2:"):
+        list(parse_csv(["10,100", "20"]))
+
+
+def test_read_job_passes_start_to_gcode():
+    assert xy(read_job(io.StringIO("G91\nG1 X1 Y1\n"), "gcode", START)) == [(11, 101)]
+
+
+def segments(executor, points, start=START):
+    return executor._to_segments([JobMove(x, y, None, i + 1) for i, (x, y) in enumerate(points)], start)
+
+
+def test_junction_speeds(executor):
+    straight, reverse, corner = (
+        segments(executor, points) for points in ([(20, 100), (30, 100)], [(20, 100), (10, 100)], [(20, 100), (20, 110)])
+    )
+    assert executor._junction_vel(*straight) == executor.max_feed
+    assert executor._junction_vel(*reverse) == 0.0
+    assert 0.0 < executor._junction_vel(*corner) < executor.max_feed
+
+
+def test_window_ends_at_rest_within_acceleration(executor):
+    window = segments(executor, [(10 + 5 * i, 100) for i in range(1, 6)])
+    executor._plan_window(window, 0.0)
+    entry = [seg.entry_vel for seg in window] + [0.0]
+    assert entry[0] == 0.0
+    for seg, v0, v1 in zip(window, entry, entry[1:]):
+        assert abs(v1**2 - v0**2) <= 2 * executor.max_acc * seg.length + 1e-9
+        assert v0 <= seg.v_max
+
+
+def test_chunks_cover_all_moves_continuously(executor):
+    moves = [JobMove(10 + 2 * i, 100 + (i % 2), 20.0, i + 1) for i in range(1, 11)]
+    chunks = list(executor.plan_chunks(moves, START))
+    # windows of 4 commit half of themselves until the job runs out
+    assert [n for _, n in chunks] == [2, 2, 2, 2, 2]
+    assert (chunks[0][0].x[0], chunks[0][0].y[0]) == pytest.approx(START)
+    for (prev, _), (nxt, _) in zip(chunks, chunks[1:]):
+        assert (prev.x[-1], prev.y[-1]) == pytest.approx((nxt.x[0], nxt.y[0]))
+    last = chunks[-1][0]
+    assert (last.x[-1], last.y[-1]) == pytest.approx((moves[-1].x, moves[-1].y))
+
+
+def test_rejects_segment_leaving_the_workspace(executor):
+    moves = [JobMove(20, 100, None, 1), JobMove(20, 60, None, 2)]
+    with pytest.raises(ValueError, match="line 2: move leaves the workspace"):
+        list(executor.plan_chunks(moves, START))
+
+
+def test_rejects_non_positive_feed(executor):
+    with pytest.raises(ValueError, match="line 1: feed must be positive"):
+        list(executor.plan_chunks([JobMove(20, 100, 0.0, 1)], START))
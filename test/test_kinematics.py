@@ -0,0 +1,251 @@
+from math import cos, inf, pi
+
+import numpy as np
+import pytest
+
+from src.arm import LinkAngleChecker
+from src.consts import ur
+from src.kinematics import ParaScaraFloatState, ParaScaraKinematics
+
+IK_MODES = ("++", "+-", "-+", "--")
+
+FIELDS = ("end_effector_pos", "lf_base_endpos", "rt_base_endpos", "lf_base_ang", "rt_base_ang", "lf_link_ang", "rt_link_ang")
+
+# a grid reaching past the 170 mm reach and into the dead zone around the bases,
+# missing the base pivots themselves, where the scalar cosine rule divides by zero
+GRID_X, GRID_Y = np.meshgrid(np.linspace(-147, 203, 36), np.linspace(-57, 203, 27))
+
+
+@pytest.fixture(scope="module")
+def kine(setup):
+    return ParaScaraKinematics(setup)
+
+
+def assert_state_equal(batch, idx, state):
+    for field in FIELDS:
+        assert np.asarray(getattr(batch, field)[idx]) == pytest.approx(np.asarray(getattr(state, field)), abs=1e-9)
+
+
+@pytest.mark.parametrize("mode", IK_MODES)
+def test_ik_batch_matches_scalar(kine, mode):
+    batch = kine.inverse_kinematics_batch(GRID_X, GRID_Y, mode)[0]
+    assert batch.shape == GRID_X.shape
+    assert batch.valid.any() and not batch.valid.all()
+    for idx in np.ndindex(GRID_X.shape):
+        x, y = float(GRID_X[idx]), float(GRID_Y[idx])
+        try:
+            state = kine.inverse_kinematics_f(x, y, mode)[0]
+        except ValueError:
+            assert not batch.valid[idx]
+            assert all(np.isnan(getattr(batch, field)[idx]).all() for field in FIELDS)
+            continue
+        assert batch.valid[idx]
+        assert_state_equal(batch, idx, state)
+
+
+def test_ik_batch_one_state_per_mode(kine):
+    batches = kine.inverse_kinematics_batch(10.0, 100.0, IK_MODES)
+    states = kine.inverse_kinematics_f(10.0, 100.0, IK_MODES)
+    assert len(batches) == len(states) == len(IK_MODES)
+    for batch, state in zip(batches, states):
+        assert_state_equal(batch, (), state)
+
+
+def test_ik_batch_rejects_unknown_mode(kine):
+    with pytest.raises(ValueError):
+        kine.inverse_kinematics_batch([10.0], [100.0], "+x")
+
+
+@pytest.mark.parametrize("mode", ["i", "o", "io", "oi"])
+def test_fk_batch_matches_scalar(kine, mode):
+    # base angles all around, so some elbow pairs are too far apart for the links to meet
+    q1, q2 = np.meshgrid(np.linspace(-3.1, 3.1, 31), np.linspace(-3.05, 3.05, 29))
+    batches = kine.forward_kinematics_batch(q1, q2, mode)
+    assert len(batches) == len(mode)
+    assert batches[0].valid.any() and not batches[0].valid.all()
+    for idx in np.ndindex(q1.shape):
+        states = kine.forward_kinematics_f(float(q1[idx]), float(q2[idx]), mode)
+        if not states:
+            for batch in batches:
+                assert not batch.valid[idx]
+                assert all(np.isnan(getattr(batch, field)[idx]).all() for field in FIELDS)
+            continue
+        for batch, state in zip(batches, states):
+            assert batch.valid[idx]
+            assert_state_equal(batch, idx, state)
+
+
+def test_fk_batch_inverts_ik(kine):
+    x, y = np.meshgrid(np.linspace(-30, 80, 7), np.linspace(60, 140, 5))
+    ik = kine.inverse_kinematics_batch(x, y, "+-")[0]
+    assert ik.valid.all()
+    fk_i, fk_o = kine.forward_kinematics_batch(ik.lf_base_ang, ik.rt_base_ang, "io")
+    # the "+-" posture is one of the two branches at every point
+    on_i = np.hypot(*(fk_i.end_effector_pos - ik.end_effector_pos).transpose(2, 0, 1)) < 1e-9
+    on_o = np.hypot(*(fk_o.end_effector_pos - ik.end_effector_pos).transpose(2, 0, 1)) < 1e-9
+    assert (on_i | on_o).all()
+
+
+# reachable in the "+-" posture, away from both kinds of singularity
+VEL_GRID_X, VEL_GRID_Y = np.meshgrid(np.linspace(-30, 80, 12), np.linspace(60, 140, 9))
+
+
+def fk_near(kine, q1, q2, pos):
+    """ End effector of the FK branch closest to `pos`. """
+    return min((state.end_effector_pos for state in kine.forward_kinematics_f(q1, q2, "io")),
+               key=lambda p: np.hypot(p[0] - pos[0], p[1] - pos[1]))
+
+
+def test_jacobian_matches_finite_differences(kine):
+    eps = 1e-6
+    for x, y in zip(VEL_GRID_X.flat, VEL_GRID_Y.flat):
+        state = kine.inverse_kinematics_f(x, y, "+-")[0]
+        q1, q2 = state.lf_base_ang, state.rt_base_ang
+        cols = []
+        for dq1, dq2 in ((eps, 0.0), (0.0, eps)):
+            plus = fk_near(kine, q1 + dq1, q2 + dq2, (x, y))
+            minus = fk_near(kine, q1 - dq1, q2 - dq2, (x, y))
+            cols.append(((plus[0] - minus[0]) / (2 * eps), (plus[1] - minus[1]) / (2 * eps)))
+        numeric = np.array(cols).T
+        assert np.array(kine.jacobian_f(state)) == pytest.approx(numeric, rel=1e-4, abs=1e-4)
+
+
+def test_inverse_jacobian_and_joint_velocity(kine):
+    for x, y in zip(VEL_GRID_X.flat, VEL_GRID_Y.flat):
+        state = kine.inverse_kinematics_f(x, y, "+-")[0]
+        jac = np.array(kine.jacobian_f(state))
+        inv_jac = np.array(kine.inv_jacobian_f(state))
+        assert inv_jac @ jac == pytest.approx(np.eye(2), abs=1e-9)
+        assert kine.joint_velocity_f(state, 3.0, -2.0) == pytest.approx(inv_jac @ [3.0, -2.0])
+        assert kine.manipulability_f(state) == pytest.approx(abs(np.linalg.det(jac)))
+        assert kine.condition_number_f(state) == pytest.approx(np.linalg.cond(jac))
+
+
+def test_link_cos_is_cosine_of_link_angle(kine, setup):
+    checker = LinkAngleChecker(setup, kine_solver=kine)
+    for x, y in zip(GRID_X.flat, GRID_Y.flat):
+        try:
+            state = kine.inverse_kinematics_f(float(x), float(y), "+-")[0]
+        except ValueError:
+            continue
+        assert kine.link_cos_f(state) == pytest.approx(cos(checker.get_link_ang_diff_f(state)), abs=1e-12)
+
+
+@pytest.mark.parametrize("mode", IK_MODES)
+def test_velocity_batch_matches_scalar(kine, mode):
+    batch = kine.inverse_kinematics_batch(GRID_X, GRID_Y, mode)[0]
+    jac = kine.jacobian_batch(batch)
+    inv_jac = kine.inv_jacobian_batch(batch)
+    joint_vel = kine.joint_velocity_batch(batch, 3.0, -2.0)
+    manip = kine.manipulability_batch(batch)
+    cond = kine.condition_number_batch(batch)
+    link_cos = kine.link_cos_batch(batch)
+    for idx in np.ndindex(GRID_X.shape):
+        if not batch.valid[idx]:
+            assert np.isnan(jac[idx]).all() and np.isnan(joint_vel[idx]).all()
+            assert np.isnan([manip[idx], cond[idx], link_cos[idx]]).all()
+            continue
+        state = kine.inverse_kinematics_f(float(GRID_X[idx]), float(GRID_Y[idx]), mode)[0]
+        assert jac[idx] == pytest.approx(np.array(kine.jacobian_f(state)))
+        assert inv_jac[idx] == pytest.approx(np.array(kine.inv_jacobian_f(state)))
+        assert joint_vel[idx] == pytest.approx(kine.joint_velocity_f(state, 3.0, -2.0))
+        assert manip[idx] == pytest.approx(kine.manipulability_f(state))
+        assert cond[idx] == pytest.approx(kine.condition_number_f(state))
+        assert link_cos[idx] == pytest.approx(kine.link_cos_f(state))
+
+
+def float_state(eff, lf, rt):
+    return ParaScaraFloatState(eff, lf, rt, 0.0, 0.0, 0.0, 0.0)
+
+
+def test_singularities(kine):
+    # left base and link aligned
+    serial = float_state((0.0, 170.0), (0.0, 85.0), (100.0, 100.0))
+    with pytest.raises(ValueError):
+        kine.inv_jacobian_f(serial)
+    assert kine.manipulability_f(serial) == 0.0
+    assert kine.condition_number_f(serial) == inf
+
+    # links stretched into one line
+    parallel = float_state((0.0, 100.0), (0.0, 15.0), (0.0, 185.0))
+    with pytest.raises(ValueError):
+        kine.jacobian_f(parallel)
+    assert kine.manipulability_f(parallel) == inf
+    assert kine.link_cos_f(parallel) == -1.0
+
+
+@pytest.mark.parametrize("mode", IK_MODES)
+@pytest.mark.parametrize("threshold_deg", [5.0, 10.0, 30.0])
+def test_link_checker_decisions_unchanged(kine, setup, mode, threshold_deg):
+    """ The link_cos test against the acos-based link angle test it replaced. """
+    checker = LinkAngleChecker(setup, threshold_deg * ur.deg, kine)
+    threshold = checker.threshold_ang.to(ur.rad).m
+    batch = checker.is_pos_valid_batch(GRID_X, GRID_Y, mode)
+    decided = 0
+    for idx in np.ndindex(GRID_X.shape):
+        try:
+            state = kine.inverse_kinematics_f(float(GRID_X[idx]), float(GRID_Y[idx]), mode)[0]
+        except ValueError:
+            assert not batch[idx]
+            continue
+        margin = abs(checker.get_link_ang_diff_f(state) - pi) - threshold
+        if abs(margin) < 1e-9:
+            continue
+        assert checker.is_state_valid_f(state) == batch[idx] == (margin >= 0)
+        decided += 1
+    assert decided
+
+
+@pytest.mark.parametrize("mode", IK_MODES)
+def test_closest_ik_picks_mode_of_current_posture(kine, mode):
+    state = kine.inverse_kinematics_f(10.0, 100.0, mode)[0]
+    solution = kine.inverse_kinematics_closest_f(10.0, 100.0, state.lf_base_ang + 0.05, state.rt_base_ang - 0.02)
+    assert solution.mode == mode
+    assert (solution.lf_travel, solution.rt_travel) == pytest.approx((-0.05, 0.02))
+    assert solution.total_travel == pytest.approx(0.07)
+
+
+def test_closest_ik_travel_is_shortest_signed_rotation(kine):
+    state = kine.inverse_kinematics_f(10.0, 100.0, "+-")[0]
+    # a full turn off plus a bit: the joint only has to come back the bit
+    solution = kine.inverse_kinematics_closest_f(10.0, 100.0, state.lf_base_ang - 2 * pi - 0.1, state.rt_base_ang + 2 * pi + 0.1)
+    assert solution.mode == "+-"
+    assert (solution.lf_travel, solution.rt_travel) == pytest.approx((0.1, -0.1))
+
+
+def test_closest_ik_state_filter(kine):
+    state = kine.inverse_kinematics_f(10.0, 100.0, "+-")[0]
+    cur = (state.lf_base_ang, state.rt_base_ang)
+    rejected = []
+
+    def reject_current_mode(candidate):
+        rejected.append(candidate)
+        return candidate.lf_base_ang != state.lf_base_ang or candidate.rt_base_ang != state.rt_base_ang
+
+    solution = kine.inverse_kinematics_closest_f(10.0, 100.0, *cur, state_filter=reject_current_mode)
+    assert len(rejected) == len(IK_MODES)
+    assert solution.mode != "+-"
+    others = [kine.inverse_kinematics_closest_f(10.0, 100.0, *cur, modes=(m,)) for m in IK_MODES if m != "+-"]
+    assert solution.total_travel == pytest.approx(min(other.total_travel for other in others))
+
+    with pytest.raises(ValueError):
+        kine.inverse_kinematics_closest_f(10.0, 100.0, *cur, state_filter=lambda _: False)
+    with pytest.raises(ValueError):
+        kine.inverse_kinematics_closest_f(500.0, 500.0, *cur)
+
+
+def test_closest_ik_batch_matches_scalar(kine):
+    rng = np.random.default_rng(0)
+    cur_lf = rng.uniform(-pi, pi, GRID_X.shape)
+    cur_rt = rng.uniform(-pi, pi, GRID_X.shape)
+    states, mode_idx, travel = kine.inverse_kinematics_closest_batch(GRID_X, GRID_Y, cur_lf, cur_rt)
+    assert states.valid.any() and not states.valid.all()
+    for idx in np.ndindex(GRID_X.shape):
+        try:
+            solution = kine.inverse_kinematics_closest_f(float(GRID_X[idx]), float(GRID_Y[idx]), cur_lf[idx], cur_rt[idx])
+        except ValueError:
+            assert not states.valid[idx]
+            continue
+        assert IK_MODES[mode_idx[idx]] == solution.mode
+        assert travel[idx] == pytest.approx((solution.lf_travel, solution.rt_travel))
+        assert_state_equal(states, idx, solution.state)
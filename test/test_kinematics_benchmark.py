@@ -0,0 +1,135 @@
+"""
+Micro-benchmarks of the kinematics and workspace checkers on the default
+85/85/85/85/55 mm setup. Prints one JSON document so results of different
+versions can be diffed or collected:
+
+    python test/test_kinematics_benchmark.py --out bench.json
+"""
+import sys
+import os
+import argparse
+import json
+import platform
+import time
+from typing import Callable
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src.arm import LinkAngleChecker, GridChecker, CombinedChecker
+from src.consts import ur
+from src.kinematics import ParaScaraKinematics, ParaScaraSetup
+from src.kinematics_cache import CachedParaScaraKinematics
+from src.trajectory import LinePath, SCurveProfile, plan_trajectory, time_optimal_trajectory
+
+setup = ParaScaraSetup(
+    lf_base_len=85 * ur.mm,
+    rt_base_len=85 * ur.mm,
+    lf_link_len=85 * ur.mm,
+    rt_link_len=85 * ur.mm,
+    axis_dist=55 * ur.mm,
+)
+
+BATCH_SIZE = 10_000
+
+
+def bench(fn: Callable[[], object], items_per_call: int = 1, min_time: float = 0.2, repeat: int = 5) -> dict:
+    """Time `fn`, returning the best per-call latency and the matching throughput."""
+    fn()  # warm up
+    n_calls = 1
+    while True:
+        st = time.perf_counter()
+        for _ in range(n_calls):
+            fn()
+        if time.perf_counter() - st >= min_time / repeat:
+            break
+        n_calls *= 2
+
+    best = float("inf")
+    for _ in range(repeat):
+        st = time.perf_counter()
+        for _ in range(n_calls):
+            fn()
+        best = min(best, (time.perf_counter() - st) / n_calls)
+
+    return {
+        "us_per_call": best * 1e6,
+        "items_per_call": items_per_call,
+        "items_per_sec": items_per_call / best,
+        "calls_timed": n_calls * repeat,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--out", help="also write the JSON results to this file")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds spent per benchmark")
+    args = parser.parse_args()
+
+    kine = ParaScaraKinematics(setup)
+    cached_kine = CachedParaScaraKinematics(setup)
+    link_checker = LinkAngleChecker(setup)
+    grid_checker = GridChecker(setup, cache_dir=None)
+    combined_checker = CombinedChecker(link_checker, LinkAngleChecker(setup, 5 * ur.deg))
+
+    x_q, y_q = 10 * ur.mm, 100 * ur.mm
+    x_f, y_f = 10.0, 100.0
+    q1_q, q2_q = 120 * ur.deg, 60 * ur.deg
+    q1_f, q2_f = q1_q.to(ur.rad).m, q2_q.to(ur.rad).m
+    state = kine.inverse_kinematics(x_q, y_q)[0]
+    state_f = kine.inverse_kinematics_f(x_f, y_f)[0]
+
+    rng = np.random.default_rng(0)
+    xs = rng.uniform(-80, 130, BATCH_SIZE)
+    ys = rng.uniform(40, 160, BATCH_SIZE)
+    q1s = rng.uniform(0, np.pi, BATCH_SIZE)
+    q2s = rng.uniform(0, np.pi, BATCH_SIZE)
+    batch_state = kine.inverse_kinematics_batch(xs, ys)[0]
+    line = LinePath((-20.0, 100.0), (80.0, 120.0))
+
+    cases: dict[str, tuple[Callable[[], object], int]] = {
+        "forward_kinematics": (lambda: kine.forward_kinematics(q1_q, q2_q, "o"), 1),
+        "forward_kinematics_f": (lambda: kine.forward_kinematics_f(q1_f, q2_f, "o"), 1),
+        "forward_kinematics_batch": (lambda: kine.forward_kinematics_batch(q1s, q2s, "o"), BATCH_SIZE),
+        "inverse_kinematics": (lambda: kine.inverse_kinematics(x_q, y_q), 1),
+        "inverse_kinematics_f": (lambda: kine.inverse_kinematics_f(x_f, y_f), 1),
+        "inverse_kinematics_f_cached": (lambda: cached_kine.inverse_kinematics_f(x_f, y_f), 1),
+        "inverse_kinematics_batch": (lambda: kine.inverse_kinematics_batch(xs, ys), BATCH_SIZE),
+        "inverse_kinematics_closest_f": (lambda: kine.inverse_kinematics_closest_f(x_f, y_f, q1_f, q2_f), 1),
+        "jacobian_f": (lambda: kine.jacobian_f(state_f), 1),
+        "jacobian_batch": (lambda: kine.jacobian_batch(batch_state), BATCH_SIZE),
+        "link_angle_checker.is_pos_valid": (lambda: link_checker.is_pos_valid(x_q, y_q), 1),
+        "link_angle_checker.is_pos_valid_f": (lambda: link_checker.is_pos_valid_f(x_f, y_f), 1),
+        "link_angle_checker.is_pos_valid_batch": (lambda: link_checker.is_pos_valid_batch(xs, ys), BATCH_SIZE),
+        "grid_checker.is_pos_valid_f": (lambda: grid_checker.is_pos_valid_f(x_f, y_f), 1),
+        "grid_checker.is_pos_valid_batch": (lambda: grid_checker.is_pos_valid_batch(xs, ys), BATCH_SIZE),
+        "combined_checker.is_pos_valid": (lambda: combined_checker.is_pos_valid(x_q, y_q), 1),
+        "combined_checker.is_state_valid": (lambda: combined_checker.is_state_valid(state), 1),
+        "state.to_unit": (lambda: state.to_unit(ur.cm, ur.rad), 1),
+        "plan_trajectory": (lambda: plan_trajectory(kine, line, SCurveProfile(line.length, 100, 500)), 1),
+        "time_optimal_trajectory": (lambda: time_optimal_trajectory(kine, line, (360, 360), (1800, 1800)), 1),
+    }
+
+    results = {}
+    for name, (fn, items) in cases.items():
+        results[name] = bench(fn, items, min_time=args.min_time)
+        print(f"{name:40s} {results[name]['us_per_call']:12.3f} us/call", file=sys.stderr)
+
+    report = {
+        "setup_mm": [85, 85, 85, 85, 55],
+        "batch_size": BATCH_SIZE,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "timestamp": time.time(),
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import pytest
+
+from src.kinematics import ParaScaraKinematics
+from src.kinematics_cache import CachedParaScaraKinematics
+
+
+def test_hits_match_uncached(setup):
+    kine = ParaScaraKinematics(setup)
+    cached = CachedParaScaraKinematics(setup)
+    first = cached.inverse_kinematics_f(10.0, 100.0)
+    second = cached.inverse_kinematics_f(10.0, 100.0)
+    assert (cached.stats.hits, cached.stats.misses) == (1, 1)
+    assert first == second
+    expected = kine.inverse_kinematics_f(10.0, 100.0)[0]
+    assert first[0].lf_base_ang == pytest.approx(expected.lf_base_ang)
+    assert first[0].rt_base_ang == pytest.approx(expected.rt_base_ang)
+
+
+def test_same_cell_shares_entry(setup):
+    cached = CachedParaScaraKinematics(setup, resolution=0.1)
+    cached.inverse_kinematics_f(10.0, 100.0)
+    cached.inverse_kinematics_f(10.02, 99.98)
+    assert cached.stats.hits == 1
+    assert cached.cache_size == 1
+
+
+def test_unreachable_is_cached(setup):
+    cached = CachedParaScaraKinematics(setup)
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            cached.inverse_kinematics_f(1000.0, 1000.0)
+    assert (cached.stats.hits, cached.stats.misses) == (1, 1)
+
+
+def test_lru_eviction(setup):
+    cached = CachedParaScaraKinematics(setup, maxsize=2)
+    for x in (0.0, 5.0, 10.0):
+        cached.inverse_kinematics_f(x, 100.0)
+    assert cached.cache_size == 2
+    assert cached.stats.evictions == 1
+    cached.inverse_kinematics_f(0.0, 100.0)
+    assert cached.stats.misses == 4
+
+
+def test_hits_return_copies(setup):
+    cached = CachedParaScaraKinematics(setup)
+    first = cached.inverse_kinematics_f(10.0, 100.0)[0]
+    first.lf_base_ang += 1.0
+    first.end_effector_pos = (0.0, 0.0)
+    second = cached.inverse_kinematics_f(10.0, 100.0)[0]
+    assert second is not first
+    assert second.lf_base_ang == pytest.approx(first.lf_base_ang - 1.0)
+    assert second.end_effector_pos == pytest.approx((10.0, 100.0))
+
+
+def test_solved_at_snapped_point(setup):
+    cached = CachedParaScaraKinematics(setup, resolution=0.5)
+    state = cached.inverse_kinematics_f(10.2, 99.9)[0]
+    assert state.end_effector_pos == pytest.approx((10.0, 100.0))
+    expected = ParaScaraKinematics(setup).inverse_kinematics_f(10.0, 100.0)[0]
+    assert state.lf_base_ang == pytest.approx(expected.lf_base_ang)
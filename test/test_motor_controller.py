@@ -20,4 +20,4 @@ if __name__ == "__main__":
     try: 
         main()
     finally: 
-        motor.tic.deenergize()
\ No newline at end of file
+        motor.deenergize()
\ No newline at end of file
@@ -41,8 +41,8 @@ def init_arm() -> Arm:
     rf_motor = I2CticMotorController(
         1, 14, True, step_mode=StepMode._8
     )
-    lf_motor.tic.set_current_limit(9) 
-    rf_motor.tic.set_current_limit(9)
+    lf_motor.set_current_limit(9)
+    rf_motor.set_current_limit(9)
     setup = ParaScaraSetup(
         lf_base_len=85 * ur.mm,
         rt_base_len=85 * ur.mm,
@@ -0,0 +1,46 @@
+import pytest
+
+from src.consts import ur
+from src.kinematics import ParaScaraKinematics
+from src.packed_state import PackedParaScaraState, STATE_WIDTH
+
+
+@pytest.fixture(scope="module")
+def state(setup):
+    return ParaScaraKinematics(setup).inverse_kinematics_f(10.0, 100.0)[0]
+
+
+def test_round_trip(state):
+    packed = PackedParaScaraState.pack(state)
+    assert packed.to_float() == state
+    # through degrees and back, equal up to rounding
+    assert list(PackedParaScaraState.pack(packed.to_quantity()).data) == pytest.approx(list(packed.data))
+
+
+def test_attributes_match_quantity_state(state):
+    packed = PackedParaScaraState.pack(state)
+    full = state.to_quantity()
+    assert packed.lf_base_ang.to(ur.rad).m == pytest.approx(full.lf_base_ang.to(ur.rad).m)
+    assert packed.rt_link_ang.to(ur.rad).m == pytest.approx(full.rt_link_ang.to(ur.rad).m)
+    assert packed.end_effector_pos[1].to(ur.mm).m == pytest.approx(full.end_effector_pos[1].to(ur.mm).m)
+
+
+def test_reading_attributes_keeps_nothing(state):
+    packed = PackedParaScaraState.pack(state)
+    packed.lf_base_ang
+    packed.to_quantity()
+    assert not hasattr(packed, "__dict__")
+    assert PackedParaScaraState.__slots__ == ("data",)
+
+
+def test_hash_follows_equality(state):
+    a = PackedParaScaraState.pack(state)
+    b = PackedParaScaraState(list(a.data))
+    assert a == b and hash(a) == hash(b)
+    assert len({a, b}) == 1
+    assert hash(PackedParaScaraState([0.0] * STATE_WIDTH)) == hash(PackedParaScaraState([-0.0] * STATE_WIDTH))
+
+
+def test_wrong_width():
+    with pytest.raises(ValueError):
+        PackedParaScaraState([0.0] * (STATE_WIDTH - 1))
@@ -0,0 +1,92 @@
+from math import hypot
+
+import numpy as np
+import pytest
+
+from src.arm import LinkAngleChecker
+from src.path_planner import GridPathPlanner
+from src.workspace import WorkspaceGrid
+
+START = (3.5, 3.5)
+GOAL = (16.5, 3.5)
+
+
+def walled_grid(gap: bool) -> WorkspaceGrid:
+    """ 20 x 20 unit cells with a wall at x = 10, open at the top if `gap`. """
+    occupancy = np.ones((20, 20), dtype=bool)
+    occupancy[: 14 if gap else 20, 10] = False
+    return WorkspaceGrid(occupancy, 0.0, 0.0, 1.0)
+
+
+def path_length(path):
+    return sum(hypot(b[0] - a[0], b[1] - a[1]) for a, b in zip(path, path[1:]))
+
+
+def assert_path_clear(planner, path):
+    ends = (planner.grid.cell_index(*path[0]), planner.grid.cell_index(*path[-1]))
+    for a, b in zip(path, path[1:]):
+        assert planner.is_segment_clear(a, b, ends)
+
+
+def test_detours_around_wall():
+    planner = GridPathPlanner(walled_grid(gap=True))
+    path = planner.plan(START, GOAL)
+    assert (path[0], path[-1]) == (START, GOAL)
+    assert len(path) > 2
+    assert_path_clear(planner, path)
+    # over the wall's end, not through it
+    assert max(y for _, y in path) >= 14
+    # shortcutting keeps a few of the searched cells and adds little length over the two legs past the gap
+    cells = planner._search(planner.grid.cell_index(*START), planner.grid.cell_index(*GOAL))
+    assert len(path) < len(cells) / 2
+    corner = (10.5, 15.5)
+    legs = hypot(corner[0] - START[0], corner[1] - START[1]) + hypot(GOAL[0] - corner[0], GOAL[1] - corner[1])
+    assert path_length(path) <= legs + 2.0
+
+
+def test_clear_segment_skips_search():
+    planner = GridPathPlanner(walled_grid(gap=True))
+    assert planner.plan(START, (8.5, 17.5)) == [START, (8.5, 17.5)]
+    assert (planner.stats.hits, planner.stats.misses) == (0, 0)
+
+
+def test_cache_per_start_and_goal_cell():
+    planner = GridPathPlanner(walled_grid(gap=True), cache_size=2)
+    first = planner.plan(START, GOAL)
+    assert planner.plan(START, GOAL) == first
+    # other points in the same two cells reuse the smoothed path
+    assert planner.plan((3.2, 3.8), (16.9, 3.1))[1:-1] == first[1:-1]
+    assert (planner.stats.hits, planner.stats.misses) == (2, 1)
+
+    planner.plan((3.5, 5.5), GOAL)
+    planner.plan((3.5, 7.5), GOAL)
+    assert (planner.stats.misses, planner.stats.evictions) == (3, 1)
+    # the least recently used entry was dropped
+    planner.plan(START, GOAL)
+    assert planner.stats.misses == 4
+
+
+def test_no_path():
+    planner = GridPathPlanner(walled_grid(gap=False))
+    with pytest.raises(ValueError, match="No valid path"):
+        planner.plan(START, GOAL)
+
+
+def test_ends_outside_workspace():
+    planner = GridPathPlanner(walled_grid(gap=True))
+    with pytest.raises(ValueError, match="goal"):
+        planner.plan(START, (10.5, 3.5))
+    with pytest.raises(ValueError, match="start"):
+        planner.plan((-5.0, 3.5), GOAL)
+
+
+def test_detour_stays_valid_for_the_arm(setup):
+    checker = LinkAngleChecker(setup)
+    planner = GridPathPlanner(WorkspaceGrid.build(checker, 2.0))
+    # the links fold too far between these two points on a straight line
+    start, goal = (-40.0, 60.0), (90.0, 60.0)
+    assert not checker.is_pos_valid_batch(np.linspace(start[0], goal[0], 50), np.full(50, 60.0)).all()
+    path = planner.plan(start, goal)
+    for a, b in zip(path, path[1:]):
+        u = np.linspace(0.0, 1.0, 50)
+        assert checker.is_pos_valid_batch(a[0] + u * (b[0] - a[0]), a[1] + u * (b[1] - a[1])).all()
@@ -0,0 +1,108 @@
+import threading
+
+import pytest
+
+from src.hw_executor import HardwareExecutor
+from src.scheduler import SupersedingScheduler
+
+
+@pytest.fixture
+def executor():
+    executor = HardwareExecutor(maxsize=1)
+    yield executor
+    executor.shutdown()
+
+
+def hold_worker(executor: HardwareExecutor) -> threading.Event:
+    """ Keep the I/O thread busy until the returned event is set. """
+    started, release = threading.Event(), threading.Event()
+
+    def hold() -> None:
+        started.set()
+        release.wait(5)
+
+    executor.submit(hold)
+    started.wait(5)
+    return release
+
+
+def test_burst_coalesces_to_latest(executor):
+    scheduler = SupersedingScheduler(executor)
+    ran = []
+    release = hold_worker(executor)
+    superseded = [scheduler.submit("arm", ran.append, k) for k in range(10)]
+    release.set()
+    scheduler.flush(5)
+
+    assert superseded == [False] + [True] * 9
+    assert ran == [9]
+    assert scheduler.stats.submitted == 10
+    assert scheduler.stats.coalesced == 9
+    assert scheduler.stats.executed == 1
+    assert scheduler.pending == 0
+
+
+def test_keys_are_independent(executor):
+    scheduler = SupersedingScheduler(executor)
+    ran = []
+    release = hold_worker(executor)
+    for k in range(3):
+        scheduler.submit("lf", ran.append, ("lf", k))
+        scheduler.submit("rt", ran.append, ("rt", k))
+    release.set()
+    scheduler.flush(5)
+    assert sorted(ran) == [("lf", 2), ("rt", 2)]
+
+
+def test_submit_does_not_block_on_full_queue(executor):
+    scheduler = SupersedingScheduler(executor)
+    ran = []
+    release = hold_worker(executor)
+    executor.submit(lambda: None)  # fills the queue
+
+    def submit_burst() -> None:
+        for k in range(5):
+            scheduler.submit("arm", ran.append, k)
+
+    submitter = threading.Thread(target=submit_burst)
+    submitter.start()
+    submitter.join(1)
+    assert not submitter.is_alive()
+    assert scheduler.pending == 1
+
+    release.set()
+    scheduler.flush(5)
+    assert ran == [4]
+    assert scheduler.stats.coalesced == 4
+
+
+def test_undispatched_command_runs_after_next_dispatch(executor):
+    scheduler = SupersedingScheduler(executor)
+    ran = []
+    release = hold_worker(executor)
+    # "lf" gets the queue slot, "rt" finds it full
+    scheduler.submit("lf", ran.append, "lf")
+    scheduler.submit("rt", ran.append, "rt")
+    release.set()
+    executor.submit(lambda: None).result(5)
+    assert ran == ["lf", "rt"]
+
+
+def test_cancel_and_failures(executor):
+    scheduler = SupersedingScheduler(executor)
+    ran = []
+    release = hold_worker(executor)
+    scheduler.submit("arm", ran.append, 1)
+    assert scheduler.cancel("arm")
+    assert not scheduler.cancel("arm")
+    release.set()
+    scheduler.flush(5)
+    assert ran == []
+
+    def fail() -> None:
+        raise RuntimeError("bus error")
+
+    scheduler.submit("arm", fail)
+    scheduler.flush(5)
+    assert scheduler.stats.failed == 1
+    assert isinstance(scheduler.last_error, RuntimeError)
@@ -0,0 +1,140 @@
+import time
+
+import pytest
+
+from src.arm import Arm, NoChecker
+from src.motor_controller import TicMotorController
+from src.state_estimator import ArmStateEstimator, JointEstimator
+from src.tic_sim import SimulatedTic
+
+# dead reckoning against the simulated step planner, in degrees
+MAX_ERROR_DEG = 0.5
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    # command times are stamped with time.monotonic
+    monkeypatch.setattr(time, "monotonic", clock)
+    return clock
+
+
+@pytest.fixture
+def motor(fake_tic, clock):
+    motor = TicMotorController(fake_tic(), False, max_deg_per_sec=90, max_acc_deg_per_sec2=180)
+    motor.reset_pos(0.0)
+    return motor
+
+
+def test_joint_follows_the_commanded_ramp(motor, clock):
+    joint = JointEstimator(motor)
+    joint.sync(clock.now)
+    motor.move_to_angle(180.0, True)
+    reads = motor.tic.reads
+    move_time = TicMotorController.calc_move_time(180.0, 90, 180)
+
+    clock.now += move_time / 2
+    half_way = joint.predict(clock.now)
+    clock.now += move_time / 2 + 0.01
+    assert joint.predict(clock.now) == pytest.approx(motor.step_to_deg(motor.cmd_target_step))
+    assert motor.tic.reads == reads
+    # symmetric ramps: half the time, half the way
+    assert half_way == pytest.approx(90.0, abs=1.0)
+
+
+def test_resync_records_the_prediction_error(motor, clock):
+    joint = JointEstimator(motor)
+    joint.sync(clock.now)
+    clock.now += 1.0
+    # the motor slipped a few steps while standing
+    motor.tic.values["current_position"] += 5
+    assert joint.sync(clock.now) == pytest.approx(5 * motor.deg_per_micro_step)
+    assert joint.predict(clock.now) == pytest.approx(5 * motor.deg_per_micro_step)
+
+
+@pytest.fixture
+def fake_arm(setup, fake_tic, clock):
+    arm = Arm(setup, TicMotorController(fake_tic(), False), TicMotorController(fake_tic(), False), NoChecker(setup))
+    arm.reset_deg(120.0, 60.0)
+    return arm
+
+
+def test_resyncs_on_interval_only(fake_arm, clock):
+    estimator = ArmStateEstimator(fake_arm, resync_interval=0.25)
+    reads = [motor.tic.reads for motor in (fake_arm.lf_motor, fake_arm.rt_motor)]
+    for _ in range(10):
+        estimator.get_joint_degs(clock.now)
+        clock.now += 0.1
+    assert estimator.stats.resyncs == 4
+    assert estimator.stats.predictions == 6
+    # one read per joint and resync
+    assert [motor.tic.reads - n for motor, n in zip((fake_arm.lf_motor, fake_arm.rt_motor), reads)] == [4, 4]
+
+
+def test_position_reset_forces_resync(fake_arm, clock):
+    estimator = ArmStateEstimator(fake_arm, resync_interval=10.0)
+    estimator.get_joint_degs(clock.now)
+    fake_arm.reset_deg(30.0, 150.0)
+    clock.now += 0.01
+    degs = estimator.get_joint_degs(clock.now)
+    assert estimator.stats.resyncs == 2
+    # the reset position rounded to whole microsteps
+    assert degs == pytest.approx((30.0, 150.0), abs=fake_arm.lf_motor.deg_per_micro_step)
+
+
+@pytest.fixture
+def sim_arm(setup, clock):
+    tics = [SimulatedTic(clock=clock) for _ in range(2)]
+    arm = Arm(setup, *(TicMotorController(tic, False, max_acc_deg_per_sec2=720) for tic in tics), NoChecker(setup))
+    arm.reset_deg(120.0, 60.0)
+    return arm
+
+
+def tic_degs(arm):
+    return [motor.get_current_deg() for motor in (arm.lf_motor, arm.rt_motor)]
+
+
+def angle_diff(a, b):
+    return abs((a - b + 180) % 360 - 180)
+
+
+def test_predictions_match_simulated_tics(sim_arm, clock):
+    arm = sim_arm
+    estimator = ArmStateEstimator(arm, resync_interval=10.0)
+    estimator.get_joint_degs(clock.now)
+    arm.lf_motor.move_to_angle(200.0, True)
+    arm.rt_motor.move_to_angle(20.0, False, 90.0)
+
+    transactions = [motor.tic.transactions for motor in (arm.lf_motor, arm.rt_motor)]
+    predicted = []
+    for _ in range(20):
+        clock.now += 0.05
+        predicted.append(estimator.get_joint_degs(clock.now))
+    assert [motor.tic.transactions for motor in (arm.lf_motor, arm.rt_motor)] == transactions
+
+    # replay the same instants on the simulated Tics
+    clock.now -= 20 * 0.05
+    for degs in predicted:
+        clock.now += 0.05
+        for est, actual in zip(degs, tic_degs(arm)):
+            assert angle_diff(est, actual) < MAX_ERROR_DEG
+    assert predicted[-1] == pytest.approx((200.0, 20.0), abs=MAX_ERROR_DEG)
+
+
+def test_resync_error_against_simulated_tics(sim_arm, clock):
+    estimator = ArmStateEstimator(sim_arm, resync_interval=0.2)
+    estimator.get_joint_degs(clock.now)
+    sim_arm.move_to_pos_coordinated_f(10.0, 100.0)
+    for _ in range(10):
+        clock.now += 0.05
+        estimator.get_joint_degs(clock.now)
+    assert estimator.stats.resyncs >= 3
+    assert estimator.stats.max_error_deg < MAX_ERROR_DEG
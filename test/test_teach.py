@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+
+from src.arm import Arm, NoChecker
+from src.motor_controller import TicMotorController
+from src.teach import TeachRecorder, TeachRecording, douglas_peucker, limited_speedup
+
+POINTS = [(10.0, 100.0), (12.0, 101.0), (14.0, 102.0)]
+
+
+@pytest.fixture
+def arm(setup, fake_tic):
+    return Arm(setup, TicMotorController(fake_tic(), False), TicMotorController(fake_tic(), False), NoChecker(setup))
+
+
+def line_recording(n=50, pause=0):
+    t = np.arange(n + pause, dtype=np.float64) * 0.02
+    x = np.concatenate((np.linspace(0.0, 40.0, n), np.full(pause, 40.0)))
+    y = np.full(n + pause, 100.0)
+    return TeachRecording(t, x, y, np.linspace(0.0, 1.0, n + pause), np.linspace(1.0, 2.0, n + pause), "-+")
+
+
+@pytest.mark.parametrize("mode", ["+-", "-+"])
+def test_recorder_uses_the_mode_moved_in(arm, mode):
+    recorder = TeachRecorder(arm)
+    recorder.start()
+    for x, y in POINTS:
+        recorder.record(x, y, mode)
+    rec = recorder.stop()
+
+    assert rec.mode == mode
+    assert len(rec) == len(POINTS)
+    for k, (x, y) in enumerate(POINTS):
+        state = arm.kine_solver.inverse_kinematics_f(x, y, mode)[0]
+        assert np.exp(1j * rec.q1[k]) == pytest.approx(np.exp(1j * state.lf_base_ang))
+        assert np.exp(1j * rec.q2[k]) == pytest.approx(np.exp(1j * state.rt_base_ang))
+
+
+def test_recorder_ignores_samples_when_stopped(arm):
+    recorder = TeachRecorder(arm)
+    recorder.record(*POINTS[0], "+-")
+    recorder.start()
+    recorder.record(*POINTS[1], "-+")
+    rec = recorder.stop()
+    recorder.record(*POINTS[2], "+-")
+    assert len(rec) == 1 and rec.mode == "-+"
+    assert np.all(np.diff(rec.t) >= 0)
+
+
+def test_douglas_peucker_keeps_corners():
+    points = np.array([[0, 0], [1, 0.01], [2, 0], [2, 1], [2, 2]], dtype=np.float64)
+    assert douglas_peucker(points, 0.1).tolist() == [0, 2, 4]
+    # (2, 1) lies on the segment between its neighbours at any tolerance
+    assert douglas_peucker(points, 0.001).tolist() == [0, 1, 2, 4]
+
+
+def test_compress_drops_straight_samples_but_keeps_pauses():
+    assert len(line_recording().compress()) == 2
+    paused = line_recording(pause=25).compress()
+    assert len(paused) == 3
+    assert paused.mode == "-+"
+    assert paused.t[-1] == pytest.approx(line_recording(pause=25).t[-1])
+
+
+def test_save_load_round_trip(tmp_path):
+    rec = line_recording(pause=5)
+    path = str(tmp_path / "line.teach")
+    rec.save(path)
+    loaded = TeachRecording.load(path)
+    assert loaded.mode == rec.mode
+    np.testing.assert_array_equal(loaded.t, rec.t)
+    for name in ("x", "y", "q1", "q2"):
+        np.testing.assert_allclose(getattr(loaded, name), getattr(rec, name), rtol=1e-6, atol=1e-5)
+
+
+def test_load_rejects_other_files(tmp_path):
+    path = tmp_path / "junk.teach"
+    path.write_bytes(b"not a recording")
+    with pytest.raises(ValueError):
+        TeachRecording.load(str(path))
+
+
+def test_limited_speedup_respects_motor_limits(arm):
+    rec = line_recording()
+    # q1 turns 1 rad in about a second: ~57 deg/s
+    factor = limited_speedup(arm, rec, 100.0)
+    peak_deg_per_sec = np.degrees(np.max(np.abs(np.diff(rec.q1) / np.diff(rec.t))))
+    assert factor < 100.0
+    assert peak_deg_per_sec * factor <= arm.lf_motor.max_deg_per_sec * (1 + 1e-9)
+    assert limited_speedup(arm, rec, 0.5) == 0.5
@@ -0,0 +1,94 @@
+import pytest
+from ticlib.ticlib import GET_VARIABLE_CMD
+
+from src.tic_sim import MAX_BLOCK_READ, PLANNING_POSITION, STATE_NORMAL, SimulatedTic
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def tic(clock):
+    tic = SimulatedTic(clock=clock)
+    tic.energize()
+    tic.exit_safe_start()
+    return tic
+
+
+def test_stays_put_until_energized_and_out_of_safe_start(clock):
+    tic = SimulatedTic(clock=clock)
+    tic.set_target_position(100)
+    clock.now = 1.0
+    assert tic.get_current_position() == 0
+    tic.energize()
+    clock.now = 2.0
+    assert tic.get_current_position() == 0
+    tic.exit_safe_start()
+    assert tic.get_operation_state() == STATE_NORMAL
+    clock.now = 3.0
+    assert tic.get_current_position() == 100
+
+
+def test_trapezoidal_move_time(tic, clock):
+    tic.set_max_speed(10_000 * 100_00)  # 10000 steps/s
+    tic.set_max_acceleration(100_000 * 100)  # 100000 steps/s^2
+    tic.set_target_position(5000)
+    # 0.1 s ramps covering 1000 steps, 4000 at full speed: 0.6 s in all
+    clock.now = 0.55
+    assert 4000 < tic.get_current_position() < 5000
+    assert tic.get_current_velocity() > 0
+    clock.now = 0.61
+    assert tic.get_current_position() == 5000
+    assert tic.get_current_velocity() == 0
+
+
+def test_acting_target_position(tic, clock):
+    assert tic.get_acting_target_position() == 0
+    tic.set_target_position(3000)
+    clock.now = 0.05
+    assert tic.get_planning_mode() == PLANNING_POSITION
+    assert tic.get_acting_target_position() == tic.get_target_position() == 3000
+    assert tic.get_current_position() != 3000
+
+    tic.halt_and_hold()
+    held = tic.get_current_position()
+    assert tic.get_acting_target_position() == held
+    assert tic.get_target_position() == 3000
+
+    tic.halt_and_set_position(-200)
+    assert tic.get_acting_target_position() == tic.get_current_position() == -200
+
+
+def test_variables_read_back_settings(tic):
+    tic.set_max_speed(123_456)
+    tic.set_max_acceleration(7_890)
+    tic.set_step_mode(3)
+    tic.set_current_limit(20)
+    assert tic.get_max_speed() == 123_456
+    assert tic.get_max_acceleration() == 7_890
+    assert tic.get_step_mode() == 3
+    assert tic.get_current_limit() == 20
+
+
+def test_block_read_length_limit(tic):
+    with pytest.raises(ValueError):
+        tic._block_read(GET_VARIABLE_CMD, 0, MAX_BLOCK_READ + 1)
+
+
+def test_reset_powers_up_again(tic, clock):
+    tic.set_target_position(100)
+    clock.now = 1.0
+    tic.reset()
+    assert tic.get_device_reset() == 1
+    assert tic.get_current_position() == 0
+    assert tic.get_operation_state() != STATE_NORMAL
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from src.kinematics import ParaScaraKinematics
+from src.trajectory import ArcPath, LinePath, PolylinePath, SCurveProfile, plan_trajectory, time_optimal_trajectory
+
+MAX_DEG_PER_SEC = (360.0, 300.0)
+MAX_ACC_DEG_PER_SEC2 = (1800.0, 1500.0)
+# finite differences of the sampled motion against the limits
+TOL = 1.01
+
+PATHS = {
+    "line": LinePath((-20.0, 100.0), (80.0, 120.0)),
+    "arc": ArcPath.from_center((30.0, 100.0), (0.0, 110.0), np.pi / 2),
+    "polyline": PolylinePath([(-20.0, 90.0), (40.0, 130.0), (80.0, 100.0)]),
+}
+
+
+@pytest.fixture(scope="module")
+def kine(setup):
+    return ParaScaraKinematics(setup)
+
+
+def segment_peaks_deg(traj):
+    """ Peak joint speeds and accelerations from the segment velocities, as streamed. """
+    q = np.stack((traj.q1, traj.q2), axis=-1)
+    dt = np.diff(traj.t)
+    vel = np.diff(q, axis=0) / dt[:, None]
+    acc = np.diff(vel, axis=0) / ((dt[:-1] + dt[1:]) / 2)[:, None]
+    return np.degrees(np.abs(vel).max(axis=0)), np.degrees(np.abs(acc).max(axis=0))
+
+
+@pytest.mark.parametrize("n_samples", [100, 500])
+@pytest.mark.parametrize("name", PATHS)
+def test_time_optimal_keeps_joint_limits(kine, name, n_samples):
+    traj, cycle_time = time_optimal_trajectory(kine, PATHS[name], MAX_DEG_PER_SEC, MAX_ACC_DEG_PER_SEC2, n_samples)
+    assert cycle_time == pytest.approx(traj.duration)
+    assert np.all(np.diff(traj.t) > 0)
+
+    for peak, limit in zip(traj.max_joint_speed_deg(), MAX_DEG_PER_SEC):
+        assert peak <= limit * TOL
+    for peak, limit in zip(traj.max_joint_acc_deg(), MAX_ACC_DEG_PER_SEC2):
+        assert peak <= limit * TOL
+
+    vel, acc = segment_peaks_deg(traj)
+    assert np.all(vel <= np.array(MAX_DEG_PER_SEC) * TOL)
+    assert np.all(acc <= np.array(MAX_ACC_DEG_PER_SEC2) * TOL)
+
+
+def test_time_optimal_uses_the_limits(kine):
+    """ Some joint runs at (close to) a limit, the timing isn't just conservative. """
+    traj, _ = time_optimal_trajectory(kine, PATHS["line"], MAX_DEG_PER_SEC, MAX_ACC_DEG_PER_SEC2)
+    vel, acc = segment_peaks_deg(traj)
+    assert max(np.max(vel / MAX_DEG_PER_SEC), np.max(acc / MAX_ACC_DEG_PER_SEC2)) > 0.99
+
+
+def test_time_optimal_unreachable_path(kine):
+    with pytest.raises(ValueError):
+        time_optimal_trajectory(kine, LinePath((0.0, 100.0), (0.0, 500.0)), MAX_DEG_PER_SEC, MAX_ACC_DEG_PER_SEC2)
+
+
+def test_plan_trajectory_follows_profile(kine):
+    path = PATHS["line"]
+    profile = SCurveProfile(path.length, 100, 500)
+    traj = plan_trajectory(kine, path, profile, dt=0.01)
+    assert traj.duration == pytest.approx(profile.duration)
+    assert (traj.x[0], traj.y[0]) == pytest.approx(path.start)
+    assert (traj.x[-1], traj.y[-1]) == pytest.approx(path.end)
@@ -0,0 +1,75 @@
+import os
+
+import numpy as np
+import pytest
+
+from src.arm import LinkAngleChecker
+from src.workspace import CELL_INVALID, WorkspaceGrid, workspace_key
+from src.consts import ur
+
+RESOLUTION = 4.0
+
+
+@pytest.fixture(scope="module")
+def checker(setup):
+    return LinkAngleChecker(setup)
+
+
+@pytest.fixture(scope="module")
+def grid(checker):
+    return WorkspaceGrid.build(checker, RESOLUTION)
+
+
+def brute_force_nearest_dist(occupancy):
+    valid = np.argwhere(occupancy)
+    cells = np.indices(occupancy.shape).reshape(2, -1).T
+    dist = np.sqrt(((cells[:, None, :] - valid[None, :, :]) ** 2).sum(axis=-1))
+    return dist.min(axis=1).reshape(occupancy.shape)
+
+
+def test_nearest_valid_matches_brute_force():
+    rng = np.random.default_rng(0)
+    occupancy = rng.random((40, 55)) < 0.03
+    nearest = WorkspaceGrid._find_nearest_valid(occupancy)
+    assert occupancy.reshape(-1)[nearest.reshape(-1)].all()
+    ni, nj = np.divmod(nearest, occupancy.shape[1])
+    i, j = np.indices(occupancy.shape)
+    np.testing.assert_allclose(np.hypot(ni - i, nj - j), brute_force_nearest_dist(occupancy))
+
+
+def test_nearest_valid_empty_grid():
+    nearest = WorkspaceGrid._find_nearest_valid(np.zeros((5, 7), dtype=np.bool_))
+    assert (nearest == -1).all()
+
+
+def test_save_load_round_trip(grid, tmp_path):
+    path = os.path.join(tmp_path, "grid.npz")
+    grid.save(path)
+    loaded = WorkspaceGrid.load(path)
+    np.testing.assert_array_equal(loaded.occupancy, grid.occupancy)
+    np.testing.assert_array_equal(loaded.cells, grid.cells)
+    np.testing.assert_array_equal(loaded.nearest_valid, grid.nearest_valid)
+    assert (loaded.x_min, loaded.y_min, loaded.resolution, loaded.mode) == (
+        grid.x_min, grid.y_min, grid.resolution, grid.mode
+    )
+
+
+def test_load_or_build_uses_cache_dir(checker, setup, tmp_path):
+    key = workspace_key(setup, 10 * ur.deg, RESOLUTION, "+-")
+    built = WorkspaceGrid.load_or_build(checker, key, RESOLUTION, cache_dir=str(tmp_path))
+    assert os.listdir(tmp_path) == [f"workspace_{key}.npz"]
+    loaded = WorkspaceGrid.load_or_build(checker, key, RESOLUTION, cache_dir=str(tmp_path))
+    np.testing.assert_array_equal(loaded.occupancy, built.occupancy)
+
+
+def test_load_or_build_without_cache_dir_writes_nothing(checker, setup, tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    key = workspace_key(setup, 10 * ur.deg, RESOLUTION, "+-")
+    WorkspaceGrid.load_or_build(checker, key, RESOLUTION, cache_dir=None)
+    assert os.listdir(tmp_path) == []
+
+
+def test_nearest_valid_point_is_valid(grid):
+    for x, y in [(0.0, 0.0), (300.0, 300.0), (27.5, 60.0), (-200.0, 10.0)]:
+        px, py = grid.nearest_valid_point(x, y)
+        assert grid.lookup(px, py) != CELL_INVALID
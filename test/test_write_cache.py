@@ -0,0 +1,121 @@
+import pytest
+
+from src.arm import Arm
+from src.motor_controller import I2CticMotorController, TicMotorController
+
+LF, RT = 0x0E, 0x0F
+SET_TARGET_POSITION = 0xE0
+
+
+@pytest.fixture
+def motor(fake_tic):
+    motor = TicMotorController(fake_tic(), False)
+    motor.reset_pos(0.0)
+    return motor
+
+
+def test_repeated_values_are_skipped(motor):
+    before = motor.tic.transactions
+    stats = motor.write_stats
+    writes, skipped = stats.writes, stats.skipped
+
+    motor.move_to_angle(90.0, True, 180.0, 900.0)
+    sent = motor.tic.transactions - before
+    # position read, speed, acceleration, deceleration and target
+    assert sent == 5
+    motor.move_to_angle(90.0, True, 180.0, 900.0)
+    # only the position read
+    assert motor.tic.transactions - before == sent + 1
+    assert stats.writes == writes + 4
+    assert stats.skipped == skipped + 4
+    assert 0.0 < stats.skip_rate < 1.0
+
+
+def test_changed_values_are_sent(motor):
+    motor.set_spd(100.0)
+    max_speed = motor.tic.values["max_speed"]
+    motor.set_spd(200.0)
+    assert motor.tic.values["max_speed"] == 2 * max_speed
+    motor.set_current_limit(10)
+    motor.set_current_limit(12)
+    assert motor.tic.values["current_limit"] == 12
+
+
+def test_invalidate_resends(motor):
+    motor.set_spd(100.0)
+    motor.invalidate_write_cache()
+    before = motor.tic.transactions
+    motor.set_spd(100.0)
+    assert motor.tic.transactions == before + 1
+    assert motor.write_stats.invalidations >= 1
+
+
+def test_reset_pos_and_deenergize_invalidate(motor):
+    for reset in (lambda: motor.reset_pos(0.0), motor.deenergize):
+        motor.set_spd(100.0)
+        reset()
+        before = motor.tic.transactions
+        motor.set_spd(100.0)
+        assert motor.tic.transactions == before + 1
+
+
+def test_tic_error_invalidates(motor):
+    motor.set_spd(100.0)
+    # e.g. a brown-out: the Tic reset and forgot everything
+    motor.tic.values["error_status"] = 1
+    motor.tic.values["max_speed"] = 0
+    assert motor.get_status().error_status
+    motor.set_spd(100.0)
+    assert motor.tic.values["max_speed"] == round(100.0 / motor.deg_per_micro_step * 100_00)
+
+
+def test_failed_write_invalidates(motor, monkeypatch):
+    motor.set_spd(100.0)
+
+    def fail(value):
+        raise OSError("remote I/O error")
+
+    with monkeypatch.context() as m:
+        m.setattr(motor.tic, "set_max_acceleration", fail)
+        with pytest.raises(OSError):
+            motor.set_acc(500.0)
+    before = motor.tic.transactions
+    motor.set_spd(100.0)
+    assert motor.tic.transactions == before + 1
+
+
+@pytest.fixture
+def i2c_arm(setup, fake_smbus, monkeypatch):
+    monkeypatch.setattr("src.i2c_bus._buses", {})
+    return Arm(setup, I2CticMotorController(1, LF, False), I2CticMotorController(1, RT, False))
+
+
+def sent_targets(smbus):
+    return [addr for kind, addr, data in smbus.log if kind == "w" and data[0] == SET_TARGET_POSITION]
+
+
+def test_failed_batch_invalidates(i2c_arm):
+    motor = i2c_arm.lf_motor
+    smbus = motor.bus.smbus
+    with pytest.raises(OSError):
+        with motor.batch_writes():
+            motor.set_target_position(1000)
+            smbus.fail = True
+    smbus.fail = False
+    smbus.log.clear()
+    motor.set_target_position(1000)
+    assert sent_targets(smbus) == [LF]
+
+
+def test_failed_arm_batch_invalidates_both_motors(i2c_arm):
+    smbus = i2c_arm.lf_motor.bus.smbus
+    with pytest.raises(OSError):
+        with i2c_arm.batch_writes():
+            i2c_arm.lf_motor.set_target_position(1000)
+            i2c_arm.rt_motor.set_target_position(2000)
+            smbus.fail = True
+    smbus.fail = False
+    smbus.log.clear()
+    i2c_arm.lf_motor.set_target_position(1000)
+    i2c_arm.rt_motor.set_target_position(2000)
+    assert sent_targets(smbus) == [LF, RT]
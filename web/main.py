@@ -14,6 +14,8 @@ from web.teleop import CombinedTeleop, ChassisTeleop, ArmTeleop, PusherTeleop
 from web.video import gen_frames
 
 from src.robot import DEFAULT_ROBOT
+from src.scheduler import SupersedingScheduler
+from src.bus_metrics import get_bus_metrics
 from src.consts import ur
 
 app = FastAPI()
@@ -27,7 +29,12 @@ robot = DEFAULT_ROBOT
 teleop = CombinedTeleop(
     robot,
     ChassisTeleop(robot, coef=1.0),
-    ArmTeleop(robot, start_pos=(0 * ur.mm, 100 * ur.mm), max_speed=200.0 * ur.mm),
+    ArmTeleop(
+        robot,
+        start_pos=(0 * ur.mm, 100 * ur.mm),
+        max_speed=200.0 * ur.mm,
+        scheduler=SupersedingScheduler(robot.arm.executor),
+    ),
     PusherTeleop(robot),
 )
 
@@ -42,7 +49,7 @@ async def websocket_endpoint(ws: WebSocket):
         msg="Please move both motors to perpendicular position.", require_confirm="ok"
     )
     await rmngr.send_and_wait(req1)
-    teleop.robot.arm.reset_deg(90, 90)
+    await teleop.robot.arm.reset_deg_async(90, 90)
     print("Arm reset to (90, 90)")
 
     req2 = ConfirmRequestEvent(
@@ -63,7 +70,7 @@ async def websocket_endpoint(ws: WebSocket):
                     continue
                 print("Gamepad latency (ms):", raw_state.latency)
                 gs = GamepadState.from_raw(raw_state, DEFAULT_GPAD_MAPPING)
-                teleop.update(gs)
+                await teleop.update_async(gs)
                 
                 end_time = time.time()
                 print(f"Main loop processed in {end_time - start_time:.4f} seconds")
@@ -73,6 +80,12 @@ async def websocket_endpoint(ws: WebSocket):
         print("WebSocket disconnected")
 
 
+@app.get("/metrics/i2c")
+def i2c_metrics(reset: bool = False):
+    """ Per device and Tic command call counts, bytes and latency histograms. """
+    return get_bus_metrics().snapshot(reset=reset)
+
+
 @app.get("/video_feed")
 def video_feed():
     return StreamingResponse(
@@ -1,9 +1,12 @@
 from src.robot import Robot
 from web.gamepad import GamepadState, GamepadBtn
-from src.consts import vec2q, pqt, ur
+from src.consts import vec2f, vec2q, pqt, ur, DEF_LEN_UNIT
+from src.scheduler import SupersedingScheduler
+from src.teach import TeachRecorder
 
-from typing import override
+from typing import Optional, override
 from abc import ABC, abstractmethod
+import asyncio
 import time
 
 
@@ -16,6 +19,10 @@ class TeleopController(ABC):
         """Update the robot's state based on the gamepad input."""
         pass
 
+    async def update_async(self, gamepad_state: GamepadState) -> None:
+        """Run `update` in a worker thread so the event loop stays free."""
+        await asyncio.to_thread(self.update, gamepad_state)
+
 
 class CombinedTeleop(TeleopController):
     def __init__(self, robot: Robot, *controllers: TeleopController):
@@ -28,22 +35,43 @@ class CombinedTeleop(TeleopController):
         for controller in self.controllers:
             controller.update(gamepad_state)
 
+    @override
+    async def update_async(self, gamepad_state: GamepadState) -> None:
+        # independent actuators, so a slow I2C bus doesn't hold up the GPIO driven ones
+        await asyncio.gather(*(controller.update_async(gamepad_state) for controller in self.controllers))
+
 
 class ArmTeleop(TeleopController):
-    def __init__(self, robot: Robot, start_pos: vec2q, max_speed: pqt):
+    def __init__(
+        self,
+        robot: Robot,
+        start_pos: vec2q,
+        max_speed: pqt,
+        scheduler: Optional[SupersedingScheduler] = None,
+        recorder: Optional[TeachRecorder] = None,
+        mode: str = "+-",
+    ):
         super().__init__(robot)
         self.start_pos = start_pos
         self.max_speed = max_speed
-        self.target_x, self.target_y = start_pos
+        # the update loop runs on the unit-free kinematics path, in DEF_LEN_UNIT
+        self.max_speed_f: float = max_speed.to(DEF_LEN_UNIT).m
+        self.target_x: float = start_pos[0].to(DEF_LEN_UNIT).m
+        self.target_y: float = start_pos[1].to(DEF_LEN_UNIT).m
         self.last_time = time.time()
-        self.prev_state = self.robot.arm.get_current_state(mode="o")[0]
+        self.prev_state = self.robot.arm.get_estimated_state_f(mode="o")[0]
         self.moved_to_start = False
-
-    @override
-    def update(self, gamepad_state: GamepadState) -> None:
-        st_time = time.time()
+        # with a scheduler, update_async only queues the latest target instead of waiting for the bus
+        self.scheduler = scheduler
+        # while recording, every target actually sent to the arm is taught
+        self.recorder = recorder
+        # IK mode targets are moved to in, and recorded with
+        self.mode = mode
+
+    def _next_target(self, gamepad_state: GamepadState) -> Optional[vec2f]:
+        """Advance the target by the stick input; None if the arm should not move."""
         if not gamepad_state.btn_lb.pressed and self.moved_to_start:
-            return
+            return None
         self.moved_to_start = True
         gamepad_state = gamepad_state.filter_deadzone(0.05)
 
@@ -54,33 +82,55 @@ class ArmTeleop(TeleopController):
         dt = now - self.last_time
         self.last_time = now
 
-        dx = raw_x * self.max_speed * dt
-        dy = raw_y * self.max_speed * dt
+        dx = raw_x * self.max_speed_f * dt
+        dy = raw_y * self.max_speed_f * dt
 
         new_x = self.target_x + dx
         new_y = self.target_y + dy
-        assert isinstance(new_x, pqt) and isinstance(
-            new_y, pqt
-        ), "new_x and new_y must be pqt"
         try:
-            if not self.robot.arm.is_pos_valid(new_x, new_y):
-                print("not in the workspace")
-                return
+            if not self.robot.arm.is_pos_valid_f(new_x, new_y, self.mode):
+                # slide along the workspace boundary instead of sticking at it
+                projected = self.robot.arm.project_pos_f(new_x, new_y, self.mode)
+                if projected is None:
+                    print("not in the workspace")
+                    return None
+                new_x, new_y = projected
         except (IndexError, ValueError) as e:
             print("not in the workspace", e)
-            print("last valid state", self.prev_state.to_unit(ur.mm, ur.deg))
-            return
+            print("last valid state", self.prev_state.to_quantity().to_unit(ur.mm, ur.deg))
+            return None
 
         self.target_x, self.target_y = new_x, new_y
-        self.robot.arm.move_to_pos(self.target_x, self.target_y)
+        return new_x, new_y
 
-        ed_time = time.time()
-        print("arm teleop update time: ", ed_time - st_time)
+    def _move_to(self, x: float, y: float) -> None:
+        self.robot.arm.move_to_pos_f(x, y, mode=self.mode)
+        if self.recorder is not None:
+            self.recorder.record(x, y, self.mode)
         try:
-            self.prev_state = self.robot.arm.get_current_state(mode="oi")[0]
+            self.prev_state = self.robot.arm.get_estimated_state_f(mode="oi")[0]
         except IndexError:
             pass
 
+    @override
+    def update(self, gamepad_state: GamepadState) -> None:
+        st_time = time.time()
+        target = self._next_target(gamepad_state)
+        if target is None:
+            return
+        self._move_to(*target)
+        print("arm teleop update time: ", time.time() - st_time)
+
+    @override
+    async def update_async(self, gamepad_state: GamepadState) -> None:
+        if self.scheduler is None:
+            # arm moves are I2C transactions, they belong on the hardware I/O thread
+            await self.robot.arm.executor.run(self.update, gamepad_state)
+            return
+        target = self._next_target(gamepad_state)
+        if target is not None:
+            self.scheduler.submit("arm", self._move_to, *target)
+
 
 class ChassisTeleop(TeleopController):
     def __init__(self, robot: Robot, coef: float = 1.0):